@@ -0,0 +1,165 @@
+"""
+Compact ARIMA artifacts
+Stores only what forecasting needs (order, parameters and the final
+predicted state) in an .npz file instead of the pickled statsmodels results
+with residuals and training data. The ARIMA(p,d,q) state-space form is
+rebuilt from the parameters in NumPy, so serving never touches statsmodels
+"""
+from pathlib import Path
+from typing import Sequence, Tuple
+import numpy as np
+
+ARIMA_ARTIFACT_SUFFIX = '.npz'
+
+# Prior variance of the integrated states, as in statsmodels' approximate
+# diffuse initialization
+DIFFUSE_VARIANCE = 1e6
+
+
+def split_arima_params(order: Tuple[int, int, int], params: np.ndarray) -> Tuple[float, np.ndarray, np.ndarray, float]:
+    """
+    Split statsmodels' ARIMA parameter vector into (const, ar, ma, sigma2)
+    Layout is [const] ar.L1..ar.Lp ma.L1..ma.Lq sigma2; the constant is only
+    present for trend='c'
+    """
+    p, _, q = order
+    params = np.asarray(params, dtype=float)
+    
+    if len(params) == p + q + 2:
+        const, params = params[0], params[1:]
+    elif len(params) == p + q + 1:
+        const = 0.0
+    else:
+        raise ValueError(f"Expected {p + q + 1} ARIMA{tuple(order)} parameters, got {len(params)}")
+    
+    return float(const), params[:p], params[p:p + q], float(params[-1])
+
+
+def arima_state_space(order: Tuple[int, int, int], ar_params: Sequence[float],
+                      ma_params: Sequence[float]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Design, transition and selection matrices of an ARIMA(p,d,q) model
+    Same state layout as statsmodels (simple_differencing=False): d integrated
+    states followed by max(p, q + 1) ARMA states in Harvey form
+    """
+    p, d, q = order
+    k_arma = max(p, q + 1)
+    k_states = d + k_arma
+    
+    design = np.zeros(k_states)
+    design[:d + 1] = 1.0
+    
+    transition = np.zeros((k_states, k_states))
+    transition[:d, :d] = np.triu(np.ones((d, d)))
+    transition[:d, d] = 1.0
+    transition[d:d + p, d] = ar_params
+    transition[d:-1, d + 1:] += np.eye(k_arma - 1)
+    
+    selection = np.zeros(k_states)
+    selection[d] = 1.0
+    selection[d + 1:d + 1 + q] = ma_params
+    
+    return design, transition, selection
+
+
+def _initial_state_cov(transition: np.ndarray, selection: np.ndarray, sigma2: float, d: int) -> np.ndarray:
+    # Diffuse prior for the integrated states, stationary one for the ARMA block
+    arma_transition = transition[d:, d:]
+    arma_cov = sigma2 * np.outer(selection[d:], selection[d:])
+    k_arma = arma_transition.shape[0]
+    
+    cov = np.zeros_like(transition)
+    cov[:d, :d] = DIFFUSE_VARIANCE * np.eye(d)
+    cov[d:, d:] = np.linalg.solve(
+        np.eye(k_arma * k_arma) - np.kron(arma_transition, arma_transition), arma_cov.ravel()
+    ).reshape(k_arma, k_arma)
+    return cov
+
+
+class CompactARIMA:
+    """
+    Forecast-only ARIMA(p,d,q) model driven by its stored parameters
+    Point forecasts iterate the state-space recursion from the predicted
+    state after the last observation, which reproduces statsmodels' forecast()
+    """
+    
+    def __init__(self, order: Tuple[int, int, int], params: np.ndarray, resid_std: float,
+                 nobs: int, state: np.ndarray):
+        self.order = tuple(int(v) for v in order)
+        self.params = np.asarray(params, dtype=float)
+        self.resid_std = float(resid_std)
+        self.nobs = int(nobs)
+        self.state = np.asarray(state, dtype=float)
+        
+        self.const, self.ar_params, self.ma_params, self.sigma2 = split_arima_params(self.order, self.params)
+        self.design, self.transition, self.selection = arima_state_space(
+            self.order, self.ar_params, self.ma_params
+        )
+    
+    def forecast(self, steps: int) -> np.ndarray:
+        """Point forecasts for the next `steps` periods"""
+        forecasts = np.empty(steps)
+        state = self.state
+        for h in range(steps):
+            forecasts[h] = self.design @ state + self.const
+            state = self.transition @ state
+        return forecasts
+    
+    @classmethod
+    def from_params(cls, order: Tuple[int, int, int], params: np.ndarray, endog: np.ndarray) -> 'CompactARIMA':
+        """
+        Run the Kalman filter over the training series with fitted parameters
+        Only the final predicted state and the residual spread are kept
+        """
+        const, ar_params, ma_params, sigma2 = split_arima_params(order, params)
+        design, transition, selection = arima_state_space(order, ar_params, ma_params)
+        state_cov = sigma2 * np.outer(selection, selection)
+        
+        endog = np.asarray(endog, dtype=float).ravel()
+        state = np.zeros(len(design))
+        cov = _initial_state_cov(transition, selection, sigma2, order[1])
+        resid = np.empty(len(endog))
+        
+        for t, obs in enumerate(endog):
+            resid[t] = obs - const - design @ state
+            cov_design = cov @ design
+            variance = design @ cov_design
+            gain = transition @ cov_design / variance
+            state = transition @ state + gain * resid[t]
+            cov = transition @ cov @ transition.T + state_cov - np.outer(gain, gain) * variance
+        
+        return cls(order=order, params=params, resid_std=float(np.std(resid)),
+                   nobs=len(endog), state=state)
+    
+    @classmethod
+    def from_results(cls, results) -> 'CompactARIMA':
+        """Extract the forecasting state from fitted statsmodels ARIMA results"""
+        return cls.from_params(results.model.order, results.params, results.model.endog)
+
+
+def save_arima_artifact(results, path: Path) -> Path:
+    """Write fitted statsmodels ARIMA results as a compact .npz artifact"""
+    model = results if isinstance(results, CompactARIMA) else CompactARIMA.from_results(results)
+    path = Path(path).with_suffix(ARIMA_ARTIFACT_SUFFIX)
+    
+    np.savez(
+        path,
+        order=np.array(model.order),
+        params=model.params,
+        resid_std=model.resid_std,
+        nobs=model.nobs,
+        state=model.state
+    )
+    return path
+
+
+def load_arima_artifact(path: Path) -> CompactARIMA:
+    """Load a compact ARIMA artifact written by save_arima_artifact"""
+    with np.load(path) as data:
+        return CompactARIMA(
+            order=data['order'],
+            params=data['params'],
+            resid_std=data['resid_std'],
+            nobs=data['nobs'],
+            state=data['state']
+        )
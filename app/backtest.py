@@ -0,0 +1,86 @@
+"""
+Rolling-origin backtesting
+Forecast origins per series, error and interval metrics computed over all
+(user, model, origin) rows at once, and the columnar results file written
+by scripts/backtest_models.py and read by scripts/plot_backtest.py
+"""
+import os
+from pathlib import Path
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+
+# Per-row scalar columns; the rest of the file is [rows, horizon] matrices
+RESULT_COLUMNS = [
+    'user_id', 'model_type', 'origin', 'train_days', 'fit_seconds', 'error',
+    'mae', 'rmse', 'mape', 'coverage'
+]
+PATH_COLUMNS = ['actual', 'forecast', 'lower', 'upper']
+
+
+def rolling_origins(n_days: int, horizon: int, folds: int, step: int, min_train_days: int) -> List[int]:
+    """
+    Training lengths of up to `folds` origins, latest first
+    Each origin is followed by `horizon` held-out days; earlier origins are
+    `step` days apart and keep at least min_train_days of training data
+    """
+    origins = [n_days - horizon - fold * step for fold in range(folds)]
+    return [origin for origin in origins if origin >= min_train_days]
+
+
+def forecast_metrics(actual: np.ndarray, forecast: np.ndarray, lower: np.ndarray,
+                     upper: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    MAE, RMSE, MAPE and interval coverage of each row of [rows, horizon] paths
+    MAPE divides by actual + 1 like the validation scripts, since most days
+    have no income. Rows without a forecast (NaN) get NaN metrics.
+    """
+    errors = actual - forecast
+    failed = np.isnan(forecast).any(axis=1)
+    inside = (actual >= lower) & (actual <= upper)
+    
+    return {
+        'mae': np.abs(errors).mean(axis=1),
+        'rmse': np.sqrt((errors ** 2).mean(axis=1)),
+        'mape': (np.abs(errors) / (actual + 1)).mean(axis=1) * 100,
+        'coverage': np.where(failed, np.nan, inside.mean(axis=1))
+    }
+
+
+def write_backtest_results(path: Path, columns: Dict[str, np.ndarray]) -> None:
+    """Write RESULT_COLUMNS and PATH_COLUMNS arrays to an .npz file, replacing it atomically"""
+    path = Path(path)
+    partial = path.with_name(f"{path.name}.partial")
+    with open(partial, 'wb') as f:
+        np.savez_compressed(f, **{name: columns[name] for name in RESULT_COLUMNS + PATH_COLUMNS})
+    os.replace(partial, path)
+
+
+def load_backtest_results(path: Path) -> Dict[str, np.ndarray]:
+    """Every column of a results file"""
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def backtest_frame(results: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """One row per (user, model, origin) with the scalar columns"""
+    return pd.DataFrame({name: results[name] for name in RESULT_COLUMNS})
+
+
+def summarize_backtest(results: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """Per model: rows, failures, mean metrics over successful rows and total fit time"""
+    frame = backtest_frame(results)
+    frame['failed'] = frame['error'] != ''
+    grouped = frame.groupby('model_type', sort=False)
+    
+    summary = grouped.agg(
+        rows=('user_id', 'size'),
+        users=('user_id', 'nunique'),
+        failed=('failed', 'sum'),
+        mae=('mae', 'mean'),
+        rmse=('rmse', 'mean'),
+        mape=('mape', 'mean'),
+        coverage=('coverage', 'mean'),
+        fit_seconds=('fit_seconds', 'sum')
+    )
+    return summary
@@ -11,6 +11,29 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     environment: str = "development"
+    # "python" (vectorized pandas/NumPy kernel) or "postgres" (SQL pushdown)
+    feature_engine: str = "python"
+    # Memory bound for the in-process pre-trained model cache
+    pretrained_cache_max_mb: int = 256
+    # "numpy" serves ARIMA from stored parameters, "statsmodels" keeps legacy
+    # pickled results on the statsmodels forecast path
+    arima_serving: str = "numpy"
+    # "future" predicts only future dates with residual-quantile intervals,
+    # "full" runs Prophet.predict over the history with sampled intervals
+    prophet_serving: str = "future"
+    # Stored forecast paths older than this, or with this many transactions
+    # added since training, fall back to live inference
+    forecast_max_age_days: int = 7
+    forecast_max_new_transactions: int = 10
+    # On-demand ARIMA fits run in a process pool; when it is saturated or a
+    # fit exceeds its budget the prediction uses the rolling mean (0 = in-process)
+    arima_fit_workers: int = 2
+    arima_fit_max_pending: int = 4
+    arima_fit_timeout_seconds: float = 5.0
+    # Fits are reused while a user's daily series is unchanged; set a
+    # directory to share them across processes and restarts
+    arima_fit_cache_entries: int = 1024
+    arima_fit_cache_dir: str = ""
 
 
 @lru_cache()
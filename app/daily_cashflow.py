@@ -0,0 +1,152 @@
+"""
+Daily cashflow rollup
+Keeps one daily_cashflow row per (user, day) in step with the transactions
+table, so daily income/expense series are read in O(days) instead of
+re-aggregating every transaction
+"""
+from datetime import date, datetime, timedelta
+from typing import Iterable, Optional, Set, Tuple
+import pandas as pd
+from sqlalchemy import event, inspect, select, text, cast, Float
+from sqlalchemy.orm import Session
+from app.models import Transaction, DailyCashflow
+
+DAILY_CASHFLOW_COLUMNS = [
+    'income_inr', 'expense_inr', 'income_count', 'expense_count',
+    'category_totals_inr', 'expense_by_category_inr'
+]
+
+# Per-category totals are keyed by the API value ('freelancing'), which is
+# the lowercased enum name stored in the transactions table
+_ROLLUP_SELECT_SQL = """
+SELECT user_id, cashflow_date,
+       sum(income_inr), sum(expense_inr), sum(income_count), sum(expense_count),
+       jsonb_object_agg(category, income_inr + expense_inr),
+       coalesce(jsonb_object_agg(category, expense_inr) FILTER (WHERE expense_count > 0), CAST('{{}}' AS jsonb)),
+       :now
+FROM (
+    SELECT user_id, CAST(txn_timestamp AS date) AS cashflow_date,
+           lower(CAST(merchant_category AS text)) AS category,
+           coalesce(sum(amount_inr) FILTER (WHERE is_income), 0) AS income_inr,
+           coalesce(sum(amount_inr) FILTER (WHERE NOT is_income), 0) AS expense_inr,
+           count(*) FILTER (WHERE is_income) AS income_count,
+           count(*) FILTER (WHERE NOT is_income) AS expense_count
+    FROM transactions
+    {where}
+    GROUP BY user_id, CAST(txn_timestamp AS date), merchant_category
+) per_category
+GROUP BY user_id, cashflow_date
+"""
+
+_INSERT_SQL = """
+INSERT INTO daily_cashflow (
+    user_id, cashflow_date, income_inr, expense_inr, income_count, expense_count,
+    category_totals_inr, expense_by_category_inr, updated_at
+)
+""" + _ROLLUP_SELECT_SQL
+
+_TOUCHED_DAYS = "SELECT * FROM unnest(CAST(:user_ids AS uuid[]), CAST(:days AS date[]))"
+
+
+def refresh_days(connection, keys: Iterable[Tuple[str, date]]) -> None:
+    """
+    Recompute the rollup rows for the given (user_id, day) pairs from the
+    transactions table. Days left without transactions lose their row.
+    """
+    keys = sorted({(str(user_id), day) for user_id, day in keys})
+    if not keys:
+        return
+    
+    params = {
+        'user_ids': [user_id for user_id, _ in keys],
+        'days': [day for _, day in keys],
+        'start': min(day for _, day in keys),
+        'end': max(day for _, day in keys) + timedelta(days=1),
+        'now': datetime.utcnow()
+    }
+    
+    connection.execute(text(
+        f"DELETE FROM daily_cashflow WHERE (user_id, cashflow_date) IN ({_TOUCHED_DAYS})"
+    ), params)
+    # The timestamp range lets the (user_id, txn_timestamp) index do the work
+    connection.execute(text(_INSERT_SQL.format(where=f"""
+    WHERE user_id = ANY(CAST(:user_ids AS uuid[]))
+      AND txn_timestamp >= :start AND txn_timestamp < :end
+      AND (user_id, CAST(txn_timestamp AS date)) IN ({_TOUCHED_DAYS})""")), params)
+
+
+def rebuild_daily_cashflow(db: Session, user_ids: Optional[Iterable[str]] = None) -> int:
+    """
+    Rebuild the rollup from scratch for every user (or the given users)
+    Used for the initial backfill and after bulk loads that bypass the ORM.
+    Returns the number of rows written. Caller commits.
+    """
+    params = {'now': datetime.utcnow()}
+    
+    if user_ids is None:
+        db.execute(text("DELETE FROM daily_cashflow"))
+        where = ''
+    else:
+        params['user_ids'] = [str(user_id) for user_id in user_ids]
+        db.execute(text(
+            "DELETE FROM daily_cashflow WHERE user_id = ANY(CAST(:user_ids AS uuid[]))"
+        ), params)
+        where = 'WHERE user_id = ANY(CAST(:user_ids AS uuid[]))'
+    
+    result = db.execute(text(_INSERT_SQL.format(where=where)), params)
+    return result.rowcount
+
+
+def load_daily_cashflow(db: Session, user_id: str, since: Optional[date] = None) -> pd.DataFrame:
+    """
+    A user's rollup rows as a DataFrame indexed by date (days with activity only)
+    Columns: income_inr, expense_inr, income_count, expense_count,
+    category_totals_inr, expense_by_category_inr
+    """
+    stmt = select(
+        DailyCashflow.cashflow_date,
+        cast(DailyCashflow.income_inr, Float),
+        cast(DailyCashflow.expense_inr, Float),
+        DailyCashflow.income_count,
+        DailyCashflow.expense_count,
+        DailyCashflow.category_totals_inr,
+        DailyCashflow.expense_by_category_inr
+    ).where(DailyCashflow.user_id == user_id)
+    
+    if since is not None:
+        stmt = stmt.where(DailyCashflow.cashflow_date >= since)
+    
+    rows = db.execute(stmt.order_by(DailyCashflow.cashflow_date)).all()
+    
+    df = pd.DataFrame.from_records(rows, columns=['date'] + DAILY_CASHFLOW_COLUMNS)
+    return df.set_index('date')
+
+
+def _touched_keys(session) -> Set[Tuple[str, date]]:
+    keys = set()
+    
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, Transaction):
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        
+        # Edits can move a transaction to another day: refresh both days
+        state = inspect(obj)
+        timestamps = [obj.txn_timestamp, *state.attrs.txn_timestamp.history.deleted]
+        user_ids = [obj.user_id, *state.attrs.user_id.history.deleted]
+        
+        for user_id in user_ids:
+            for ts in timestamps:
+                if user_id is not None and ts is not None:
+                    keys.add((str(user_id), ts.date()))
+    
+    return keys
+
+
+@event.listens_for(Session, 'after_flush')
+def _refresh_touched_days(session, flush_context):
+    """Keep the rollup in the same transaction as the transaction writes"""
+    keys = _touched_keys(session)
+    if keys:
+        refresh_days(session.connection(), keys)
@@ -0,0 +1,83 @@
+"""
+Expense forecast
+Projects spending from the daily_cashflow rollup with a day-of-week profile
+and splits it by merchant category
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+EXPENSE_LOOKBACK_DAYS = 90
+
+WEEKDAY_NAMES = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+
+def _expense_history(cashflow: pd.DataFrame, today: date, lookback_days: int) -> Tuple[pd.Series, Dict]:
+    # Daily spend over the lookback window (zero-filled) and per-category totals
+    window = pd.date_range(end=pd.Timestamp(today), periods=lookback_days + 1, freq='D')
+    
+    if cashflow.empty:
+        return pd.Series(0.0, index=window), {}
+    
+    recent = cashflow[cashflow.index >= window[0].date()]
+    expenses = pd.Series(
+        recent['expense_inr'].to_numpy(dtype=float), index=pd.to_datetime(recent.index)
+    ).reindex(window, fill_value=0.0)
+    
+    category_totals = {}
+    for totals in recent['expense_by_category_inr']:
+        for category, amount in totals.items():
+            category_totals[category] = category_totals.get(category, 0.0) + float(amount)
+    
+    return expenses, category_totals
+
+
+def _weekday_profile(expenses: pd.Series) -> pd.Series:
+    return expenses.groupby(expenses.index.dayofweek).mean().reindex(range(7), fill_value=0.0)
+
+
+def _weekday_path(profile: pd.Series, days: int, today: date) -> np.ndarray:
+    horizon = pd.date_range(start=pd.Timestamp(today) + timedelta(days=1), periods=days, freq='D')
+    return profile.to_numpy()[horizon.dayofweek]
+
+
+def expense_path(cashflow: pd.DataFrame, days: int, today: Optional[date] = None,
+                 lookback_days: int = EXPENSE_LOOKBACK_DAYS) -> np.ndarray:
+    """
+    Expected spend of each of the next `days` days
+    Prefix sums of the path give forecast_expenses()' total for any shorter
+    window
+    """
+    today = today or datetime.utcnow().date()
+    expenses, _ = _expense_history(cashflow, today, lookback_days)
+    return _weekday_path(_weekday_profile(expenses), days, today)
+
+
+def forecast_expenses(cashflow: pd.DataFrame, days: int, today: Optional[date] = None,
+                      lookback_days: int = EXPENSE_LOOKBACK_DAYS) -> Dict:
+    """
+    Forecast expenses for the next `days` days from daily rollup rows
+    Each future day gets the average spend of its weekday over the lookback
+    window (days without expenses count as zero), so a horizon that covers
+    more weekends than weekdays is priced accordingly. The total is split by
+    the categories' share of spend in the same window.
+    """
+    today = today or datetime.utcnow().date()
+    expenses, category_totals = _expense_history(cashflow, today, lookback_days)
+    weekday_profile = _weekday_profile(expenses)
+    
+    total = float(_weekday_path(weekday_profile, days, today).sum())
+    
+    spent = sum(category_totals.values())
+    by_category = {
+        category: total * amount / spent
+        for category, amount in sorted(category_totals.items(), key=lambda item: -item[1])
+    } if spent > 0 else {}
+    
+    return {
+        'total': total,
+        'daily_average': float(expenses.mean()),
+        'by_weekday': {WEEKDAY_NAMES[day]: float(weekday_profile[day]) for day in range(7)},
+        'by_category': by_category
+    }
@@ -0,0 +1,349 @@
+"""
+Weekly feature engine
+Computes every AIFeature column for all weeks of a transaction frame in one
+vectorized pass (no per-week Python loop)
+The same aggregation is also available as a PostgreSQL query, so only the
+weekly rows leave the database
+"""
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Columns computed by the engine (everything else in ai_features keeps its default)
+AI_FEATURE_COLUMNS = [
+    'total_income_inr', 'total_expense_inr', 'net_cashflow_inr',
+    'avg_daily_income', 'income_std_dev', 'income_volatility_ratio',
+    'days_with_income', 'days_without_income', 'income_source_count',
+    'top_income_source_pct', 'avg_daily_expense', 'expense_std_dev'
+]
+
+INTEGER_FEATURE_COLUMNS = ['days_with_income', 'days_without_income', 'income_source_count']
+
+# The pure-NumPy kernel avoids pandas groupby overhead and measured faster at
+# every size up to 200k rows (scripts/benchmark_feature_kernel.py); larger
+# frames fall back to the pandas kernel
+NUMPY_KERNEL_MAX_ROWS = 200_000
+
+# Same window as the 6-month preprocessed frame
+FEATURE_WINDOW_DAYS = 180
+
+
+def week_starts(timestamps: pd.Series) -> pd.Series:
+    """Monday 00:00 of each timestamp's week (same buckets as to_period('W'))"""
+    return timestamps.dt.normalize() - pd.to_timedelta(timestamps.dt.dayofweek, unit='D')
+
+
+def compute_weekly_features(df: pd.DataFrame, by_user: bool = False) -> pd.DataFrame:
+    """
+    Weekly features for a preprocessed transaction frame
+    Returns one row per week with activity, indexed by week_start, with the
+    AI_FEATURE_COLUMNS as columns. With by_user=True the frame holds several
+    users (a 'user_id' column) and the index is (user_id, week_start).
+    """
+    if df.empty:
+        if by_user:
+            index = pd.MultiIndex.from_arrays([[], pd.DatetimeIndex([])], names=['user_id', 'week_start'])
+        else:
+            index = pd.DatetimeIndex([], name='week_start')
+        return pd.DataFrame(columns=AI_FEATURE_COLUMNS, index=index)
+    
+    if len(df) <= NUMPY_KERNEL_MAX_ROWS:
+        return _weekly_features_numpy(df, by_user)
+    return _weekly_features_pandas(df, by_user)
+
+
+# Weeks are numbered from the Monday before the epoch; a user's weeks are
+# offset by user_code * stride so (user, week) pairs share one integer key
+_WEEK_KEY_STRIDE = 1 << 20
+
+
+class _WeekGroups:
+    """Integer (user, week) group code per row, shared by both kernels"""
+    
+    def __init__(self, df: pd.DataFrame, by_user: bool):
+        day_numbers = df['timestamp'].to_numpy().astype('datetime64[D]').astype(np.int64)
+        # 1970-01-01 was a Thursday; Monday-based week number and weekday
+        week_numbers = (day_numbers + 3) // 7
+        self.weekday = (day_numbers + 3) % 7
+        
+        if by_user:
+            user_codes, users = pd.factorize(df['user_id'])
+            keys = user_codes.astype(np.int64) * _WEEK_KEY_STRIDE + week_numbers
+        else:
+            keys = week_numbers
+        
+        key_index, self.codes = np.unique(keys, return_inverse=True)
+        self.count = len(key_index)
+        
+        week_index = pd.DatetimeIndex(
+            ((key_index % _WEEK_KEY_STRIDE) * 7 - 3).astype('datetime64[D]').astype('datetime64[ns]'),
+            name='week_start'
+        )
+        if by_user:
+            self.index = pd.MultiIndex.from_arrays(
+                [users[key_index // _WEEK_KEY_STRIDE], week_index], names=['user_id', 'week_start']
+            )
+        else:
+            self.index = week_index
+
+
+def _finish(index, income_sum, income_std, expense_sum, expense_std,
+            days_with_income, source_count, top_source_count) -> pd.DataFrame:
+    """Derive the ratio columns shared by both kernels"""
+    avg_daily_income = income_sum / 7
+    avg_daily_expense = expense_sum / 7
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volatility = np.where(avg_daily_income > 0, income_std / avg_daily_income, 0.0)
+        # Share of the most frequent income category, relative to weekly income
+        top_source_pct = np.where(source_count > 0, top_source_count / income_sum * 100, 0.0)
+    
+    features = pd.DataFrame({
+        'total_income_inr': income_sum,
+        'total_expense_inr': expense_sum,
+        'net_cashflow_inr': income_sum - expense_sum,
+        'avg_daily_income': avg_daily_income,
+        'income_std_dev': income_std,
+        'income_volatility_ratio': volatility,
+        'days_with_income': days_with_income.astype(np.int64),
+        'days_without_income': (7 - days_with_income).astype(np.int64),
+        'income_source_count': source_count.astype(np.int64),
+        'top_income_source_pct': top_source_pct,
+        'avg_daily_expense': avg_daily_expense,
+        'expense_std_dev': expense_std
+    }, index=index)
+    
+    return features[AI_FEATURE_COLUMNS]
+
+
+def _group_sum_std(groups: np.ndarray, values: np.ndarray, n_groups: int):
+    """Per-group sum and sample std (0 when a group has fewer than two values)"""
+    counts = np.bincount(groups, minlength=n_groups)
+    sums = np.bincount(groups, weights=values, minlength=n_groups)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        means = np.where(counts > 0, sums / counts, 0.0)
+        squares = np.bincount(groups, weights=(values - means[groups]) ** 2, minlength=n_groups)
+        std = np.where(counts > 1, np.sqrt(squares / (counts - 1)), 0.0)
+    
+    return sums, std
+
+
+def _weekly_features_numpy(df: pd.DataFrame, by_user: bool = False) -> pd.DataFrame:
+    """Pure-NumPy kernel: integer group codes plus bincount reductions"""
+    groups = _WeekGroups(df, by_user)
+    n_groups = groups.count
+    
+    amounts = df['amount'].to_numpy(dtype=np.float64)
+    is_income = df['is_income'].to_numpy(dtype=bool)
+    income_groups = groups.codes[is_income]
+    
+    income_sum, income_std = _group_sum_std(income_groups, amounts[is_income], n_groups)
+    expense_sum, expense_std = _group_sum_std(groups.codes[~is_income], amounts[~is_income], n_groups)
+    
+    # Distinct income days per group
+    day_pairs = np.unique(income_groups * 7 + groups.weekday[is_income])
+    days_with_income = np.bincount(day_pairs // 7, minlength=n_groups)
+    
+    # Distinct income categories per group and the count of the most frequent one
+    _, category_codes = np.unique(df['category'].to_numpy()[is_income], return_inverse=True)
+    n_categories = int(category_codes.max()) + 1 if len(category_codes) else 1
+    pairs, pair_counts = np.unique(income_groups * n_categories + category_codes, return_counts=True)
+    pair_groups = pairs // n_categories
+    source_count = np.bincount(pair_groups, minlength=n_groups)
+    top_source_count = np.zeros(n_groups, dtype=np.int64)
+    np.maximum.at(top_source_count, pair_groups, pair_counts)
+    
+    return _finish(
+        groups.index, income_sum, income_std, expense_sum, expense_std,
+        days_with_income, source_count, top_source_count
+    )
+
+
+def _weekly_features_pandas(df: pd.DataFrame, by_user: bool = False) -> pd.DataFrame:
+    """pandas kernel: a handful of grouped reductions over the whole frame"""
+    groups = _WeekGroups(df, by_user)
+    codes = pd.Series(groups.codes, index=df.index)
+    all_groups = np.arange(groups.count)
+    is_income = df['is_income'].to_numpy(dtype=bool)
+    
+    def sum_std(mask):
+        grouped = df.loc[mask, 'amount'].groupby(codes[mask])
+        stats = pd.DataFrame({'sum': grouped.sum(), 'std': grouped.std(), 'count': grouped.count()})
+        stats = stats.reindex(all_groups)
+        std = stats['std'].where(stats['count'] > 1, 0.0).fillna(0.0)
+        return stats['sum'].fillna(0.0).to_numpy(), std.to_numpy()
+    
+    income_sum, income_std = sum_std(is_income)
+    expense_sum, expense_std = sum_std(~is_income)
+    
+    income_codes = codes[is_income]
+    days_with_income = (
+        pd.Series(groups.weekday[is_income], index=income_codes.index)
+        .groupby(income_codes).nunique()
+        .reindex(all_groups, fill_value=0).to_numpy()
+    )
+    
+    category_counts = df.loc[is_income, 'category'].groupby([income_codes, df.loc[is_income, 'category']]).size()
+    by_group = category_counts.groupby(level=0)
+    source_count = by_group.size().reindex(all_groups, fill_value=0).to_numpy()
+    top_source_count = by_group.max().reindex(all_groups, fill_value=0).to_numpy()
+    
+    return _finish(
+        groups.index, income_sum, income_std, expense_sum, expense_std,
+        days_with_income, source_count, top_source_count
+    )
+
+# Weekly features computed in PostgreSQL. Mirrors the Python path: IQR outlier
+# filter (k=3, linear percentiles) over the window per user, then Monday-based
+# weekly aggregates. {user_filter} optionally restricts the users.
+_WEEKLY_FEATURES_SQL = """
+WITH windowed AS (
+    SELECT user_id, txn_timestamp, amount_inr AS amount, is_income, merchant_category
+    FROM transactions
+    WHERE txn_timestamp >= :since {user_filter}
+),
+bounds AS (
+    SELECT user_id,
+           percentile_cont(0.25) WITHIN GROUP (ORDER BY amount) AS q1,
+           percentile_cont(0.75) WITHIN GROUP (ORDER BY amount) AS q3
+    FROM windowed
+    GROUP BY user_id
+),
+filtered AS (
+    SELECT w.user_id, date_trunc('week', w.txn_timestamp) AS week_start,
+           w.txn_timestamp, w.amount, w.is_income, w.merchant_category
+    FROM windowed w
+    JOIN bounds b ON b.user_id = w.user_id
+    WHERE w.amount BETWEEN b.q1 - 3 * (b.q3 - b.q1) AND b.q3 + 3 * (b.q3 - b.q1)
+),
+sources AS (
+    SELECT DISTINCT user_id, week_start,
+           count(*) OVER week AS source_count,
+           max(txn_count) OVER week AS top_source_count
+    FROM (
+        SELECT user_id, week_start, merchant_category, count(*) AS txn_count
+        FROM filtered
+        WHERE is_income
+        GROUP BY user_id, week_start, merchant_category
+    ) category_counts
+    WINDOW week AS (PARTITION BY user_id, week_start)
+),
+weekly AS (
+    SELECT user_id, week_start,
+           coalesce(sum(amount) FILTER (WHERE is_income), 0) AS income_sum,
+           coalesce(stddev_samp(amount) FILTER (WHERE is_income), 0) AS income_std,
+           coalesce(sum(amount) FILTER (WHERE NOT is_income), 0) AS expense_sum,
+           coalesce(stddev_samp(amount) FILTER (WHERE NOT is_income), 0) AS expense_std,
+           count(DISTINCT date_trunc('day', txn_timestamp)) FILTER (WHERE is_income) AS days_with_income
+    FROM filtered
+    GROUP BY user_id, week_start
+)
+SELECT weekly.user_id,
+       weekly.week_start AS week_start_date,
+       income_sum AS total_income_inr,
+       expense_sum AS total_expense_inr,
+       income_sum - expense_sum AS net_cashflow_inr,
+       income_sum / 7 AS avg_daily_income,
+       income_std AS income_std_dev,
+       CASE WHEN income_sum > 0 THEN income_std / (income_sum / 7) ELSE 0 END AS income_volatility_ratio,
+       days_with_income,
+       7 - days_with_income AS days_without_income,
+       coalesce(source_count, 0) AS income_source_count,
+       CASE WHEN source_count > 0 THEN top_source_count / nullif(income_sum, 0) * 100 ELSE 0 END
+           AS top_income_source_pct,
+       expense_sum / 7 AS avg_daily_expense,
+       expense_std AS expense_std_dev
+FROM weekly
+LEFT JOIN sources ON sources.user_id = weekly.user_id AND sources.week_start = weekly.week_start
+WHERE weekly.week_start >= :since_week
+"""
+
+_FEATURE_COLUMN_LIST = ', '.join(AI_FEATURE_COLUMNS)
+
+_UPSERT_WEEKLY_FEATURES_SQL = f"""
+INSERT INTO ai_features (
+    feature_id, user_id, week_start_date, {_FEATURE_COLUMN_LIST},
+    buffer_utilization_rate, overspend_events_count, created_at
+)
+SELECT gen_random_uuid(), user_id, week_start_date, {_FEATURE_COLUMN_LIST}, 0, 0, :now
+FROM ({_WEEKLY_FEATURES_SQL}) features
+ON CONFLICT (user_id, week_start_date) DO UPDATE SET
+    {', '.join(f'{column} = EXCLUDED.{column}' for column in AI_FEATURE_COLUMNS)}
+"""
+
+# Advance every user's watermark to what the refresh is about to read
+_UPSERT_WATERMARKS_SQL = """
+INSERT INTO feature_watermarks (user_id, last_created_at, last_txn_timestamp, dirty_since, updated_at)
+SELECT user_id, max(created_at), max(txn_timestamp), NULL, :now
+FROM transactions
+{user_filter}
+GROUP BY user_id
+ON CONFLICT (user_id) DO UPDATE SET
+    last_created_at = EXCLUDED.last_created_at,
+    last_txn_timestamp = EXCLUDED.last_txn_timestamp,
+    dirty_since = NULL,
+    updated_at = EXCLUDED.updated_at
+"""
+
+
+def _feature_params(since_week: Optional[datetime]) -> dict:
+    since = datetime.utcnow() - timedelta(days=FEATURE_WINDOW_DAYS)
+    return {'since': since, 'since_week': since_week or datetime.min}
+
+
+def fetch_weekly_features_sql(db: Session, user_id: str,
+                              since_week: Optional[datetime] = None) -> pd.DataFrame:
+    """
+    Weekly features for one user computed by PostgreSQL
+    Same shape as compute_weekly_features; only weeks starting on or after
+    since_week are returned (the outlier bounds still use the full window)
+    """
+    stmt = text(_WEEKLY_FEATURES_SQL.format(user_filter='AND user_id = :user_id'))
+    params = _feature_params(since_week)
+    params['user_id'] = user_id
+    
+    rows = db.execute(stmt, params).mappings().all()
+    
+    if not rows:
+        return pd.DataFrame(columns=AI_FEATURE_COLUMNS, index=pd.DatetimeIndex([], name='week_start'))
+    
+    features = pd.DataFrame.from_records(rows)
+    features.index = pd.DatetimeIndex(features['week_start_date'], name='week_start')
+    features = features[AI_FEATURE_COLUMNS]
+    
+    float_columns = [column for column in AI_FEATURE_COLUMNS if column not in INTEGER_FEATURE_COLUMNS]
+    features[float_columns] = features[float_columns].astype(float)
+    features[INTEGER_FEATURE_COLUMNS] = features[INTEGER_FEATURE_COLUMNS].astype(np.int64)
+    
+    return features.sort_index()
+
+
+def refresh_weekly_features_sql(db: Session, user_ids: Optional[Iterable[str]] = None) -> int:
+    """
+    Recompute and upsert weekly features for every user (or the given users)
+    in a single INSERT ... SELECT ... ON CONFLICT statement, and advance their
+    feature watermarks. Returns the number of feature rows written.
+    Caller commits.
+    """
+    if user_ids is None:
+        feature_filter, watermark_filter, params = '', '', {}
+    else:
+        feature_filter = 'AND user_id = ANY(CAST(:user_ids AS uuid[]))'
+        watermark_filter = 'WHERE user_id = ANY(CAST(:user_ids AS uuid[]))'
+        params = {'user_ids': [str(user_id) for user_id in user_ids]}
+    
+    now = datetime.utcnow()
+    params.update(_feature_params(None), now=now)
+    
+    # Watermarks first: rows that arrive while the refresh runs are then
+    # re-read by the next incremental run instead of being skipped
+    db.execute(text(_UPSERT_WATERMARKS_SQL.format(user_filter=watermark_filter)), params)
+    
+    result = db.execute(
+        text(_UPSERT_WEEKLY_FEATURES_SQL.format(user_filter=feature_filter)), params
+    )
+    return result.rowcount
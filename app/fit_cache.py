@@ -0,0 +1,108 @@
+"""
+Content-addressed cache of real-time ARIMA fits
+Fits are keyed by a hash of the daily series and the model order, so a
+repeat prediction on unchanged data reuses the fitted parameters instead of
+calling fit() again. Entries live in an in-memory LRU and, optionally, as
+compact .npz artifacts shared by every process on the host
+"""
+import hashlib
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import numpy as np
+from app.arima_artifact import ARIMA_ARTIFACT_SUFFIX, CompactARIMA, load_arima_artifact, save_arima_artifact
+
+
+def fit_cache_key(values: np.ndarray, order: Tuple[int, int, int]) -> str:
+    """Hash of the series values and ARIMA order"""
+    digest = hashlib.sha256(np.asarray(order, dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+class ArimaFitCache:
+    """
+    LRU of fitted CompactARIMA models keyed by fit_cache_key
+    With a cache_dir, misses in memory fall through to disk and new fits
+    are written there atomically.
+    """
+    
+    def __init__(self, max_entries: int, cache_dir: Optional[Path] = None):
+        self.max_entries = max_entries
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+    
+    def get(self, key: str) -> Optional[CompactARIMA]:
+        """Return the cached fit for key, or None"""
+        with self._lock:
+            model = self._entries.get(key)
+            if model is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return model
+        
+        model = self._read(key)
+        with self._lock:
+            if model is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, model)
+        return model
+    
+    def put(self, key: str, model: CompactARIMA) -> None:
+        with self._lock:
+            self._store(key, model)
+        self._write(key, model)
+    
+    def _store(self, key: str, model: CompactARIMA) -> None:
+        self._entries[key] = model
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def _read(self, key: str) -> Optional[CompactARIMA]:
+        if self.cache_dir is None:
+            return None
+        path = self.cache_dir / f"{key}{ARIMA_ARTIFACT_SUFFIX}"
+        try:
+            return load_arima_artifact(path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Ignoring unreadable ARIMA fit cache entry {path}: {e}")
+            return None
+    
+    def _write(self, key: str, model: CompactARIMA) -> None:
+        if self.cache_dir is None:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Write under a unique name and rename, so readers never see a partial file
+            partial = save_arima_artifact(model, self.cache_dir / f"{key}-{uuid.uuid4().hex}")
+            os.replace(partial, self.cache_dir / f"{key}{ARIMA_ARTIFACT_SUFFIX}")
+        except OSError as e:
+            print(f"Could not write ARIMA fit cache entry: {e}")
+    
+    def stats(self) -> Dict:
+        """Memory and disk hit counters plus current occupancy"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries
+            }
+    
+    def clear(self) -> None:
+        """Drop the in-memory entries (files on disk are kept)"""
+        with self._lock:
+            self._entries.clear()
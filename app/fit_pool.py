@@ -0,0 +1,175 @@
+"""
+Process pool for on-demand ARIMA fits
+Real-time ARIMA fits run in worker processes so they neither hold the GIL
+nor tie up a request thread for long. The pool bounds queued work and each
+fit's latency; callers treat a None result as "use the rolling mean instead".
+Fits are cached by series content, so unchanged data is never refitted
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Tuple
+import numpy as np
+from app.config import get_settings
+from app.arima_artifact import CompactARIMA
+from app.fit_cache import ArimaFitCache, fit_cache_key
+
+
+def fit_arima(values: np.ndarray, order: Tuple[int, int, int]) -> CompactARIMA:
+    """Fit ARIMA on a daily series and keep its forecasting state (runs in a worker)"""
+    import warnings
+    from statsmodels.tsa.arima.model import ARIMA
+    
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        fitted = ARIMA(values, order=order).fit()
+    return CompactARIMA.from_results(fitted)
+
+
+class ArimaFitPool:
+    """
+    Bounded ProcessPoolExecutor for ARIMA fits
+    At most max_pending fits are queued or running; further requests are
+    rejected at once. A fit that misses its timeout is cancelled if it has
+    not started, otherwise it finishes in the background, keeping its slot
+    until then, and its result is still cached. With max_workers=0 fits run
+    in the calling thread.
+    """
+    
+    def __init__(self, max_workers: int, max_pending: int, timeout_seconds: float,
+                 cache: Optional[ArimaFitCache] = None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout_seconds = timeout_seconds
+        self.cache = cache
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.failures = 0
+    
+    def forecast(self, values: np.ndarray, order: Tuple[int, int, int], steps: int) -> Optional[np.ndarray]:
+        """Forecast `steps` days ahead, or None if the pool is saturated or the fit fails or times out"""
+        values = np.asarray(values, dtype=float)
+        key = fit_cache_key(values, order)
+        
+        model = self.cache.get(key) if self.cache is not None else None
+        if model is None:
+            model = self._fit(values, order, key)
+            if model is None:
+                return None
+            if self.cache is not None:
+                self.cache.put(key, model)
+        
+        return model.forecast(steps)
+    
+    def _fit(self, values: np.ndarray, order: Tuple[int, int, int], key: str) -> Optional[CompactARIMA]:
+        if self.max_workers <= 0:
+            try:
+                model = fit_arima(values, order)
+            except Exception as e:
+                print(f"ARIMA fit failed: {e}")
+                with self._lock:
+                    self.failures += 1
+                return None
+            with self._lock:
+                self.completed += 1
+            return model
+        
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                return None
+            self._pending += 1
+            executor = self._get_executor()
+        
+        try:
+            future = executor.submit(fit_arima, values, order)
+        except (BrokenProcessPool, RuntimeError) as e:
+            print(f"ARIMA fit pool unavailable: {e}")
+            with self._lock:
+                self._pending -= 1
+                self.failures += 1
+                self._discard_executor(executor)
+            return None
+        future.add_done_callback(self._release)
+        
+        try:
+            model = future.result(timeout=self.timeout_seconds)
+        except FutureTimeoutError:
+            if not future.cancel() and self.cache is not None:
+                # Keep the fit finishing in the background, so the next
+                # request for this series is a cache hit rather than a refit
+                future.add_done_callback(lambda done: self._cache_late_fit(key, done))
+            with self._lock:
+                self.timeouts += 1
+            return None
+        except Exception as e:
+            print(f"ARIMA fit failed: {e}")
+            with self._lock:
+                self.failures += 1
+                if isinstance(e, BrokenProcessPool):
+                    self._discard_executor(executor)
+            return None
+        
+        with self._lock:
+            self.completed += 1
+        return model
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Spawned workers do not inherit the API process's threads or DB connections
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+    
+    def _discard_executor(self, executor: ProcessPoolExecutor) -> None:
+        if self._executor is executor:
+            self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _cache_late_fit(self, key: str, future) -> None:
+        if future.cancelled() or future.exception() is not None:
+            return
+        self.cache.put(key, future.result())
+    
+    def _release(self, future) -> None:
+        with self._lock:
+            self._pending -= 1
+    
+    def stats(self) -> Dict:
+        """Completed, rejected, timed-out and failed fits plus current load"""
+        with self._lock:
+            return {
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+                'failures': self.failures,
+                'pending': self._pending,
+                'max_pending': self.max_pending,
+                'max_workers': self.max_workers
+            }
+    
+    def shutdown(self) -> None:
+        """Stop the workers; queued fits are cancelled. The pool restarts on next use."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_settings = get_settings()
+arima_fit_pool = ArimaFitPool(
+    max_workers=_settings.arima_fit_workers,
+    max_pending=_settings.arima_fit_max_pending,
+    timeout_seconds=_settings.arima_fit_timeout_seconds,
+    cache=ArimaFitCache(
+        max_entries=_settings.arima_fit_cache_entries,
+        cache_dir=_settings.arima_fit_cache_dir or None
+    )
+)
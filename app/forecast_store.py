@@ -0,0 +1,104 @@
+"""
+Precomputed forecast store
+The training pipeline writes each user's daily income (with bounds) and
+expense paths to forecast_paths, so serving a prediction is a lookup plus a
+prefix sum. A stored path is used only while it is fresh: trained recently,
+long enough for the requested window and not outdated by new transactions.
+"""
+from datetime import date, datetime
+from typing import Dict, Optional, Tuple
+import numpy as np
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.models import ForecastPath, Transaction
+
+# Days of daily forecast written per user
+FORECAST_PATH_DAYS = 90
+
+# forecast_paths columns by forecast path key
+PATH_COLUMNS = {
+    'forecast': 'income_inr',
+    'lower': 'income_lower_inr',
+    'upper': 'income_upper_inr',
+    'expense': 'expense_inr'
+}
+
+
+def write_forecast_path(db: Session, user_id: str, model_used: str, path: Dict[str, np.ndarray],
+                        start_date: date, trained_at: datetime) -> None:
+    """
+    Upsert a user's forecast path
+    `path` holds daily 'forecast', 'lower', 'upper' and 'expense' arrays with
+    the first value for start_date. Caller commits.
+    """
+    row = {
+        'user_id': user_id,
+        'model_used': model_used,
+        'trained_at': trained_at,
+        'start_date': start_date,
+        'updated_at': datetime.utcnow(),
+        **{column: [float(v) for v in path[key]] for key, column in PATH_COLUMNS.items()}
+    }
+    
+    stmt = pg_insert(ForecastPath).values(row)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[ForecastPath.user_id],
+        set_={column: stmt.excluded[column] for column in row if column != 'user_id'}
+    ))
+
+
+def touch_forecast_path(db: Session, user_id: str, checked_at: datetime) -> Optional[str]:
+    """
+    Mark a stored path as current as of checked_at without recomputing it
+    For users whose data and models are unchanged since it was written.
+    Returns the model used, or None without a stored path. Caller commits.
+    """
+    return db.execute(
+        update(ForecastPath)
+        .where(ForecastPath.user_id == user_id)
+        .values(trained_at=checked_at)
+        .returning(ForecastPath.model_used)
+    ).scalar_one_or_none()
+
+
+def load_forecast_path(db: Session, user_id: str, days: int,
+                       today: Optional[date] = None) -> Optional[Tuple[str, Dict[str, np.ndarray]]]:
+    """
+    (model_used, path) covering the `days` days after today, or None when
+    there is no stored path or it is stale
+    """
+    settings = get_settings()
+    today = today or datetime.utcnow().date()
+    
+    stored = db.execute(select(ForecastPath).where(ForecastPath.user_id == user_id)).scalar_one_or_none()
+    if stored is None:
+        return None
+    
+    # Tomorrow is the first forecast day, as for live inference
+    offset = (today - stored.start_date).days + 1
+    if offset < 0 or offset + days > len(stored.income_inr):
+        return None
+    
+    if (today - stored.trained_at.date()).days > settings.forecast_max_age_days:
+        return None
+    
+    if _new_transaction_count(db, user_id, stored.trained_at) >= settings.forecast_max_new_transactions:
+        return None
+    
+    path = {
+        key: np.asarray(getattr(stored, column)[offset:offset + days], dtype=float)
+        for key, column in PATH_COLUMNS.items()
+    }
+    return stored.model_used, path
+
+
+def _new_transaction_count(db: Session, user_id: str, since: datetime) -> int:
+    # Counting stops at the staleness threshold
+    new_transactions = select(Transaction.transaction_id).where(
+        Transaction.user_id == user_id,
+        Transaction.created_at > since
+    ).limit(get_settings().forecast_max_new_transactions).subquery()
+    
+    return db.execute(select(func.count()).select_from(new_transactions)).scalar()
@@ -0,0 +1,137 @@
+"""
+Fourier-regression forecaster
+A closed-form stand-in for our Prophet configuration (weekly seasonality
+only): a piecewise-linear trend with Prophet's changepoint grid plus
+weekly Fourier terms, fitted by regularized least squares in NumPy. The
+priors become ridge penalties, so one linear solve replaces the Stan fit
+and the artifact is a few dozen coefficients in an .npz file
+"""
+from pathlib import Path
+from typing import Tuple
+import numpy as np
+import pandas as pd
+
+FOURIER_ARTIFACT_SUFFIX = '.npz'
+
+# Prophet defaults, and the prior scales train_models gives Prophet
+WEEKLY_FOURIER_ORDER = 3
+N_CHANGEPOINTS = 25
+CHANGEPOINT_RANGE = 0.8
+CHANGEPOINT_PRIOR_SCALE = 0.05
+SEASONALITY_PRIOR_SCALE = 0.1
+INTERVAL_WIDTH = 0.95
+
+_EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+def design_matrix(days: np.ndarray, start_day: int, span_days: int, changepoints: np.ndarray) -> np.ndarray:
+    """
+    Intercept, slope, changepoint hinges and weekly sin/cos terms
+    `days` are days since epoch; the trend runs on Prophet's scaled time
+    (0 at the first training day, 1 at the last)
+    """
+    t = (days - start_day) / span_days
+    hinges = np.maximum(t[:, None] - changepoints[None, :], 0)
+    k = np.arange(1, WEEKLY_FOURIER_ORDER + 1)
+    angles = 2 * np.pi * k[None, :] * (days[:, None] % 7) / 7
+    return np.column_stack([np.ones(len(days)), t, hinges, np.sin(angles), np.cos(angles)])
+
+
+class FourierForecaster:
+    """
+    Trend plus weekly seasonality from stored coefficients
+    Forecasts continue from the day after the last training day; the
+    interval adds in-sample residual quantiles to the point forecast.
+    """
+    
+    def __init__(self, coef: np.ndarray, changepoints: np.ndarray, start_day: int, span_days: int,
+                 y_scale: float, interval: Tuple[float, float], nobs: int):
+        self.coef = np.asarray(coef, dtype=float)
+        self.changepoints = np.asarray(changepoints, dtype=float)
+        self.start_day = int(start_day)
+        self.span_days = int(span_days)
+        self.y_scale = float(y_scale)
+        self.interval = (float(interval[0]), float(interval[1]))
+        self.nobs = int(nobs)
+    
+    def predict(self, days: np.ndarray) -> np.ndarray:
+        """Point prediction for the given days since epoch"""
+        X = design_matrix(np.asarray(days), self.start_day, self.span_days, self.changepoints)
+        return X @ self.coef * self.y_scale
+    
+    def forecast(self, steps: int) -> np.ndarray:
+        """Point forecasts for the `steps` days after the training data"""
+        last_day = self.start_day + self.nobs - 1
+        return self.predict(np.arange(last_day + 1, last_day + 1 + steps))
+    
+    @classmethod
+    def fit(cls, ds: pd.Series, y: np.ndarray) -> 'FourierForecaster':
+        """
+        Fit on a daily series (ds dates, y values)
+        Gaussian priors on the changepoint and seasonal coefficients give
+        ridge penalties scaled by the noise variance, which is estimated
+        from an unpenalized fit without changepoints
+        """
+        days = (pd.to_datetime(ds).to_numpy().astype('datetime64[D]') - _EPOCH).astype(np.int64)
+        y = np.asarray(y, dtype=float)
+        if len(y) < 14:
+            raise ValueError("Need at least two weeks of data")
+        
+        start_day = int(days[0])
+        span_days = max(int(days[-1] - days[0]), 1)
+        y_scale = float(np.abs(y).max()) or 1.0
+        y_scaled = y / y_scale
+        
+        # Changepoints evenly spaced over the first 80% of the history, as in Prophet
+        cp_index = np.linspace(0, int(np.floor(len(y) * CHANGEPOINT_RANGE)), N_CHANGEPOINTS + 1).round().astype(int)[1:]
+        changepoints = (days[cp_index] - start_day) / span_days
+        
+        X = design_matrix(days, start_day, span_days, changepoints)
+        n_hinges = len(changepoints)
+        seasonal = np.r_[0:2, 2 + n_hinges:X.shape[1]]
+        
+        base_coef, *_ = np.linalg.lstsq(X[:, seasonal], y_scaled, rcond=None)
+        noise_var = max(float(np.var(y_scaled - X[:, seasonal] @ base_coef)), 1e-12)
+        
+        penalty = np.r_[
+            [0.0, 0.0],
+            np.full(n_hinges, 1 / CHANGEPOINT_PRIOR_SCALE ** 2),
+            np.full(2 * WEEKLY_FOURIER_ORDER, 1 / SEASONALITY_PRIOR_SCALE ** 2)
+        ]
+        coef = np.linalg.solve(X.T @ X + noise_var * np.diag(penalty), X.T @ y_scaled)
+        
+        resid = y - X @ coef * y_scale
+        tail = (1 - INTERVAL_WIDTH) / 2
+        interval = tuple(np.quantile(resid, [tail, 1 - tail]))
+        
+        return cls(coef, changepoints, start_day, span_days, y_scale, interval, len(y))
+
+
+def save_fourier_artifact(model: FourierForecaster, path: Path) -> Path:
+    """Write the coefficients and scaling of a fitted model as an .npz artifact"""
+    path = Path(path).with_suffix(FOURIER_ARTIFACT_SUFFIX)
+    np.savez(
+        path,
+        coef=model.coef,
+        changepoints=model.changepoints,
+        start_day=model.start_day,
+        span_days=model.span_days,
+        y_scale=model.y_scale,
+        interval=np.array(model.interval),
+        nobs=model.nobs
+    )
+    return path
+
+
+def load_fourier_artifact(path: Path) -> FourierForecaster:
+    """Load an artifact written by save_fourier_artifact"""
+    with np.load(path) as data:
+        return FourierForecaster(
+            coef=data['coef'],
+            changepoints=data['changepoints'],
+            start_day=data['start_day'],
+            span_days=data['span_days'],
+            y_scale=data['y_scale'],
+            interval=data['interval'],
+            nobs=data['nobs']
+        )
@@ -0,0 +1,283 @@
+"""
+Global gradient-boosting income forecaster
+One set of scikit-learn HistGradientBoosting models, trained on every
+user's history, forecasts daily income for any user from lag, calendar and
+AIFeature inputs: the mean for the forecast and two quantiles for the
+bounds. Users without a history (cold start) get the population forecast
+for their calendar days. Inference is vectorized over users and horizons.
+"""
+import warnings
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import select, cast, func, Date, Float
+from sqlalchemy.orm import Session
+from app.models import AIFeature, DailyCashflow
+
+# Artifact name in the models directory; one file serves every user
+GLOBAL_MODEL_FILENAME = "global_gbm.pkl"
+
+# Days of income history behind each forecast origin
+HISTORY_DAYS = 90
+
+LAGS = [1, 2, 3, 7, 14, 28]
+WINDOWS = [7, 30, 90]
+
+# Weekly AIFeature columns used as user profile inputs
+PROFILE_COLUMNS = [
+    'avg_daily_income', 'income_std_dev', 'income_volatility_ratio',
+    'days_with_income', 'income_source_count', 'top_income_source_pct'
+]
+
+# Loss of each served path: the mean and the bounds of a 90% interval
+PATH_LOSSES = {
+    'forecast': ('squared_error', None),
+    'lower': ('quantile', 0.05),
+    'upper': ('quantile', 0.95)
+}
+
+FEATURE_NAMES = (
+    [f'lag_{lag}' for lag in LAGS]
+    + [f'mean_{window}' for window in WINDOWS]
+    + ['std_30', 'zero_share_30', 'history_days']
+    + PROFILE_COLUMNS
+    + ['horizon', 'day_of_week', 'day_of_month']
+)
+
+_EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+def history_features(history: np.ndarray) -> np.ndarray:
+    """
+    Lag and window statistics of [n, HISTORY_DAYS] income histories
+    The last column is the origin day; NaN marks days before a user's history
+    """
+    with warnings.catch_warnings():
+        # All-NaN windows (no history) are expected and stay NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        recent = history[:, -30:]
+        observed = ~np.isnan(recent)
+        columns = (
+            [history[:, -lag] for lag in LAGS]
+            + [np.nanmean(history[:, -window:], axis=1) for window in WINDOWS]
+            + [
+                np.nanstd(recent, axis=1),
+                (recent == 0).sum(axis=1) / np.where(observed.any(axis=1), observed.sum(axis=1), np.nan),
+                (~np.isnan(history)).sum(axis=1)
+            ]
+        )
+    return np.column_stack(columns)
+
+
+def forecast_features(history: np.ndarray, profiles: np.ndarray, origin_days: np.ndarray,
+                      horizons: np.ndarray, max_horizon: Optional[int] = None) -> np.ndarray:
+    """
+    Model inputs for forecasting horizons[j] days after each row's origin
+    history, profiles and origin_days have one row per (user, origin); the
+    result has one row per (row, horizon) in row-major order. Horizon inputs
+    are capped at max_horizon, calendar inputs follow the actual dates.
+    """
+    n, h = len(history), len(horizons)
+    target_days = (origin_days[:, None] + horizons[None, :]).ravel()
+    target_dates = (_EPOCH + target_days).astype('datetime64[D]')
+    month_starts = target_dates.astype('datetime64[M]').astype('datetime64[D]')
+    
+    return np.column_stack([
+        np.repeat(history_features(history), h, axis=0),
+        np.repeat(profiles, h, axis=0),
+        np.tile(np.minimum(horizons, max_horizon or horizons.max()), n),
+        (target_days + 3) % 7,  # 1970-01-01 was a Thursday; Monday = 0
+        (target_dates - month_starts).astype(np.int64) + 1
+    ])
+
+
+class GlobalForecaster:
+    """Fitted estimators for each served path plus the horizon they were trained on"""
+    
+    def __init__(self, estimators: Dict, max_horizon: int):
+        self.estimators = estimators
+        self.max_horizon = max_horizon
+    
+    def predict_paths(self, history: np.ndarray, profiles: np.ndarray, origin_day,
+                      days: int) -> Dict[str, np.ndarray]:
+        """
+        [n, days] daily income paths for n users forecast from origin_day
+        origin_day, the last history day, is one day number or one per user.
+        Horizons past max_horizon are treated as max_horizon.
+        """
+        origin_days = np.broadcast_to(np.asarray(origin_day, dtype=np.int64), (len(history),))
+        X = forecast_features(history, profiles, origin_days, np.arange(1, days + 1), self.max_horizon)
+        
+        paths = {
+            name: np.maximum(estimator.predict(X), 0).reshape(len(history), days)
+            for name, estimator in self.estimators.items()
+        }
+        # Independently fitted quantiles can cross the mean
+        paths['lower'] = np.minimum(paths['lower'], paths['forecast'])
+        paths['upper'] = np.maximum(paths['upper'], paths['forecast'])
+        return paths
+
+
+def build_training_set(series, profiles: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                       max_horizon: int, origin_stride: int = 7) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Training rows from every user's series (a TrainingSeries or its columns)
+    Origins every origin_stride days, from the first day on so that short
+    histories are represented; each origin contributes every horizon up to
+    max_horizon that the series covers.
+    """
+    X_parts, y_parts = [], []
+    n_profile = len(PROFILE_COLUMNS)
+    
+    for i, user_id in enumerate(series.user_ids.tolist()):
+        values = np.asarray(series.income[series.offsets[i]:series.offsets[i + 1]], dtype=float)
+        if len(values) < 2:
+            continue
+        start_day = int((series.start_dates[i] - _EPOCH).astype(np.int64))
+        
+        padded = np.concatenate([np.full(HISTORY_DAYS - 1, np.nan), values])
+        origins = np.arange(0, len(values) - 1, origin_stride)
+        history = np.lib.stride_tricks.sliding_window_view(padded, HISTORY_DAYS)[origins]
+        origin_days = start_day + origins
+        
+        profile_rows = _profiles_as_of(profiles.get(user_id), origin_days, n_profile)
+        horizons = np.arange(1, max_horizon + 1)
+        X = forecast_features(history, profile_rows, origin_days, horizons)
+        
+        # Keep only targets inside the series
+        target_index = (origins[:, None] + horizons[None, :]).ravel()
+        inside = target_index < len(values)
+        X_parts.append(X[inside])
+        y_parts.append(values[target_index[inside]])
+    
+    if not X_parts:
+        return np.empty((0, len(FEATURE_NAMES))), np.empty(0)
+    return np.vstack(X_parts), np.concatenate(y_parts)
+
+
+def train_global_model(series, profiles: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                       max_horizon: int = 90, origin_stride: int = 7,
+                       max_iter: int = 200, learning_rate: float = 0.1) -> GlobalForecaster:
+    """Fit the mean and quantile estimators on every user's series"""
+    from sklearn.ensemble import HistGradientBoostingRegressor
+    
+    X, y = build_training_set(series, profiles, max_horizon, origin_stride)
+    if len(y) == 0:
+        raise ValueError("No training rows: every series is shorter than two days")
+    
+    estimators = {}
+    for name, (loss, quantile) in PATH_LOSSES.items():
+        params = {'quantile': quantile} if quantile is not None else {}
+        estimators[name] = HistGradientBoostingRegressor(
+            loss=loss, max_iter=max_iter, learning_rate=learning_rate, random_state=0, **params
+        ).fit(X, y)
+    
+    return GlobalForecaster(estimators, max_horizon)
+
+
+def _profiles_as_of(profile: Optional[Tuple[np.ndarray, np.ndarray]], origin_days: np.ndarray,
+                    n_columns: int) -> np.ndarray:
+    # Latest week that ended on or before each origin; NaN before the first
+    rows = np.full((len(origin_days), n_columns), np.nan)
+    if profile is None:
+        return rows
+    week_end_days, values = profile
+    index = np.searchsorted(week_end_days, origin_days, side='right') - 1
+    known = index >= 0
+    rows[known] = values[index[known]]
+    return rows
+
+
+def profiles_as_of(profiles: Dict[str, Tuple[np.ndarray, np.ndarray]], user_ids: List[str],
+                   origin_days: np.ndarray) -> np.ndarray:
+    """[n, PROFILE_COLUMNS] each user's latest completed week as of their origin day (NaN if none)"""
+    rows = np.full((len(user_ids), len(PROFILE_COLUMNS)), np.nan)
+    for i, (user_id, origin_day) in enumerate(zip(user_ids, origin_days)):
+        rows[i] = _profiles_as_of(profiles.get(str(user_id)), np.array([origin_day]), len(PROFILE_COLUMNS))[0]
+    return rows
+
+
+def load_profile_history(db: Session, user_ids: Optional[Iterable[str]] = None) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Every weekly AIFeature row per user, for as-of lookups during training
+    Returns {user_id: (week end days since epoch, [weeks, PROFILE_COLUMNS])}
+    """
+    stmt = select(
+        AIFeature.user_id, AIFeature.week_start_date,
+        *[cast(getattr(AIFeature, column), Float) for column in PROFILE_COLUMNS]
+    ).order_by(AIFeature.user_id, AIFeature.week_start_date)
+    if user_ids is not None:
+        stmt = stmt.where(AIFeature.user_id.in_([str(user_id) for user_id in user_ids]))
+    
+    grouped = {}
+    for row in db.execute(stmt):
+        grouped.setdefault(str(row[0]), []).append(row[1:])
+    
+    profiles = {}
+    for user_id, rows in grouped.items():
+        week_starts = np.array([row[0] for row in rows], dtype='datetime64[D]')
+        week_end_days = (week_starts - _EPOCH).astype(np.int64) + 6
+        values = np.array([row[1:] for row in rows], dtype=float)
+        profiles[user_id] = (week_end_days, values)
+    return profiles
+
+
+def load_latest_profiles(db: Session, user_ids: List[str], origin: date) -> np.ndarray:
+    """
+    [n, PROFILE_COLUMNS] latest weekly AIFeature values per user (NaN if none), one query
+    Only weeks that ended on or before origin count, as in training; the
+    current week's row is partial and refreshed on every sync
+    """
+    rows = db.execute(
+        select(AIFeature.user_id, *[cast(getattr(AIFeature, column), Float) for column in PROFILE_COLUMNS])
+        .where(
+            AIFeature.user_id.in_(user_ids),
+            cast(AIFeature.week_start_date, Date) <= origin - timedelta(days=6)
+        )
+        .distinct(AIFeature.user_id)
+        .order_by(AIFeature.user_id, AIFeature.week_start_date.desc())
+    ).all()
+    
+    index = {user_id: i for i, user_id in enumerate(user_ids)}
+    profiles = np.full((len(user_ids), len(PROFILE_COLUMNS)), np.nan)
+    for row in rows:
+        profiles[index[str(row[0])]] = [np.nan if value is None else value for value in row[1:]]
+    return profiles
+
+
+def load_recent_history(db: Session, user_ids: List[str], origin: date) -> np.ndarray:
+    """
+    [n, HISTORY_DAYS] daily income ending on origin for each user, two queries
+    Days before a user's first income day are NaN, later days without income are 0
+    """
+    window_start = origin - timedelta(days=HISTORY_DAYS - 1)
+    index = {user_id: i for i, user_id in enumerate(user_ids)}
+    history = np.full((len(user_ids), HISTORY_DAYS), np.nan)
+    
+    first_days = db.execute(
+        select(DailyCashflow.user_id, func.min(DailyCashflow.cashflow_date))
+        .where(DailyCashflow.user_id.in_(user_ids), DailyCashflow.income_count > 0)
+        .group_by(DailyCashflow.user_id)
+    ).all()
+    for user_id, first_day in first_days:
+        if first_day <= origin:
+            history[index[str(user_id)], max((first_day - window_start).days, 0):] = 0.0
+    
+    rows = db.execute(
+        select(DailyCashflow.user_id, DailyCashflow.cashflow_date, cast(DailyCashflow.income_inr, Float))
+        .where(
+            DailyCashflow.user_id.in_(user_ids),
+            DailyCashflow.income_count > 0,
+            DailyCashflow.cashflow_date >= window_start,
+            DailyCashflow.cashflow_date <= origin
+        )
+    ).all()
+    for user_id, cashflow_date, income in rows:
+        history[index[str(user_id)], (cashflow_date - window_start).days] = income
+    
+    return history
+
+
+def day_number(day: date) -> int:
+    """Days since 1970-01-01, the origin_day unit of GlobalForecaster"""
+    return int((np.datetime64(day, 'D') - _EPOCH).astype(np.int64))
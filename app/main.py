@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import auth, transactions, features, predictions, smoothing, insights, manual_entry
+from app.fit_pool import arima_fit_pool
 
 app = FastAPI(
     title="Income Smoothing Platform API",
@@ -36,6 +37,11 @@ def root():
     }
 
 
+@app.on_event("shutdown")
+def shutdown_fit_pool():
+    arima_fit_pool.shutdown()
+
+
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
@@ -2,22 +2,65 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from decimal import Decimal
-from typing import Dict, List, Tuple, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import func, event, update, inspect, select, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.models import (
-    Transaction, AIFeature, CashflowPrediction, IncomeSource,
-    SmoothingBuffer, WeeklyRelease, AIInsight, ModelVersion, ModelMetric,
-    RiskLevel, InsightType, InsightSeverity, TransactionType
+    Transaction, AIFeature, FeatureWatermark, CashflowPrediction, IncomeSource,
+    SmoothingBuffer, AIInsight, RiskLevel, InsightType, InsightSeverity
+)
+from app.config import get_settings
+from app.fit_pool import arima_fit_pool
+from app.timeline import get_timeline, load_transaction_frames, iqr_mask_by_user
+from app.feature_engine import (
+    AI_FEATURE_COLUMNS, INTEGER_FEATURE_COLUMNS, compute_weekly_features, week_starts,
+    fetch_weekly_features_sql
 )
 import pytz
-from statsmodels.tsa.arima.model import ARIMA
-from prophet import Prophet
 import warnings
 warnings.filterwarnings('ignore')
 
 IST = pytz.timezone('Asia/Kolkata')
 
+# Users per query in the batch APIs
+BATCH_CHUNK_USERS = 200
+
+
+@event.listens_for(Session, 'after_flush')
+def _mark_features_dirty(session, flush_context):
+    """
+    Edits and deletes do not move the created_at watermark, so record the
+    earliest affected timestamp for the next incremental feature run
+    """
+    earliest = {}
+    
+    for obj in list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, Transaction):
+            continue
+        if obj not in session.deleted and not session.is_modified(obj):
+            continue
+        
+        history = inspect(obj).attrs.txn_timestamp.history
+        timestamps = [ts for ts in [obj.txn_timestamp, *history.deleted] if ts is not None]
+        if not timestamps:
+            continue
+        
+        user_id = obj.user_id
+        earliest[user_id] = min([earliest.get(user_id, timestamps[0]), *timestamps])
+    
+    if not earliest:
+        return
+    
+    table = FeatureWatermark.__table__
+    connection = session.connection()
+    for user_id, since in earliest.items():
+        connection.execute(
+            update(table)
+            .where(table.c.user_id == user_id)
+            .values(dirty_since=func.least(func.coalesce(table.c.dirty_since, since), since))
+        )
+
 
 class MLService:
     """Core ML service for income prediction and analysis"""
@@ -29,118 +72,106 @@ class MLService:
         """
         Preprocess transaction data for ML
         Returns clean DataFrame with IST timezone
+        Served from the session's shared timeline, so repeated calls within
+        one request do not hit the database again
         """
-        cutoff_date = datetime.utcnow() - timedelta(days=months * 30)
-        
-        transactions = self.db.query(Transaction).filter(
-            Transaction.user_id == user_id,
-            Transaction.txn_timestamp >= cutoff_date
-        ).order_by(Transaction.txn_timestamp).all()
-        
-        if not transactions:
-            return pd.DataFrame()
-        
-        data = []
-        for txn in transactions:
-            data.append({
-                'timestamp': txn.txn_timestamp,
-                'amount': float(txn.amount_inr),
-                'type': txn.txn_type.value,
-                'is_income': txn.is_income,
-                'category': txn.merchant_category.value,
-                'balance': float(txn.balance_after_txn)
-            })
-        
-        df = pd.DataFrame(data)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df = df.sort_values('timestamp').reset_index(drop=True)
-        
-        # Remove extreme outliers using IQR
-        Q1 = df['amount'].quantile(0.25)
-        Q3 = df['amount'].quantile(0.75)
-        IQR = Q3 - Q1
-        lower_bound = Q1 - 3 * IQR
-        upper_bound = Q3 + 3 * IQR
-        df = df[(df['amount'] >= lower_bound) & (df['amount'] <= upper_bound)]
-        
-        return df
+        return get_timeline(self.db, user_id).frame(months).copy()
     
-    def extract_features(self, user_id: str) -> None:
+    def extract_features(self, user_id: str, full_rebuild: bool = False) -> None:
         """
         Extract weekly features and store in ai_features table
+        Incremental by default: only weeks touched by transactions created or
+        edited since the user's watermark are recomputed (from the earliest
+        touched week onwards). full_rebuild recomputes every week.
+        With FEATURE_ENGINE=postgres the aggregation runs in the database.
         """
-        df = self.preprocess_transactions(user_id, months=6)
-        
-        if df.empty:
-            return
+        watermark = self.db.query(FeatureWatermark).filter(
+            FeatureWatermark.user_id == user_id
+        ).first()
         
-        df['week_start'] = df['timestamp'].dt.to_period('W').apply(lambda r: r.start_time)
+        touched_since = None
         
-        for week_start, week_data in df.groupby('week_start'):
-            income_data = week_data[week_data['is_income'] == True]
-            expense_data = week_data[week_data['is_income'] == False]
+        if watermark is not None and not full_rebuild:
+            touched_since, latest_created, latest_txn = self.db.query(
+                func.min(Transaction.txn_timestamp).filter(
+                    Transaction.created_at > watermark.last_created_at
+                ),
+                func.max(Transaction.created_at),
+                func.max(Transaction.txn_timestamp)
+            ).filter(Transaction.user_id == user_id).one()
             
-            total_income = income_data['amount'].sum()
-            total_expense = expense_data['amount'].sum()
-            net_cashflow = total_income - total_expense
+            if watermark.dirty_since is not None:
+                touched_since = min(touched_since or watermark.dirty_since, watermark.dirty_since)
             
-            # Income metrics
-            avg_daily_income = total_income / 7
-            income_std = income_data['amount'].std() if len(income_data) > 1 else 0
-            income_volatility = (income_std / avg_daily_income) if avg_daily_income > 0 else 0
-            
-            days_with_income = income_data['timestamp'].dt.date.nunique()
-            days_without_income = 7 - days_with_income
-            
-            # Income source analysis
-            income_sources = income_data['category'].value_counts()
-            income_source_count = len(income_sources)
-            top_source_pct = (income_sources.iloc[0] / total_income * 100) if len(income_sources) > 0 else 0
+            if touched_since is None:
+                return
+        else:
+            latest_created, latest_txn = self.db.query(
+                func.max(Transaction.created_at),
+                func.max(Transaction.txn_timestamp)
+            ).filter(Transaction.user_id == user_id).one()
+        
+        touched_week = None
+        if touched_since is not None:
+            touched_week = pd.Timestamp(touched_since).to_period('W').start_time
+        
+        if get_settings().feature_engine == 'postgres':
+            weekly = fetch_weekly_features_sql(self.db, user_id, since_week=touched_week)
+        else:
+            df = self.preprocess_transactions(user_id, months=6)
             
-            # Expense metrics
-            avg_daily_expense = total_expense / 7
-            expense_std = expense_data['amount'].std() if len(expense_data) > 1 else 0
+            if df.empty:
+                return
             
-            # Check if feature already exists
-            existing = self.db.query(AIFeature).filter(
-                AIFeature.user_id == user_id,
-                AIFeature.week_start_date == week_start
-            ).first()
+            if touched_week is not None:
+                df = df[week_starts(df['timestamp']) >= touched_week]
             
-            if existing:
-                existing.total_income_inr = Decimal(str(total_income))
-                existing.total_expense_inr = Decimal(str(total_expense))
-                existing.net_cashflow_inr = Decimal(str(net_cashflow))
-                existing.avg_daily_income = Decimal(str(avg_daily_income))
-                existing.income_std_dev = Decimal(str(income_std))
-                existing.income_volatility_ratio = Decimal(str(income_volatility))
-                existing.days_with_income = days_with_income
-                existing.days_without_income = days_without_income
-                existing.income_source_count = income_source_count
-                existing.top_income_source_pct = Decimal(str(top_source_pct))
-                existing.avg_daily_expense = Decimal(str(avg_daily_expense))
-                existing.expense_std_dev = Decimal(str(expense_std))
-            else:
-                feature = AIFeature(
-                    user_id=user_id,
-                    week_start_date=week_start,
-                    total_income_inr=Decimal(str(total_income)),
-                    total_expense_inr=Decimal(str(total_expense)),
-                    net_cashflow_inr=Decimal(str(net_cashflow)),
-                    avg_daily_income=Decimal(str(avg_daily_income)),
-                    income_std_dev=Decimal(str(income_std)),
-                    income_volatility_ratio=Decimal(str(income_volatility)),
-                    days_with_income=days_with_income,
-                    days_without_income=days_without_income,
-                    income_source_count=income_source_count,
-                    top_income_source_pct=Decimal(str(top_source_pct)),
-                    avg_daily_expense=Decimal(str(avg_daily_expense)),
-                    expense_std_dev=Decimal(str(expense_std))
-                )
-                self.db.add(feature)
+            weekly = compute_weekly_features(df)
+        
+        self._upsert_features(self._feature_rows(weekly, user_id))
+        
+        if latest_created is not None:
+            if watermark is None:
+                watermark = FeatureWatermark(user_id=user_id)
+                self.db.add(watermark)
+            watermark.last_created_at = latest_created
+            watermark.last_txn_timestamp = latest_txn
+            watermark.dirty_since = None
         
         self.db.commit()
     
+    def _feature_rows(self, weekly: pd.DataFrame, user_id: Optional[str] = None) -> List[Dict]:
+        """
+        ai_features rows from compute_weekly_features output
+        Without user_id the index is (user_id, week_start), as from by_user=True
+        """
+        rows = []
+        for key, values in zip(weekly.index, weekly.itertuples(index=False)):
+            row_user, week_start = (user_id, key) if user_id is not None else key
+            row = {'user_id': row_user, 'week_start_date': week_start.to_pydatetime()}
+            for column, value in zip(AI_FEATURE_COLUMNS, values):
+                row[column] = int(value) if column in INTEGER_FEATURE_COLUMNS else Decimal(str(value))
+            rows.append(row)
+        return rows
+    
+    def _upsert_features(self, rows: List[Dict]) -> None:
+        """
+        Write weekly feature rows with a single INSERT ... ON CONFLICT DO UPDATE
+        keyed on the (user_id, week_start_date) unique index
+        """
+        if not rows:
+            return
+        
+        # Executed with the rows as parameters rather than .values(rows): the
+        # statement compiles once and the driver batches the VALUES lists,
+        # which matters for the multi-user batch path
+        stmt = pg_insert(AIFeature)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[AIFeature.user_id, AIFeature.week_start_date],
+            set_={column: stmt.excluded[column] for column in AI_FEATURE_COLUMNS}
+        )
+        self.db.execute(stmt, rows)
+    
     def calculate_income_stability_score(self, user_id: str) -> Decimal:
         """
         Calculate income stability score (0-1)
@@ -181,10 +212,17 @@ class MLService:
         Primary prediction method: Rolling mean + std
         Conservative and explainable
         """
-        df = self.preprocess_transactions(user_id, months=6)
+        return self.predict_cashflow_rolling_mean_horizons(user_id, [days])[days]
+    
+    def predict_cashflow_rolling_mean_horizons(self, user_id: str, horizons: List[int]) -> Dict[int, Dict]:
+        """
+        Rolling mean predictions for several windows
+        The daily statistics are computed once and scaled per window
+        """
+        timeline = get_timeline(self.db, user_id)
         
-        if df.empty or len(df) < 14:
-            return {
+        if timeline.transaction_count(months=6) < 14:
+            return {days: {
                 'expected_inflow': 0,
                 'expected_outflow': 0,
                 'net_cashflow': 0,
@@ -192,39 +230,20 @@ class MLService:
                 'upper_bound': 0,
                 'risk_level': RiskLevel.HIGH,
                 'confidence': 0.3
-            }
-        
-        # Separate income and expenses
-        income_df = df[df['is_income'] == True].copy()
-        expense_df = df[df['is_income'] == False].copy()
-        
-        # Daily aggregation
-        income_df['date'] = income_df['timestamp'].dt.date
-        expense_df['date'] = expense_df['timestamp'].dt.date
+            } for days in horizons}
         
-        daily_income = income_df.groupby('date')['amount'].sum()
-        daily_expense = expense_df.groupby('date')['amount'].sum()
+        # Daily aggregation of income and expenses
+        daily_income, daily_expense = timeline.daily_totals(months=6)
         
         # Rolling statistics (30-day window)
         window = min(30, len(daily_income))
+        min_periods = min(7, window)
         
-        mean_daily_income = daily_income.rolling(window=window, min_periods=7).mean().iloc[-1]
-        std_daily_income = daily_income.rolling(window=window, min_periods=7).std().iloc[-1]
+        mean_daily_income = daily_income.rolling(window=window, min_periods=min_periods).mean().iloc[-1]
+        std_daily_income = daily_income.rolling(window=window, min_periods=min_periods).std().iloc[-1]
         
-        mean_daily_expense = daily_expense.rolling(window=window, min_periods=7).mean().iloc[-1]
-        std_daily_expense = daily_expense.rolling(window=window, min_periods=7).std().iloc[-1]
-        
-        # Project forward
-        expected_inflow = mean_daily_income * days
-        expected_outflow = mean_daily_expense * days
-        net_cashflow = expected_inflow - expected_outflow
-        
-        # Conservative bounds (2 std devs)
-        lower_bound_income = max(0, mean_daily_income - 2 * std_daily_income) * days
-        upper_bound_income = (mean_daily_income + 2 * std_daily_income) * days
-        
-        lower_bound = lower_bound_income - expected_outflow
-        upper_bound = upper_bound_income - expected_outflow
+        mean_daily_expense = daily_expense.rolling(window=window, min_periods=min_periods).mean().iloc[-1]
+        std_daily_expense = daily_expense.rolling(window=window, min_periods=min_periods).std().iloc[-1]
         
         # Risk assessment
         volatility = std_daily_income / mean_daily_income if mean_daily_income > 0 else 1.0
@@ -238,59 +257,79 @@ class MLService:
             risk_level = RiskLevel.HIGH
             confidence = 0.50
         
-        return {
-            'expected_inflow': float(expected_inflow),
-            'expected_outflow': float(expected_outflow),
-            'net_cashflow': float(net_cashflow),
-            'lower_bound': float(lower_bound),
-            'upper_bound': float(upper_bound),
-            'risk_level': risk_level,
-            'confidence': confidence
-        }
+        predictions = {}
+        for days in horizons:
+            # Project forward
+            expected_inflow = mean_daily_income * days
+            expected_outflow = mean_daily_expense * days
+            net_cashflow = expected_inflow - expected_outflow
+            
+            # Conservative bounds (2 std devs)
+            lower_bound_income = max(0, mean_daily_income - 2 * std_daily_income) * days
+            upper_bound_income = (mean_daily_income + 2 * std_daily_income) * days
+            
+            predictions[days] = {
+                'expected_inflow': float(expected_inflow),
+                'expected_outflow': float(expected_outflow),
+                'net_cashflow': float(net_cashflow),
+                'lower_bound': float(lower_bound_income - expected_outflow),
+                'upper_bound': float(upper_bound_income - expected_outflow),
+                'risk_level': risk_level,
+                'confidence': confidence
+            }
+        
+        return predictions
     
     def predict_cashflow_arima(self, user_id: str, days: int) -> Optional[Dict]:
         """
         Secondary prediction: ARIMA (only if >= 180 days data)
         """
-        df = self.preprocess_transactions(user_id, months=6)
+        predictions = self.predict_cashflow_arima_horizons(user_id, [days])
+        return predictions[days] if predictions else None
+    
+    def predict_cashflow_arima_horizons(self, user_id: str, horizons: List[int]) -> Optional[Dict[int, Dict]]:
+        """
+        ARIMA predictions for several windows from one fit
+        Each window uses the leading days of a single forecast path
+        """
+        timeline = get_timeline(self.db, user_id)
         
-        if df.empty or len(df) < 180:
+        if timeline.transaction_count(months=6) < 180:
+            return None
+        
+        daily_income, daily_expense = timeline.daily_totals(months=6)
+        
+        # Fit and forecast in the worker pool; None means saturated, too slow or failed
+        path = arima_fit_pool.forecast(daily_income.values, (1, 1, 1), max(horizons))
+        if path is None:
             return None
         
         try:
-            income_df = df[df['is_income'] == True].copy()
-            income_df['date'] = income_df['timestamp'].dt.date
-            daily_income = income_df.groupby('date')['amount'].sum()
-            
-            # Fit ARIMA
-            model = ARIMA(daily_income, order=(1, 1, 1))
-            fitted = model.fit()
-            
-            # Forecast
-            forecast = fitted.forecast(steps=days)
-            forecast_mean = forecast.mean()
-            forecast_std = forecast.std()
-            
-            expected_inflow = forecast.sum()
-            lower_bound = max(0, forecast_mean - 2 * forecast_std) * days
-            upper_bound = (forecast_mean + 2 * forecast_std) * days
-            
             # Expenses (use rolling mean)
-            expense_df = df[df['is_income'] == False].copy()
-            expense_df['date'] = expense_df['timestamp'].dt.date
-            daily_expense = expense_df.groupby('date')['amount'].sum()
             mean_expense = daily_expense.mean()
-            expected_outflow = mean_expense * days
             
-            return {
-                'expected_inflow': float(expected_inflow),
-                'expected_outflow': float(expected_outflow),
-                'net_cashflow': float(expected_inflow - expected_outflow),
-                'lower_bound': float(lower_bound - expected_outflow),
-                'upper_bound': float(upper_bound - expected_outflow),
-                'risk_level': RiskLevel.MEDIUM,
-                'confidence': 0.75
-            }
+            predictions = {}
+            for days in horizons:
+                forecast = path[:days]
+                forecast_mean = forecast.mean()
+                forecast_std = forecast.std()
+                
+                expected_inflow = forecast.sum()
+                lower_bound = max(0, forecast_mean - 2 * forecast_std) * days
+                upper_bound = (forecast_mean + 2 * forecast_std) * days
+                expected_outflow = mean_expense * days
+                
+                predictions[days] = {
+                    'expected_inflow': float(expected_inflow),
+                    'expected_outflow': float(expected_outflow),
+                    'net_cashflow': float(expected_inflow - expected_outflow),
+                    'lower_bound': float(lower_bound - expected_outflow),
+                    'upper_bound': float(upper_bound - expected_outflow),
+                    'risk_level': RiskLevel.MEDIUM,
+                    'confidence': 0.75
+                }
+            
+            return predictions
         except Exception as e:
             print(f"ARIMA failed: {e}")
             return None
@@ -299,14 +338,21 @@ class MLService:
         """
         Main prediction method - tries ARIMA, falls back to rolling mean
         """
+        return self.predict_cashflow_horizons(user_id, [days])[days]
+    
+    def predict_cashflow_horizons(self, user_id: str, horizons: List[int]) -> Dict[int, Dict]:
+        """
+        Predictions for several windows, keyed by days
+        The model is fitted once for the longest window
+        """
         # Try ARIMA first if enough data
-        arima_result = self.predict_cashflow_arima(user_id, days)
-        if arima_result:
-            return {**arima_result, 'model_used': 'ARIMA'}
+        arima_results = self.predict_cashflow_arima_horizons(user_id, horizons)
+        if arima_results:
+            return {days: {**result, 'model_used': 'ARIMA'} for days, result in arima_results.items()}
         
         # Fall back to rolling mean
-        rolling_result = self.predict_cashflow_rolling_mean(user_id, days)
-        return {**rolling_result, 'model_used': 'RollingMean'}
+        rolling_results = self.predict_cashflow_rolling_mean_horizons(user_id, horizons)
+        return {days: {**result, 'model_used': 'RollingMean'} for days, result in rolling_results.items()}
     
     def save_prediction(self, user_id: str, days: int) -> CashflowPrediction:
         """
@@ -399,59 +445,79 @@ class MLService:
         """
         Analyze and update income sources
         """
-        df = self.preprocess_transactions(user_id, months=3)
+        df = get_timeline(self.db, user_id).frame(months=3)
         
         if df.empty:
             return
         
-        income_df = df[df['is_income'] == True]
-        
-        # Group by category
-        source_stats = income_df.groupby('category').agg({
-            'amount': ['sum', 'mean', 'std', 'count']
-        }).reset_index()
-        
-        source_stats.columns = ['category', 'total', 'mean', 'std', 'count']
-        
-        total_income = source_stats['total'].sum()
+        income_df = df[df['is_income'] == True].assign(user_id=user_id)
         
         # Delete old sources
         self.db.query(IncomeSource).filter(IncomeSource.user_id == user_id).delete()
         
-        for _, row in source_stats.iterrows():
-            contribution_pct = (row['total'] / total_income * 100) if total_income > 0 else 0
+        for row in self._income_source_rows(income_df):
+            self.db.add(IncomeSource(**row))
+        
+        self.db.commit()
+    
+    def _income_source_rows(self, income_df: pd.DataFrame) -> List[Dict]:
+        """IncomeSource rows from the income transactions of one or more users"""
+        if income_df.empty:
+            return []
+        
+        # Group by user and category
+        source_stats = income_df.groupby(['user_id', 'category']).agg(
+            total=('amount', 'sum'),
+            mean=('amount', 'mean'),
+            std=('amount', 'std'),
+            last_payment=('timestamp', 'max')
+        ).reset_index()
+        
+        user_totals = source_stats.groupby('user_id')['total'].transform('sum')
+        
+        rows = []
+        for row, total_income in zip(source_stats.itertuples(index=False), user_totals):
+            contribution_pct = (row.total / total_income * 100) if total_income > 0 else 0
             
             # Stability score (inverse of coefficient of variation)
-            cv = row['std'] / row['mean'] if row['mean'] > 0 else 1.0
+            cv = row.std / row.mean if row.mean > 0 else 1.0
             stability = max(0, 1.0 - cv)
             
-            # Last payment
-            last_payment = income_df[income_df['category'] == row['category']]['timestamp'].max()
-            
-            source = IncomeSource(
-                user_id=user_id,
-                source_name=row['category'],
-                source_category=row['category'],
-                avg_monthly_inr=Decimal(str(row['mean'] * 30)),
-                contribution_pct=Decimal(str(contribution_pct)),
-                stability_score=Decimal(str(stability)),
-                last_payment_date=last_payment
-            )
-            self.db.add(source)
+            rows.append({
+                'user_id': row.user_id,
+                'source_name': row.category,
+                'source_category': row.category,
+                'avg_monthly_inr': Decimal(str(row.mean * 30)),
+                'contribution_pct': Decimal(str(contribution_pct)),
+                'stability_score': Decimal(str(stability)),
+                'last_payment_date': row.last_payment.to_pydatetime()
+            })
         
-        self.db.commit()
+        return rows
     
     def generate_insights(self, user_id: str) -> List[AIInsight]:
         """
         Generate rule-based AI insights
         """
-        insights = []
-        
         # Get recent features
         features = self.db.query(AIFeature).filter(
             AIFeature.user_id == user_id
         ).order_by(AIFeature.week_start_date.desc()).limit(8).all()
         
+        insights = self._insights_from_features(user_id, features)
+        
+        # Save insights
+        for insight in insights:
+            self.db.add(insight)
+        
+        self.db.commit()
+        
+        return insights
+    
+    def _insights_from_features(self, user_id: str, features: List[AIFeature]) -> List[AIInsight]:
+        """Apply the insight rules to a user's recent features (newest first)"""
+        insights = []
+        
         if not features:
             return insights
         
@@ -534,10 +600,141 @@ class MLService:
                     }
                 ))
         
-        # Save insights
-        for insight in insights:
-            self.db.add(insight)
+        return insights
+    
+    # Batch APIs for nightly jobs: one transactions query per chunk of users
+    
+    def extract_features_batch(self, user_ids: List[str], chunk_size: int = BATCH_CHUNK_USERS) -> int:
+        """
+        Rebuild weekly features for many users
+        Each chunk of users is loaded with one query, run through the grouped
+        kernel and upserted in one statement. Returns the users processed.
+        """
+        for chunk in self._chunks(user_ids, chunk_size):
+            self._extract_features_chunk(chunk, self._load_batch_frame(chunk))
+            self.db.commit()
+        return len(user_ids)
+    
+    def update_income_sources_batch(self, user_ids: List[str], chunk_size: int = BATCH_CHUNK_USERS) -> int:
+        """Recompute income sources for many users, one query per chunk"""
+        for chunk in self._chunks(user_ids, chunk_size):
+            self._update_income_sources_chunk(chunk, self._load_batch_frame(chunk, months=3))
+            self.db.commit()
+        return len(user_ids)
+    
+    def generate_insights_batch(self, user_ids: List[str], chunk_size: int = BATCH_CHUNK_USERS) -> int:
+        """Generate insights for many users from their stored features"""
+        created = 0
+        for chunk in self._chunks(user_ids, chunk_size):
+            created += self._generate_insights_chunk(chunk)
+            self.db.commit()
+        return created
+    
+    def analyze_users_batch(self, user_ids: List[str], chunk_size: int = BATCH_CHUNK_USERS) -> int:
+        """
+        Features, income sources and insights for many users
+        The chunk's 6-month transaction frame also serves the 3-month income
+        source window, so each chunk reads transactions once
+        """
+        for chunk in self._chunks(user_ids, chunk_size):
+            raw = self._load_batch_frame(chunk, filtered=False)
+            
+            self._extract_features_chunk(chunk, self._filter_batch_frame(raw))
+            recent = raw[raw['timestamp'] >= datetime.utcnow() - timedelta(days=90)]
+            self._update_income_sources_chunk(chunk, self._filter_batch_frame(recent))
+            self.db.commit()
+            
+            self._generate_insights_chunk(chunk)
+            self.db.commit()
+        return len(user_ids)
+    
+    def _chunks(self, user_ids: List[str], chunk_size: int):
+        user_ids = [str(user_id) for user_id in user_ids]
+        for i in range(0, len(user_ids), chunk_size):
+            yield user_ids[i:i + chunk_size]
+    
+    def _load_batch_frame(self, user_ids: List[str], months: int = 6, filtered: bool = True) -> pd.DataFrame:
+        """Transactions of a chunk of users, outlier-filtered per user like preprocess_transactions"""
+        df = load_transaction_frames(self.db, user_ids, datetime.utcnow() - timedelta(days=months * 30))
+        return self._filter_batch_frame(df) if filtered else df
+    
+    def _filter_batch_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        if df.empty:
+            return df
+        return df[iqr_mask_by_user(df)]
+    
+    def _extract_features_chunk(self, user_ids: List[str], df: pd.DataFrame) -> None:
+        weekly = compute_weekly_features(df, by_user=True)
+        self._upsert_features(self._feature_rows(weekly))
+        
+        # Every week was rebuilt, so the watermarks move to the latest rows
+        latest = self.db.execute(
+            select(
+                Transaction.user_id,
+                func.max(Transaction.created_at),
+                func.max(Transaction.txn_timestamp)
+            ).where(Transaction.user_id.in_(user_ids)).group_by(Transaction.user_id)
+        ).all()
+        
+        if not latest:
+            return
         
-        self.db.commit()
+        now = datetime.utcnow()
+        stmt = pg_insert(FeatureWatermark).values([
+            {
+                'user_id': user_id,
+                'last_created_at': latest_created,
+                'last_txn_timestamp': latest_txn,
+                'dirty_since': None,
+                'updated_at': now
+            }
+            for user_id, latest_created, latest_txn in latest
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[FeatureWatermark.user_id],
+            set_={
+                column: stmt.excluded[column]
+                for column in ['last_created_at', 'last_txn_timestamp', 'dirty_since', 'updated_at']
+            }
+        )
+        self.db.execute(stmt)
+    
+    def _update_income_sources_chunk(self, user_ids: List[str], df: pd.DataFrame) -> None:
+        self.db.query(IncomeSource).filter(
+            IncomeSource.user_id.in_(user_ids)
+        ).delete(synchronize_session=False)
         
-        return insights
+        if df.empty:
+            return
+        
+        rows = self._income_source_rows(df[df['is_income'] == True])
+        if rows:
+            self.db.execute(insert(IncomeSource), rows)
+    
+    def _generate_insights_chunk(self, user_ids: List[str]) -> int:
+        # Latest 8 weeks per user in one query
+        ranked = select(
+            AIFeature,
+            func.row_number().over(
+                partition_by=AIFeature.user_id,
+                order_by=AIFeature.week_start_date.desc()
+            ).label('week_rank')
+        ).where(AIFeature.user_id.in_(user_ids)).subquery()
+        recent_feature = aliased(AIFeature, ranked)
+        
+        features = self.db.execute(
+            select(recent_feature)
+            .where(ranked.c.week_rank <= 8)
+            .order_by(ranked.c.user_id, ranked.c.week_start_date.desc())
+        ).scalars().all()
+        
+        by_user = {}
+        for feature in features:
+            by_user.setdefault(feature.user_id, []).append(feature)
+        
+        insights = []
+        for user_id, user_features in by_user.items():
+            insights.extend(self._insights_from_features(user_id, user_features))
+        
+        self.db.add_all(insights)
+        return len(insights)
@@ -0,0 +1,133 @@
+"""
+Per-user model manifest
+The training pipeline records every artifact it writes as a ModelVersion
+(with its ModelMetric rows) and flags the model serving should use, so a
+prediction loads exactly one artifact without probing the models directory
+"""
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import select, update, func
+from sqlalchemy.orm import Session
+from app.models import ModelVersion, ModelMetric
+
+# Serving preference, best first
+MODEL_PRIORITY = ['arima', 'prophet', 'fourier', 'rolling_mean']
+
+
+def record_model_version(db: Session, user_id: str, model_type: str, artifact_path: Path,
+                         algorithm: str, parameters: Optional[Dict] = None,
+                         metrics: Optional[Dict[str, float]] = None,
+                         training_date: Optional[datetime] = None,
+                         data_watermark: Optional[datetime] = None) -> ModelVersion:
+    """
+    Add the next version of a user's model and retire the previous one
+    `data_watermark` is the latest change to the training data: a new
+    transaction's created_at or the time of an edit or delete. Caller commits.
+    """
+    training_date = training_date or datetime.utcnow()
+    artifact_path = Path(artifact_path)
+    
+    versions = db.execute(
+        select(func.count()).select_from(ModelVersion).where(
+            ModelVersion.user_id == user_id,
+            ModelVersion.model_name == model_type
+        )
+    ).scalar()
+    
+    db.execute(
+        update(ModelVersion)
+        .where(ModelVersion.user_id == user_id, ModelVersion.model_name == model_type)
+        .values(is_active=False, is_preferred=False)
+    )
+    
+    version = ModelVersion(
+        user_id=user_id,
+        model_name=model_type,
+        version_number=str(versions + 1),
+        algorithm=algorithm,
+        parameters=parameters,
+        training_date=training_date,
+        data_watermark=data_watermark,
+        artifact_path=str(artifact_path),
+        artifact_size_bytes=artifact_path.stat().st_size,
+        is_active=True,
+        is_preferred=False
+    )
+    db.add(version)
+    db.flush()
+    
+    for name, value in (metrics or {}).items():
+        db.add(ModelMetric(
+            version_id=version.version_id,
+            metric_name=name,
+            metric_value=round(float(value), 4),
+            evaluation_date=training_date
+        ))
+    
+    return version
+
+
+def mark_preferred(db: Session, user_id: str) -> Optional[ModelVersion]:
+    """
+    Flag the highest-priority active model as the one to serve
+    Caller commits.
+    """
+    versions = sorted(_active_versions(db, user_id), key=lambda version: MODEL_PRIORITY.index(version.model_name))
+    
+    for version in versions:
+        version.is_preferred = False
+    
+    if not versions:
+        return None
+    
+    versions[0].is_preferred = True
+    return versions[0]
+
+
+def load_manifest(db: Session, user_id: str) -> List[ModelVersion]:
+    """A user's active model versions, the preferred one first, then by priority"""
+    return sorted(
+        _active_versions(db, user_id),
+        key=lambda version: (not version.is_preferred, MODEL_PRIORITY.index(version.model_name))
+    )
+
+
+def training_watermark(db: Session, user_id: str,
+                       model_types: Optional[Iterable[str]] = None) -> Optional[datetime]:
+    """
+    Data watermark the user's active models were trained through
+    None if there are no active models, one lacks a watermark or its artifact,
+    or one of `model_types` has no active version (it failed or timed out)
+    """
+    versions = _active_versions(db, user_id)
+    missing = set(model_types or []) - {version.model_name for version in versions}
+    
+    if not versions or missing or any(
+        version.data_watermark is None or not version.artifact_path or not Path(version.artifact_path).exists()
+        for version in versions
+    ):
+        return None
+    
+    return min(version.data_watermark for version in versions)
+
+
+def active_global_version(db: Session, model_type: str = 'global') -> Optional[ModelVersion]:
+    """The active version of a model shared by all users (recorded with no user_id)"""
+    return db.execute(
+        select(ModelVersion).where(
+            ModelVersion.user_id.is_(None),
+            ModelVersion.model_name == model_type,
+            ModelVersion.is_active == True
+        ).order_by(ModelVersion.created_at.desc()).limit(1)
+    ).scalar_one_or_none()
+
+
+def _active_versions(db: Session, user_id: str) -> List[ModelVersion]:
+    versions = db.execute(
+        select(ModelVersion).where(
+            ModelVersion.user_id == user_id,
+            ModelVersion.is_active == True
+        )
+    ).scalars().all()
+    return [version for version in versions if version.model_name in MODEL_PRIORITY]
@@ -0,0 +1,155 @@
+"""
+Process-wide registry of pre-trained model artifacts
+Keeps deserialized models in a size-bounded LRU cache so a prediction
+request does not unpickle the same files again
+"""
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Optional
+import joblib
+from app.config import get_settings
+from app.arima_artifact import ARIMA_ARTIFACT_SUFFIX, CompactARIMA, load_arima_artifact
+from app.fourier_model import FOURIER_ARTIFACT_SUFFIX, load_fourier_artifact
+
+
+def model_artifact_path(models_dir: Path, model_type: str, user_id: str) -> Path:
+    """
+    Path of a user's artifact for a model type
+    ARIMA prefers the compact .npz format and falls back to a legacy pickle;
+    Fourier models are only stored as .npz
+    """
+    if model_type == 'fourier':
+        return Path(models_dir) / f"fourier_{user_id}{FOURIER_ARTIFACT_SUFFIX}"
+    if model_type == 'arima':
+        compact = Path(models_dir) / f"arima_{user_id}{ARIMA_ARTIFACT_SUFFIX}"
+        if compact.exists():
+            return compact
+    return Path(models_dir) / f"{model_type}_{user_id}.pkl"
+
+
+def load_model_artifact(path: Path):
+    """
+    Deserialize an artifact according to its format
+    With NumPy ARIMA serving, legacy pickled ARIMA results are reduced to a
+    CompactARIMA on load so predictions skip the statsmodels forecast path
+    """
+    path = Path(path)
+    if path.suffix == FOURIER_ARTIFACT_SUFFIX and path.name.startswith('fourier_'):
+        return load_fourier_artifact(path)
+    if path.suffix == ARIMA_ARTIFACT_SUFFIX:
+        return load_arima_artifact(path)
+    
+    model = joblib.load(path)
+    if path.name.startswith('arima_') and get_settings().arima_serving == 'numpy':
+        return CompactARIMA.from_results(model)
+    return model
+
+
+class ModelRegistry:
+    """
+    LRU cache of loaded model artifacts keyed by file path
+    An entry is reused only while the file's mtime and size are unchanged,
+    so retrained models are picked up without a restart. Memory is bounded
+    by the artifacts' on-disk size, a close proxy for the unpickled size.
+    Concurrent requests for the same file wait for a single load.
+    """
+    
+    def __init__(self, max_bytes: int, loader: Callable = load_model_artifact):
+        self.max_bytes = max_bytes
+        self.loader = loader
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, path: Path):
+        """Return the model stored at path, or None if the file does not exist"""
+        key = str(path)
+        try:
+            stat = Path(path).stat()
+        except FileNotFoundError:
+            with self._lock:
+                self._discard(key)
+                self._load_locks.pop(key, None)
+            return None
+        version = (stat.st_mtime_ns, stat.st_size)
+        
+        model = self._lookup(key, version)
+        if model is not None:
+            return model
+        
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        
+        with load_lock:
+            # Another thread may have loaded it while we waited
+            model = self._lookup(key, version)
+            if model is not None:
+                return model
+            
+            try:
+                model = self.loader(path)
+            except Exception:
+                # A failed load caches nothing, so keep no lock for the key either
+                with self._lock:
+                    self.misses += 1
+                    self._discard(key)
+                    if self._load_locks.get(key) is load_lock:
+                        del self._load_locks[key]
+                raise
+            
+            with self._lock:
+                self.misses += 1
+                self._discard(key)
+                self._entries[key] = (version, model)
+                self._bytes += stat.st_size
+                self._evict()
+            
+            return model
+    
+    def _lookup(self, key: str, version) -> Optional[object]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[0][1]
+    
+    def _evict(self) -> None:
+        # Always keep the newest entry, even if it alone exceeds the bound
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            key, (version, _model) = self._entries.popitem(last=False)
+            self._load_locks.pop(key, None)
+            self._bytes -= version[1]
+            self.evictions += 1
+    
+    def stats(self) -> Dict:
+        """Hit, miss and eviction counters plus current occupancy"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes
+            }
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._load_locks.clear()
+            self._bytes = 0
+
+
+model_registry = ModelRegistry(max_bytes=get_settings().pretrained_cache_max_mb * 1024 * 1024)
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, Integer, Numeric, DateTime, ForeignKey, Text, Enum, Boolean, Index, JSON
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy import Column, String, Integer, Numeric, Float, Date, DateTime, ForeignKey, Text, Enum, Boolean, Index, JSON
+from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -68,6 +68,10 @@ class User(Base):
     smoothing_buffer = relationship("SmoothingBuffer", back_populates="user", uselist=False)
     weekly_releases = relationship("WeeklyRelease", back_populates="user")
     ai_insights = relationship("AIInsight", back_populates="user")
+    feature_watermark = relationship("FeatureWatermark", back_populates="user", uselist=False)
+    daily_cashflow = relationship("DailyCashflow", back_populates="user")
+    forecast_path = relationship("ForecastPath", back_populates="user", uselist=False)
+    model_versions = relationship("ModelVersion", back_populates="user")
 
 
 class UserProfile(Base):
@@ -131,6 +135,22 @@ class Transaction(Base):
     )
 
 
+class DailyCashflow(Base):
+    __tablename__ = "daily_cashflow"
+    
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id"), primary_key=True)
+    cashflow_date = Column(Date, primary_key=True)
+    income_inr = Column(Numeric(14, 2), default=0, nullable=False)
+    expense_inr = Column(Numeric(14, 2), default=0, nullable=False)
+    income_count = Column(Integer, default=0, nullable=False)
+    expense_count = Column(Integer, default=0, nullable=False)
+    category_totals_inr = Column(JSONB, default=dict, nullable=False)
+    expense_by_category_inr = Column(JSONB, default=dict, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    user = relationship("User", back_populates="daily_cashflow")
+
+
 class IncomeSource(Base):
     __tablename__ = "income_sources"
     
@@ -177,10 +197,38 @@ class AIFeature(Base):
     user = relationship("User", back_populates="ai_features")
     
     __table_args__ = (
-        Index("idx_ai_features_user_week", "user_id", "week_start_date"),
+        Index("idx_ai_features_user_week_unique", "user_id", "week_start_date", unique=True),
     )
 
 
+class FeatureWatermark(Base):
+    __tablename__ = "feature_watermarks"
+    
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id"), primary_key=True)
+    last_created_at = Column(DateTime, nullable=False)
+    last_txn_timestamp = Column(DateTime, nullable=False)
+    dirty_since = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    user = relationship("User", back_populates="feature_watermark")
+
+
+class ForecastPath(Base):
+    __tablename__ = "forecast_paths"
+    
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id"), primary_key=True)
+    model_used = Column(String(50), nullable=False)
+    trained_at = Column(DateTime, nullable=False)
+    start_date = Column(Date, nullable=False)
+    income_inr = Column(ARRAY(Float), nullable=False)
+    income_lower_inr = Column(ARRAY(Float), nullable=False)
+    income_upper_inr = Column(ARRAY(Float), nullable=False)
+    expense_inr = Column(ARRAY(Float), nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    user = relationship("User", back_populates="forecast_path")
+
+
 class CashflowPrediction(Base):
     __tablename__ = "cashflow_predictions"
     
@@ -269,15 +317,27 @@ class ModelVersion(Base):
     __tablename__ = "model_versions"
     
     version_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Per-user artifacts from the training pipeline; NULL for global models
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id"))
     model_name = Column(String(100), nullable=False)
     version_number = Column(String(20), nullable=False)
     algorithm = Column(String(50), nullable=False)
     parameters = Column(JSONB)
     training_date = Column(DateTime, nullable=False)
+    # Latest change to the training data: a new created_at or an edit or delete
+    data_watermark = Column(DateTime)
+    artifact_path = Column(String(255))
+    artifact_size_bytes = Column(Integer)
     is_active = Column(Boolean, default=True)
+    is_preferred = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
+    user = relationship("User", back_populates="model_versions")
     metrics = relationship("ModelMetric", back_populates="model_version")
+    
+    __table_args__ = (
+        Index("idx_model_versions_user_model", "user_id", "model_name"),
+    )
 
 
 class ModelMetric(Base):
@@ -0,0 +1,64 @@
+"""
+Prophet serving fast path
+Predicts only the requested future dates and takes the interval from
+in-sample residual quantiles stored at training time, instead of predicting
+over the whole history with per-request uncertainty simulation
+"""
+from typing import Tuple
+import numpy as np
+import pandas as pd
+
+# Attribute of a fitted Prophet model holding the (lower, upper) residual quantiles
+RESIDUAL_INTERVAL_ATTR = 'residual_interval'
+
+
+def _point_forecast(model, df: pd.DataFrame) -> np.ndarray:
+    # The deterministic part of Prophet.predict(): trend and seasonalities
+    trend = np.asarray(model.predict_trend(df), dtype=float)
+    seasonal = model.predict_seasonal_components(df)
+    return (trend * (1 + seasonal['multiplicative_terms'].to_numpy(dtype=float))
+            + seasonal['additive_terms'].to_numpy(dtype=float))
+
+
+def attach_residual_interval(model) -> Tuple[float, float]:
+    """
+    Store the residual quantiles matching the model's interval_width
+    Called after fitting so the quantiles are pickled with the model
+    """
+    history = model.history
+    resid = history['y'].to_numpy(dtype=float) - _point_forecast(model, history)
+    
+    alpha = (1 - model.interval_width) / 2
+    lower, upper = np.quantile(resid, [alpha, 1 - alpha])
+    
+    interval = (float(lower), float(upper))
+    setattr(model, RESIDUAL_INTERVAL_ATTR, interval)
+    return interval
+
+
+def residual_interval(model) -> Tuple[float, float]:
+    """Stored residual quantiles, computed once for models trained before they existed"""
+    interval = getattr(model, RESIDUAL_INTERVAL_ATTR, None)
+    if interval is None:
+        interval = attach_residual_interval(model)
+    return interval
+
+
+def forecast_future(model, days: int) -> pd.DataFrame:
+    """
+    Daily forecast for the `days` days after the training history
+    Same yhat as Prophet.predict(); yhat_lower/yhat_upper offset it by the
+    stored residual quantiles
+    """
+    future = model.make_future_dataframe(periods=days, freq='D', include_history=False)
+    df = model.setup_dataframe(future.copy())
+    
+    yhat = _point_forecast(model, df)
+    lower, upper = residual_interval(model)
+    
+    return pd.DataFrame({
+        'ds': future['ds'].to_numpy(),
+        'yhat': yhat,
+        'yhat_lower': yhat + lower,
+        'yhat_upper': yhat + upper
+    })
@@ -229,10 +229,7 @@ def analyze_manual_data(
         insights = ml_service.generate_insights(user_id)
         
         # Generate predictions
-        predictions = []
-        for days in [7, 30, 60]:
-            pred = ml_service.save_prediction(user_id, days)
-            predictions.append(pred)
+        predictions = ml_service.save_predictions(user_id)
         
         return {
             "status": "success",
@@ -280,7 +277,7 @@ def delete_manual_transaction(
     Delete a manually entered transaction
     """
     transaction = db.query(Transaction).filter(
-        Transaction.txn_id == transaction_id,
+        Transaction.transaction_id == transaction_id,
         Transaction.user_id == current_user.user_id
     ).first()
     
@@ -304,7 +301,7 @@ def update_manual_transaction(
     Update a manually entered transaction
     """
     transaction = db.query(Transaction).filter(
-        Transaction.txn_id == transaction_id,
+        Transaction.transaction_id == transaction_id,
         Transaction.user_id == current_user.user_id
     ).first()
     
@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List
 from app.database import get_db
 from app.models import User, CashflowPrediction
 from app.schemas import CashflowPredictionResponse, SafeToSpendResponse
 from app.auth import get_current_active_user
-from app.ml_service_enhanced import EnhancedMLService
+from app.ml_service_enhanced import EnhancedMLService, DEFAULT_PREDICTION_HORIZONS, MAX_PREDICTION_HORIZON_DAYS
+from app.model_registry import model_registry
 from decimal import Decimal
 
 router = APIRouter()
@@ -13,20 +14,28 @@ router = APIRouter()
 
 @router.post("/generate")
 def generate_predictions(
+    horizons: List[int] = Query(DEFAULT_PREDICTION_HORIZONS),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Generate cashflow predictions for 7, 30, 60 days using pre-trained models"""
+    """
+    Generate cashflow predictions (7, 30, 60 days by default) using pre-trained models
+    Every window comes from one forecast of the longest
+    """
+    if any(days < 1 or days > MAX_PREDICTION_HORIZON_DAYS for days in horizons):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Horizons must be between 1 and {MAX_PREDICTION_HORIZON_DAYS} days"
+        )
+    
     ml_service = EnhancedMLService(db)
     
-    predictions = []
-    for days in [7, 30, 60]:
-        pred = ml_service.save_prediction(str(current_user.user_id), days)
-        predictions.append(pred)
+    predictions = ml_service.save_predictions(str(current_user.user_id), horizons)
     
     return {
         "status": "success",
-        "predictions_generated": len(predictions)
+        "predictions_generated": len(predictions),
+        "horizons": [prediction.prediction_window_days for prediction in predictions]
     }
 
 
@@ -66,6 +75,26 @@ def get_safe_to_spend(
     )
 
 
+@router.get("/expenses")
+def get_expense_forecast(
+    days: int = Query(30, ge=1, le=90),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Expense forecast with per-weekday and per-category breakdowns"""
+    ml_service = EnhancedMLService(db)
+    
+    forecast = ml_service.forecast_expenses(str(current_user.user_id), days)
+    
+    return {
+        "days": days,
+        "expected_outflow_inr": round(forecast['total'], 2),
+        "daily_average_inr": round(forecast['daily_average'], 2),
+        "by_weekday_inr": {day: round(amount, 2) for day, amount in forecast['by_weekday'].items()},
+        "by_category_inr": {category: round(amount, 2) for category, amount in forecast['by_category'].items()}
+    }
+
+
 @router.get("/model-info")
 def get_model_info(
     current_user: User = Depends(get_current_active_user),
@@ -77,3 +106,11 @@ def get_model_info(
     model_info = ml_service.get_model_info(str(current_user.user_id))
     
     return model_info
+
+
+@router.get("/model-cache")
+def get_model_cache_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    """Hit, miss and eviction counters of the in-process model cache"""
+    return model_registry.stats()
@@ -121,14 +121,15 @@ def get_transactions(
 
 @router.post("/sync")
 def sync_transactions(
+    full_rebuild: bool = Query(False),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Trigger ML feature extraction and analysis using enhanced ML service"""
     ml_service = EnhancedMLService(db)
     
-    # Extract features
-    ml_service.extract_features(str(current_user.user_id))
+    # Extract features (incremental unless a full rebuild is requested)
+    ml_service.extract_features(str(current_user.user_id), full_rebuild=full_rebuild)
     
     # Update income sources
     ml_service.update_income_sources(str(current_user.user_id))
@@ -0,0 +1,235 @@
+"""
+Request-scoped user timeline
+Loads a user's transactions once per database session and serves every
+ML stage (features, income sources, predictions, smoothing) from memory
+"""
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import List, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import event, select, cast, Float, String
+from sqlalchemy.orm import Session
+from app.models import Transaction, TransactionType, MerchantCategory
+from app.daily_cashflow import load_daily_cashflow
+
+TRANSACTION_FRAME_COLUMNS = ['timestamp', 'amount', 'type', 'is_income', 'category', 'balance']
+
+# Widest window any ML stage asks for (6 months); loaded up front so the
+# narrower windows of the same request are slices, not new queries
+DEFAULT_WINDOW_DAYS = 180
+
+# Bound on timelines kept per session, for long-lived script sessions
+MAX_TIMELINES_PER_SESSION = 8
+
+_TIMELINES_KEY = 'user_timelines'
+_GENERATION_KEY = 'transaction_generation'
+
+# Enum columns are stored by name; map them back to the API values
+_TXN_TYPE_VALUES = {member.name: member.value for member in TransactionType}
+_CATEGORY_VALUES = {member.name: member.value for member in MerchantCategory}
+
+
+_FRAME_SELECT = (
+    Transaction.txn_timestamp,
+    cast(Transaction.amount_inr, Float),
+    cast(Transaction.txn_type, String),
+    Transaction.is_income,
+    cast(Transaction.merchant_category, String),
+    cast(Transaction.balance_after_txn, Float)
+)
+
+
+def _to_frame(rows, columns) -> pd.DataFrame:
+    df = pd.DataFrame.from_records(rows, columns=columns)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df['type'] = df['type'].map(_TXN_TYPE_VALUES)
+    df['category'] = df['category'].map(_CATEGORY_VALUES)
+    return df
+
+
+def load_transaction_frame(db: Session, user_id: str, since: datetime) -> pd.DataFrame:
+    """
+    Load a user's transactions since a cutoff as a columnar DataFrame
+    Selects only the ML columns with SQLAlchemy Core, so no ORM objects,
+    Decimals or enum members are built per row
+    """
+    stmt = select(*_FRAME_SELECT).where(
+        Transaction.user_id == user_id,
+        Transaction.txn_timestamp >= since
+    ).order_by(Transaction.txn_timestamp)
+    
+    rows = db.execute(stmt).all()
+    
+    if not rows:
+        return pd.DataFrame()
+    
+    return _to_frame(rows, TRANSACTION_FRAME_COLUMNS)
+
+
+def load_transaction_frames(db: Session, user_ids: List[str], since: datetime) -> pd.DataFrame:
+    """
+    Transactions of several users since a cutoff in one query
+    Same columns as load_transaction_frame plus a string 'user_id'
+    """
+    stmt = select(cast(Transaction.user_id, String), *_FRAME_SELECT).where(
+        Transaction.user_id.in_(user_ids),
+        Transaction.txn_timestamp >= since
+    ).order_by(Transaction.user_id, Transaction.txn_timestamp)
+    
+    rows = db.execute(stmt).all()
+    
+    if not rows:
+        return pd.DataFrame(columns=['user_id'] + TRANSACTION_FRAME_COLUMNS)
+    
+    return _to_frame(rows, ['user_id'] + TRANSACTION_FRAME_COLUMNS)
+
+
+def iqr_mask(amounts: np.ndarray, k: float = 3.0) -> np.ndarray:
+    """Boolean mask keeping amounts within k * IQR of the quartiles"""
+    q1, q3 = np.percentile(amounts, [25, 75])
+    iqr = q3 - q1
+    return (amounts >= q1 - k * iqr) & (amounts <= q3 + k * iqr)
+
+
+def iqr_mask_by_user(df: pd.DataFrame, k: float = 3.0) -> np.ndarray:
+    """iqr_mask applied to each user's amounts separately"""
+    quartiles = df.groupby('user_id')['amount'].quantile([0.25, 0.75]).unstack()
+    q1 = df['user_id'].map(quartiles[0.25]).to_numpy()
+    q3 = df['user_id'].map(quartiles[0.75]).to_numpy()
+    amounts = df['amount'].to_numpy()
+    iqr = q3 - q1
+    return (amounts >= q1 - k * iqr) & (amounts <= q3 + k * iqr)
+
+
+def transaction_generation(db: Session) -> int:
+    """Session-local data watermark, bumped whenever transactions are written"""
+    return db.info.get(_GENERATION_KEY, 0)
+
+
+def _bump_generation(session: Session) -> None:
+    session.info[_GENERATION_KEY] = session.info.get(_GENERATION_KEY, 0) + 1
+
+
+@event.listens_for(Session, 'after_flush')
+def _transactions_flushed(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Transaction):
+            _bump_generation(session)
+            return
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _transactions_bulk_written(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    if any(mapper.class_ is Transaction for mapper in orm_execute_state.all_mappers):
+        _bump_generation(orm_execute_state.session)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _transactions_rolled_back(session):
+    _bump_generation(session)
+
+
+class UserTimeline:
+    """
+    Memoized view over one user's transactions for the lifetime of a session
+    Frames are cached by (window, data watermark), so a request that writes
+    transactions and then re-analyzes sees its own writes
+    """
+    
+    def __init__(self, db: Session, user_id: str):
+        self.db = db
+        self.user_id = str(user_id)
+        self._anchor = None
+        self._raw = pd.DataFrame()
+        self._raw_days = 0
+        self._raw_watermark = None
+        self._cache = {}
+    
+    @property
+    def watermark(self) -> int:
+        return transaction_generation(self.db)
+    
+    def _ensure_loaded(self, days: int) -> None:
+        watermark = self.watermark
+        if self._raw_watermark == watermark and days <= self._raw_days:
+            return
+        
+        if self._raw_watermark != watermark:
+            self._anchor = datetime.utcnow()
+            self._cache.clear()
+        
+        days = max(days, self._raw_days, DEFAULT_WINDOW_DAYS)
+        self._raw = load_transaction_frame(self.db, self.user_id, self._anchor - timedelta(days=days))
+        self._raw_days = days
+        self._raw_watermark = watermark
+    
+    def raw(self, days: int) -> pd.DataFrame:
+        """All transactions in the last `days` days, without outlier filtering"""
+        self._ensure_loaded(days)
+        key = ('raw', days, self._raw_watermark)
+        
+        if key not in self._cache:
+            df = self._raw
+            if not df.empty:
+                df = df[df['timestamp'] >= self._anchor - timedelta(days=days)]
+            self._cache[key] = df
+        
+        return self._cache[key]
+    
+    def frame(self, months: int = 6) -> pd.DataFrame:
+        """Outlier-filtered transactions for the last `months` months"""
+        df = self.raw(months * 30)
+        key = ('frame', months, self._raw_watermark)
+        
+        if key not in self._cache:
+            if not df.empty:
+                # Remove extreme outliers using IQR
+                df = df[iqr_mask(df['amount'].to_numpy())]
+            self._cache[key] = df
+        
+        return self._cache[key]
+    
+    def cashflow(self, days: int) -> pd.DataFrame:
+        """Daily rollup rows for the last `days` days (see app.daily_cashflow)"""
+        key = ('cashflow', days, self.watermark)
+        
+        if key not in self._cache:
+            since = (datetime.utcnow() - timedelta(days=days)).date()
+            self._cache[key] = load_daily_cashflow(self.db, self.user_id, since)
+        
+        return self._cache[key]
+    
+    def transaction_count(self, months: int = 6) -> int:
+        """Number of transactions in the last `months` months, from the rollup"""
+        cashflow = self.cashflow(months * 30)
+        return int(cashflow['income_count'].sum() + cashflow['expense_count'].sum())
+    
+    def daily_totals(self, months: int = 6) -> Tuple[pd.Series, pd.Series]:
+        """
+        Daily income and expense sums (days with activity only)
+        Read from the daily_cashflow rollup, so no transactions are scanned
+        """
+        cashflow = self.cashflow(months * 30)
+        return (
+            cashflow.loc[cashflow['income_count'] > 0, 'income_inr'],
+            cashflow.loc[cashflow['expense_count'] > 0, 'expense_inr']
+        )
+
+def get_timeline(db: Session, user_id: str) -> UserTimeline:
+    """Return the session's timeline for a user, creating it on first use"""
+    timelines = db.info.setdefault(_TIMELINES_KEY, OrderedDict())
+    user_id = str(user_id)
+    
+    timeline = timelines.get(user_id)
+    if timeline is None:
+        timeline = UserTimeline(db, user_id)
+        timelines[user_id] = timeline
+        while len(timelines) > MAX_TIMELINES_PER_SESSION:
+            timelines.popitem(last=False)
+    else:
+        timelines.move_to_end(user_id)
+    
+    return timeline
@@ -0,0 +1,124 @@
+"""
+Bulk training data preparation
+Builds dense (zero-filled) daily income series for many users from one
+daily_cashflow query and stores them column-wise as .npy files, which
+training workers memory-map instead of receiving pickled DataFrames
+"""
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Iterable, List
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, cast, Float
+from sqlalchemy.orm import Session
+from app.models import DailyCashflow
+
+# A series needs this many income transactions to be written
+MIN_INCOME_TRANSACTIONS = 30
+
+SERIES_FILES = ['user_ids', 'start_dates', 'offsets', 'income']
+
+
+def write_training_series(db: Session, path: Path, user_ids: Iterable[str],
+                          min_income_transactions: int = MIN_INCOME_TRANSACTIONS) -> int:
+    """
+    Write the users' daily income series to the directory at path
+    Each series runs from the user's first to last income day; users with
+    fewer than min_income_transactions income transactions are left out.
+    Returns the number of series written.
+    """
+    user_ids = [str(user_id) for user_id in user_ids]
+    rows = db.execute(
+        select(
+            DailyCashflow.user_id,
+            DailyCashflow.cashflow_date,
+            cast(DailyCashflow.income_inr, Float),
+            DailyCashflow.income_count
+        ).where(
+            DailyCashflow.user_id.in_(user_ids),
+            DailyCashflow.income_count > 0
+        ).order_by(DailyCashflow.user_id, DailyCashflow.cashflow_date)
+    ).all()
+    
+    df = pd.DataFrame.from_records(rows, columns=['user_id', 'date', 'income_inr', 'income_count'])
+    df['user_id'] = df['user_id'].astype(str)
+    
+    counts = df.groupby('user_id', sort=False)['income_count'].transform('sum')
+    df = df[counts >= min_income_transactions]
+    
+    users, first_rows = np.unique(df['user_id'].to_numpy(), return_index=True)
+    order = np.argsort(first_rows)
+    users, first_rows = users[order], first_rows[order]
+    
+    days = df['date'].to_numpy(dtype='datetime64[D]').astype(np.int64)
+    user_index = np.repeat(np.arange(len(users)), np.diff(np.append(first_rows, len(df))))
+    
+    # Rows are sorted by user then date, so each user's first and last rows bound the series
+    starts = days[first_rows] if len(df) else np.empty(0, dtype=np.int64)
+    ends = days[np.append(first_rows[1:], len(df)) - 1] if len(df) else np.empty(0, dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(ends - starts + 1)]).astype(np.int64)
+    
+    income = np.zeros(offsets[-1])
+    income[offsets[user_index] + days - starts[user_index]] = df['income_inr'].to_numpy()
+    
+    write_series_columns(path, {
+        'user_ids': users.astype('U36'),
+        'start_dates': starts.astype('datetime64[D]'),
+        'offsets': offsets,
+        'income': income
+    })
+    
+    return len(users)
+
+
+def write_series_columns(path: Path, columns: Dict[str, np.ndarray]) -> None:
+    """Write SERIES_FILES arrays to the directory at path, replacing it atomically"""
+    # Build next to the destination and swap in, so readers never see a partial write
+    path = Path(path)
+    partial = path.with_name(f"{path.name}.partial")
+    shutil.rmtree(partial, ignore_errors=True)
+    partial.mkdir(parents=True)
+    for name in SERIES_FILES:
+        np.save(partial / f"{name}.npy", columns[name])
+    
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(partial, path)
+
+
+class TrainingSeries:
+    """Memory-mapped reader for a directory written by write_training_series"""
+    
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.user_ids = np.load(self.path / "user_ids.npy")
+        self.start_dates = np.load(self.path / "start_dates.npy")
+        self.offsets = np.load(self.path / "offsets.npy")
+        self.income = np.load(self.path / "income.npy", mmap_mode='r')
+        self._index = {user_id: i for i, user_id in enumerate(self.user_ids.tolist())}
+    
+    def __len__(self) -> int:
+        return len(self._index)
+    
+    def __contains__(self, user_id) -> bool:
+        return str(user_id) in self._index
+    
+    def users(self) -> List[str]:
+        return list(self._index)
+    
+    def values(self, user_id: str) -> np.ndarray:
+        """A user's daily income, a read-only view into the mapped file"""
+        i = self._index[str(user_id)]
+        return self.income[self.offsets[i]:self.offsets[i + 1]]
+    
+    def start_date(self, user_id: str) -> np.datetime64:
+        """Date of a user's first day"""
+        return self.start_dates[self._index[str(user_id)]]
+    
+    def frame(self, user_id: str) -> pd.DataFrame:
+        """A user's series as the ds/y frame the trainers expect"""
+        values = self.values(user_id)
+        return pd.DataFrame({
+            'ds': pd.date_range(self.start_date(user_id), periods=len(values), freq='D'),
+            'y': np.array(values)
+        })
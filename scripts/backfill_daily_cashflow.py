@@ -0,0 +1,38 @@
+"""
+Backfill the daily_cashflow rollup
+Rebuilds every user's rows from the transactions table. Run once after
+creating the table, and after bulk loads that bypass the ORM.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+from app.database import SessionLocal
+from app.daily_cashflow import rebuild_daily_cashflow
+
+
+def main():
+    print("=" * 80)
+    print("DAILY CASHFLOW BACKFILL")
+    print("=" * 80)
+    print()
+    
+    db = SessionLocal()
+    
+    try:
+        start = time.perf_counter()
+        rows = rebuild_daily_cashflow(db)
+        db.commit()
+        
+        print(f"✓ Wrote {rows:,} daily cashflow rows in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        db.rollback()
+        print(f"✗ Backfill failed: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
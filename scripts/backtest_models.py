@@ -0,0 +1,326 @@
+"""
+Rolling-origin Backtesting
+Refits every model type at several forecast origins of every user's series
+and scores the held-out days. Per-user fits run in a process pool over the
+memory-mapped training series, use the train_models trainers and are
+forecast through the serving path builders, so the scores are those of the
+served paths. The global model is retrained once per fold on every series
+cut at that fold's origin and forecasts all users in one pass. Metrics are
+computed for all rows at once and written to a columnar .npz file; plotting
+is a separate step (scripts/plot_backtest.py).
+
+Usage: python scripts/backtest_models.py [--workers N] [--horizon DAYS] [--folds N] [--step DAYS]
+                                         [--models arima,fourier,...] [--output PATH]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import multiprocessing
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import numpy as np
+from sqlalchemy import select, distinct
+
+from app.database import SessionLocal
+from app.models import DailyCashflow
+from app.ml_service_enhanced import EnhancedMLService
+from app.model_registry import load_model_artifact
+from app.training_data import write_training_series, write_series_columns, TrainingSeries
+from app.forecast_store import FORECAST_PATH_DAYS
+from app.global_model import (
+    HISTORY_DAYS, train_global_model, load_profile_history, profiles_as_of, day_number
+)
+from app.backtest import (
+    rolling_origins, forecast_metrics, write_backtest_results, load_backtest_results, summarize_backtest
+)
+from scripts.train_models import MODELS_DIR, MODEL_TYPES, DEFAULT_MODEL_TIMEOUT_SECONDS, fit_model
+
+BACKTEST_DATA_PATH = MODELS_DIR / "backtest_data"
+RESULTS_PATH = MODELS_DIR / "backtest_results.npz"
+
+DEFAULT_HORIZON_DAYS = 30
+DEFAULT_FOLDS = 3
+
+# The trainers need 60 days
+MIN_TRAIN_DAYS = 60
+
+# Per-user model types plus the shared global model
+BACKTEST_MODEL_TYPES = MODEL_TYPES + ['global']
+
+
+class BacktestService(EnhancedMLService):
+    """Serving path builders over a fold's fresh artifacts, without a database or the registry cache"""
+    
+    def __init__(self):
+        super().__init__(None)
+    
+    def load_pretrained_model(self, user_id, model_type, model_path=None):
+        return load_model_artifact(model_path)
+
+
+def backtest_model(frame, user_id, model_type, origins, horizon, timeout_seconds):
+    """
+    Fit one model at each origin of a user's ds/y frame and forecast the next `horizon` days
+    Returns a row per origin with the daily path, or None and the reason if it failed
+    """
+    service = BacktestService()
+    predict_path = getattr(service, f"pretrained_{model_type}_path")
+    rows = []
+    
+    for origin in origins:
+        # Fold artifacts are only needed until their forecast is made
+        with tempfile.TemporaryDirectory() as tmp:
+            fit = fit_model(model_type, frame.iloc[:origin], user_id, timeout_seconds, Path(tmp))
+            path = predict_path(user_id, horizon, Path(fit['result']['model_path'])) if fit['result'] else None
+        
+        rows.append({
+            'origin': origin,
+            'fit_seconds': fit['seconds'],
+            'error': fit['error'] or ('' if path is not None else 'prediction failed'),
+            'path': path
+        })
+    
+    return rows
+
+
+def failed_rows(origins, error):
+    """Rows without a path for every origin of a task that raised"""
+    reason = f"{type(error).__name__}: {str(error)[:200]}"
+    return [{'origin': origin, 'fit_seconds': np.nan, 'error': reason, 'path': None} for origin in origins]
+
+
+_worker_series = {}
+
+
+def backtest_series_model(series_path, user_id, model_type, origins, horizon, timeout_seconds):
+    """Pool task: backtest one model on a user's series from the memory-mapped data"""
+    series = _worker_series.get(series_path)
+    if series is None:
+        series = _worker_series[series_path] = TrainingSeries(series_path)
+    return backtest_model(series.frame(user_id), user_id, model_type, origins, horizon, timeout_seconds)
+
+
+def run_backtests(series_path, tasks, horizon, workers, timeout_seconds):
+    """
+    Yield (user_id, model_type, rows) for each (user_id, model_type, origins) task as it finishes
+    workers=0 runs every task in this process.
+    A task that raises (or dies with its worker) yields failed rows, so one
+    bad fit does not lose the rest of the run
+    """
+    if workers <= 0:
+        for user_id, model_type, origins in tasks:
+            try:
+                rows = backtest_series_model(str(series_path), user_id, model_type, origins, horizon, timeout_seconds)
+            except Exception as e:
+                rows = failed_rows(origins, e)
+            yield user_id, model_type, rows
+        return
+    
+    # Spawned workers do not inherit the parent's database connections
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        futures = {
+            executor.submit(backtest_series_model, str(series_path), user_id, model_type, origins,
+                            horizon, timeout_seconds): (user_id, model_type, origins)
+            for user_id, model_type, origins in tasks
+        }
+        for future in as_completed(futures):
+            user_id, model_type, origins = futures[future]
+            try:
+                rows = future.result()
+            except Exception as e:
+                # Includes a ModelTimeout that fired as a fit returned and BrokenProcessPool
+                rows = failed_rows(origins, e)
+            yield user_id, model_type, rows
+    finally:
+        # On interruption, drop queued tasks rather than finishing them
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def backtest_global(series, tasks, horizon, profiles, max_iter=200):
+    """
+    (user_id, 'global', rows) for the shared model at the per-user origins
+    For each fold one model is trained on every task's series cut at its
+    origin for that fold, as scripts/train_global_model.py would have seen
+    it, then forecasts all of those users from their last training day.
+    The fold's training time is shared out over its users.
+    """
+    origins = {user_id: user_origins for user_id, _, user_origins in tasks}
+    rows = {user_id: [] for user_id in origins}
+    
+    for fold in range(max((len(user_origins) for user_origins in origins.values()), default=0)):
+        users = [user_id for user_id, user_origins in origins.items() if fold < len(user_origins)]
+        ends = [origins[user_id][fold] for user_id in users]
+        truncated = [np.array(series.values(user_id)[:end]) for user_id, end in zip(users, ends)]
+        
+        start = time.perf_counter()
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                write_series_columns(Path(tmp) / "series", {
+                    'user_ids': np.array(users, dtype='U36'),
+                    'start_dates': np.array([series.start_date(user_id) for user_id in users], dtype='datetime64[D]'),
+                    'offsets': np.concatenate([[0], np.cumsum([len(values) for values in truncated])]).astype(np.int64),
+                    'income': np.concatenate(truncated)
+                })
+                model = train_global_model(TrainingSeries(Path(tmp) / "series"), profiles,
+                                           max_horizon=FORECAST_PATH_DAYS, max_iter=max_iter)
+            
+            history = np.full((len(users), HISTORY_DAYS), np.nan)
+            for i, values in enumerate(truncated):
+                recent = values[-HISTORY_DAYS:]
+                history[i, HISTORY_DAYS - len(recent):] = recent
+            origin_days = np.array([
+                day_number(series.start_date(user_id) + end - 1) for user_id, end in zip(users, ends)
+            ])
+            paths = model.predict_paths(history, profiles_as_of(profiles, users, origin_days), origin_days, horizon)
+            fold_rows = [
+                {'path': {name: values[i] for name, values in paths.items()}, 'error': ''}
+                for i in range(len(users))
+            ]
+        except Exception as e:
+            fold_rows = [{'path': None, 'error': f"{type(e).__name__}: {str(e)[:200]}"}] * len(users)
+        
+        seconds = (time.perf_counter() - start) / len(users)
+        for user_id, end, row in zip(users, ends, fold_rows):
+            rows[user_id].append({'origin': end, 'fit_seconds': seconds, **row})
+    
+    return [(user_id, 'global', user_rows) for user_id, user_rows in rows.items()]
+
+
+def backtest_tasks(series, model_types, horizon, folds, step, min_train_days=MIN_TRAIN_DAYS):
+    """(user_id, model_type, origins) for every user with at least one origin"""
+    tasks = []
+    for user_id in series.users():
+        origins = rolling_origins(len(series.values(user_id)), horizon, folds, step, min_train_days)
+        if origins:
+            tasks.extend((user_id, model_type, origins) for model_type in model_types)
+    return tasks
+
+
+def collect_results(series, finished, horizon):
+    """
+    Columnar results from (user_id, model_type, rows) tuples
+    Actual and forecast paths are stacked into [rows, horizon] matrices
+    (NaN paths for failed fits) and scored in one vectorized pass
+    """
+    user_ids, model_types, origins, train_days, fit_seconds, errors = [], [], [], [], [], []
+    paths = {name: [] for name in ['actual', 'forecast', 'lower', 'upper']}
+    missing = np.full(horizon, np.nan)
+    
+    for user_id, model_type, rows in finished:
+        values = series.values(user_id)
+        start = series.start_date(user_id)
+        for row in rows:
+            user_ids.append(user_id)
+            model_types.append(model_type)
+            origins.append(start + row['origin'])
+            train_days.append(row['origin'])
+            fit_seconds.append(row['fit_seconds'])
+            errors.append(row['error'][:200])
+            paths['actual'].append(values[row['origin']:row['origin'] + horizon])
+            for name in ['forecast', 'lower', 'upper']:
+                paths[name].append(row['path'][name] if row['path'] is not None else missing)
+    
+    columns = {name: np.array(rows, dtype=float).reshape(-1, horizon) for name, rows in paths.items()}
+    columns.update(forecast_metrics(columns['actual'], columns['forecast'], columns['lower'], columns['upper']))
+    columns.update({
+        'user_id': np.array(user_ids, dtype='U36'),
+        'model_type': np.array(model_types, dtype='U16'),
+        'origin': np.array(origins, dtype='datetime64[D]'),
+        'train_days': np.array(train_days, dtype=np.int64),
+        'fit_seconds': np.array(fit_seconds, dtype=float),
+        'error': np.array(errors, dtype='U200')
+    })
+    return columns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of every model type")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="backtest processes (0 runs in this process)")
+    parser.add_argument('--horizon', type=int, default=DEFAULT_HORIZON_DAYS,
+                        help="held-out days after each origin")
+    parser.add_argument('--folds', type=int, default=DEFAULT_FOLDS,
+                        help="origins per series, latest first")
+    parser.add_argument('--step', type=int, default=DEFAULT_HORIZON_DAYS,
+                        help="days between origins")
+    parser.add_argument('--models', default=','.join(BACKTEST_MODEL_TYPES),
+                        help="comma-separated model types")
+    parser.add_argument('--model-timeout', type=float, default=DEFAULT_MODEL_TIMEOUT_SECONDS,
+                        help="seconds allowed for a single model fit")
+    parser.add_argument('--output', type=Path, default=RESULTS_PATH,
+                        help="results file (.npz)")
+    args = parser.parse_args()
+    
+    model_types = [model_type for model_type in args.models.split(',') if model_type]
+    unknown = sorted(set(model_types) - set(BACKTEST_MODEL_TYPES))
+    if unknown:
+        parser.error(f"unknown model types: {', '.join(unknown)}")
+    
+    print("=" * 80)
+    print("ROLLING-ORIGIN BACKTEST")
+    print("=" * 80)
+    print()
+    
+    db = SessionLocal()
+    
+    try:
+        user_ids = db.execute(
+            select(distinct(DailyCashflow.user_id)).where(DailyCashflow.income_count > 0)
+        ).scalars().all()
+        write_training_series(db, BACKTEST_DATA_PATH, user_ids)
+        series = TrainingSeries(BACKTEST_DATA_PATH)
+        profiles = load_profile_history(db, series.users()) if 'global' in model_types else {}
+    finally:
+        db.close()
+    
+    tasks = backtest_tasks(series, model_types, args.horizon, args.folds, args.step)
+    global_tasks = [task for task in tasks if task[1] == 'global']
+    tasks = [task for task in tasks if task[1] != 'global']
+    n_users = len({user_id for user_id, _, _ in tasks + global_tasks})
+    print(f"Series: {len(series)} users, {n_users} long enough for a "
+          f"{MIN_TRAIN_DAYS}+{args.horizon} day fold")
+    print(f"Backtesting {len(tasks) + len(global_tasks)} (user, model) pairs with {args.workers} workers "
+          f"({args.folds} folds, {args.step}-day step)")
+    print()
+    
+    if not tasks and not global_tasks:
+        print("WARNING: No series long enough to backtest")
+        return
+    
+    start = time.perf_counter()
+    finished = []
+    for user_id, model_type, rows in run_backtests(BACKTEST_DATA_PATH, tasks, args.horizon,
+                                                   args.workers, args.model_timeout):
+        finished.append((user_id, model_type, rows))
+        if len(finished) % 100 == 0 or len(finished) == len(tasks):
+            print(f"   [{len(finished)}/{len(tasks)}] {time.perf_counter() - start:.1f}s")
+    
+    if global_tasks:
+        finished.extend(backtest_global(series, global_tasks, args.horizon, profiles))
+        print(f"   Global model: {len(global_tasks)} users, {time.perf_counter() - start:.1f}s")
+    
+    write_backtest_results(args.output, collect_results(series, finished, args.horizon))
+    summary = summarize_backtest(load_backtest_results(args.output))
+    
+    print()
+    print("=" * 80)
+    print("BACKTEST COMPLETE!")
+    print("=" * 80)
+    print()
+    print(f"{'Model':<14} {'Rows':>6} {'Failed':>7} {'MAE':>10} {'RMSE':>10} {'MAPE %':>8} {'Coverage':>9} {'Fit (s)':>9}")
+    print("-" * 80)
+    for model_type, row in summary.iterrows():
+        print(f"{model_type:<14} {int(row['rows']):>6} {int(row['failed']):>7} {row['mae']:>10.2f} {row['rmse']:>10.2f} "
+              f"{row['mape']:>8.1f} {row['coverage']:>9.2f} {row['fit_seconds']:>9.1f}")
+    print()
+    print(f"✓ Results written to: {args.output} ({time.perf_counter() - start:.1f}s)")
+    print("  Plot with: python scripts/plot_backtest.py")
+
+
+if __name__ == "__main__":
+    main()
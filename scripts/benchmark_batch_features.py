@@ -0,0 +1,97 @@
+"""
+Benchmark: per-user ML refresh vs the batch APIs
+Seeds throwaway users and measures users per second for extract_features +
+update_income_sources + generate_insights one user at a time, against
+MLService.analyze_users_batch
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import numpy as np
+
+from app.database import SessionLocal
+from app.models import (
+    User, BankAccount, Transaction, AIFeature, FeatureWatermark, IncomeSource, AIInsight
+)
+from app.ml_service import MLService
+from scripts.benchmark_preprocess import seed_user
+
+USER_COUNTS = [20, 100]
+TRANSACTIONS_PER_USER = 600
+
+
+def reset_outputs(db, user_ids):
+    """Drop everything the refresh writes, so both runs start from scratch"""
+    for model in (AIInsight, IncomeSource, FeatureWatermark, AIFeature):
+        db.query(model).filter(model.user_id.in_(user_ids)).delete(synchronize_session=False)
+    db.commit()
+
+
+def drop_users(db, user_ids):
+    """Remove the throwaway users and their rows"""
+    reset_outputs(db, user_ids)
+    for model in (Transaction, BankAccount):
+        db.query(model).filter(model.user_id.in_(user_ids)).delete(synchronize_session=False)
+    db.query(User).filter(User.user_id.in_(user_ids)).delete(synchronize_session=False)
+    db.commit()
+
+
+def per_user_refresh(db, user_ids):
+    """The previous nightly pattern: every stage queried per user"""
+    ml_service = MLService(db)
+    for user_id in user_ids:
+        ml_service.extract_features(user_id, full_rebuild=True)
+        ml_service.update_income_sources(user_id)
+        ml_service.generate_insights(user_id)
+
+
+def batch_refresh(db, user_ids):
+    MLService(db).analyze_users_batch(user_ids)
+
+
+def timed(fn, db, user_ids):
+    reset_outputs(db, user_ids)
+    # Fresh session so no timeline is cached from a previous run
+    run_db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        fn(run_db, user_ids)
+        return time.perf_counter() - start
+    finally:
+        run_db.close()
+
+
+def main():
+    print("=" * 80)
+    print("BATCH FEATURE REFRESH BENCHMARK")
+    print("=" * 80)
+    print()
+    
+    db = SessionLocal()
+    rng = np.random.default_rng(42)
+    
+    try:
+        print(f"{'Users':>8} {'Per-user (users/s)':>20} {'Batch (users/s)':>17} {'Speedup':>10}")
+        print("-" * 60)
+        
+        for n_users in USER_COUNTS:
+            user_ids = [str(seed_user(db, TRANSACTIONS_PER_USER, rng)) for _ in range(n_users)]
+            
+            try:
+                per_user_time = timed(per_user_refresh, db, user_ids)
+                batch_time = timed(batch_refresh, db, user_ids)
+                
+                print(f"{n_users:>8} {n_users / per_user_time:>20.1f} {n_users / batch_time:>17.1f} "
+                      f"{per_user_time / batch_time:>9.1f}x")
+            finally:
+                drop_users(db, user_ids)
+        
+        print()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
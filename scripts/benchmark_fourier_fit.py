@@ -0,0 +1,72 @@
+"""
+Benchmark: Fourier model fit and forecast time
+Fits FourierForecaster on synthetic 6- to 24-month users, so no database is
+needed. A fit is meant to take milliseconds, cheap enough to run per request.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import numpy as np
+import pandas as pd
+
+from app.data_generator import IndianTransactionGenerator
+from app.fourier_model import FourierForecaster
+
+MONTHS = [6, 12, 24]
+HORIZON_DAYS = 90
+REPEATS = 5
+FIT_BUDGET_MS = 100
+
+
+def daily_income(pattern, months):
+    """Zero-filled daily income of a synthetic user, like train_models"""
+    generator = IndianTransactionGenerator(pattern=pattern)
+    transactions = pd.DataFrame(generator.generate_transactions('user', 'account', months=months))
+    income = transactions[transactions['is_income']]
+    daily = income.groupby(income['txn_timestamp'].dt.normalize())['amount_inr'].sum().astype(float)
+    dates = pd.date_range(daily.index.min(), daily.index.max(), freq='D')
+    return dates, daily.reindex(dates, fill_value=0.0).to_numpy()
+
+
+def best_of(fn, repeats=REPEATS):
+    """Best wall-clock time of several runs, plus the last result"""
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    print("=" * 80)
+    print("FOURIER MODEL BENCHMARK")
+    print("=" * 80)
+    print()
+    
+    print(f"{'Months':>8} {'History days':>14} {'Fit (ms)':>10} {'Forecast (ms)':>14} {'Mean forecast':>14}")
+    print("-" * 64)
+    
+    slowest = 0.0
+    for months in MONTHS:
+        ds, y = daily_income('moderate', months)
+        
+        fit_time, model = best_of(lambda: FourierForecaster.fit(ds, y))
+        forecast_time, forecast = best_of(lambda: model.forecast(HORIZON_DAYS))
+        slowest = max(slowest, fit_time)
+        
+        print(f"{months:>8} {len(y):>14,} {fit_time * 1000:>10.2f} "
+              f"{forecast_time * 1000:>14.3f} {float(np.mean(forecast)):>14,.0f}")
+    
+    print()
+    if slowest * 1000 < FIT_BUDGET_MS:
+        print(f"✓ Every fit under {FIT_BUDGET_MS} ms")
+    else:
+        print(f"✗ Slowest fit {slowest * 1000:.1f} ms exceeds {FIT_BUDGET_MS} ms")
+
+
+if __name__ == "__main__":
+    main()
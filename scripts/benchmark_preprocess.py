@@ -0,0 +1,185 @@
+"""
+Benchmark: columnar transaction loader vs the ORM preprocessing path
+Seeds a throwaway user with 1k / 10k / 100k transactions and times both paths
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import uuid
+import hashlib
+from datetime import datetime, timedelta
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert
+
+from app.database import SessionLocal
+from app.models import (
+    User, BankAccount, Transaction, TransactionType, MerchantCategory
+)
+from app.timeline import load_transaction_frame, iqr_mask
+
+ROW_COUNTS = [1_000, 10_000, 100_000]
+REPEATS = 3
+INSERT_BATCH = 5_000
+
+INCOME_CATEGORIES = [
+    MerchantCategory.FREELANCING, MerchantCategory.PLATFORM_PAYOUT, MerchantCategory.UPI_CREDIT
+]
+EXPENSE_CATEGORIES = [
+    MerchantCategory.RENT, MerchantCategory.FOOD_DELIVERY, MerchantCategory.TRAVEL,
+    MerchantCategory.UTILITIES, MerchantCategory.SHOPPING, MerchantCategory.ENTERTAINMENT
+]
+
+
+def legacy_preprocess(db, user_id, months=6):
+    """The previous ORM-based implementation, kept here as the baseline"""
+    cutoff_date = datetime.utcnow() - timedelta(days=months * 30)
+    
+    transactions = db.query(Transaction).filter(
+        Transaction.user_id == user_id,
+        Transaction.txn_timestamp >= cutoff_date
+    ).order_by(Transaction.txn_timestamp).all()
+    
+    if not transactions:
+        return pd.DataFrame()
+    
+    data = []
+    for txn in transactions:
+        data.append({
+            'timestamp': txn.txn_timestamp,
+            'amount': float(txn.amount_inr),
+            'type': txn.txn_type.value,
+            'is_income': txn.is_income,
+            'category': txn.merchant_category.value,
+            'balance': float(txn.balance_after_txn)
+        })
+    
+    df = pd.DataFrame(data)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df = df.sort_values('timestamp').reset_index(drop=True)
+    
+    Q1 = df['amount'].quantile(0.25)
+    Q3 = df['amount'].quantile(0.75)
+    IQR = Q3 - Q1
+    df = df[(df['amount'] >= Q1 - 3 * IQR) & (df['amount'] <= Q3 + 3 * IQR)]
+    
+    return df
+
+
+def columnar_preprocess(db, user_id, months=6):
+    """The columnar loader and mask behind MLService.preprocess_transactions, uncached"""
+    cutoff_date = datetime.utcnow() - timedelta(days=months * 30)
+    df = load_transaction_frame(db, user_id, cutoff_date)
+    return df[iqr_mask(df['amount'].to_numpy())]
+
+
+def seed_user(db, n_rows, rng):
+    """Create a throwaway user with n_rows synthetic transactions in the last 170 days"""
+    user = User(
+        email=f"bench-{uuid.uuid4().hex[:12]}@example.com",
+        hashed_password="x",
+        full_name="Benchmark User"
+    )
+    db.add(user)
+    db.flush()
+    
+    account = BankAccount(
+        user_id=user.user_id,
+        account_number_encrypted=hashlib.sha256(uuid.uuid4().bytes).hexdigest(),
+        bank_name="Benchmark Bank"
+    )
+    db.add(account)
+    db.commit()
+    
+    now = datetime.utcnow()
+    offsets = np.sort(rng.uniform(0, 170 * 86400, n_rows))
+    is_income = rng.random(n_rows) < 0.2
+    amounts = np.where(is_income, rng.lognormal(8.5, 0.8, n_rows), rng.lognormal(6, 1, n_rows))
+    
+    rows = []
+    for i in range(n_rows):
+        income = bool(is_income[i])
+        categories = INCOME_CATEGORIES if income else EXPENSE_CATEGORIES
+        rows.append({
+            'transaction_id': uuid.uuid4(),
+            'user_id': user.user_id,
+            'account_id': account.account_id,
+            'txn_timestamp': now - timedelta(seconds=float(offsets[i])),
+            'amount_inr': Decimal(f"{amounts[i]:.2f}"),
+            'txn_type': TransactionType.CREDIT if income else TransactionType.DEBIT,
+            'balance_after_txn': Decimal('50000.00'),
+            'description': 'benchmark',
+            'merchant_category': categories[i % len(categories)],
+            'is_income': income,
+            'created_at': now
+        })
+    
+    for i in range(0, n_rows, INSERT_BATCH):
+        db.execute(insert(Transaction), rows[i:i + INSERT_BATCH])
+    db.commit()
+    
+    return user.user_id
+
+
+def drop_user(db, user_id):
+    """Remove the throwaway user and its rows"""
+    db.query(Transaction).filter(Transaction.user_id == user_id).delete()
+    db.query(BankAccount).filter(BankAccount.user_id == user_id).delete()
+    db.query(User).filter(User.user_id == user_id).delete()
+    db.commit()
+
+
+def best_of(fn, repeats=REPEATS):
+    """Best wall-clock time of several runs, plus the last result"""
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    print("=" * 80)
+    print("PREPROCESS BENCHMARK: ORM loop vs columnar loader")
+    print("=" * 80)
+    print()
+    
+    db = SessionLocal()
+    rng = np.random.default_rng(42)
+    
+    try:
+        print(f"{'Rows':>10} {'ORM (s)':>12} {'Columnar (s)':>14} {'Speedup':>10}")
+        print("-" * 50)
+        
+        for n_rows in ROW_COUNTS:
+            seeded_id = seed_user(db, n_rows, rng)
+            user_id = str(seeded_id)
+            
+            try:
+                legacy_time, legacy_df = best_of(lambda: legacy_preprocess(db, user_id))
+                db.expunge_all()
+                columnar_time, columnar_df = best_of(
+                    lambda: columnar_preprocess(db, user_id)
+                )
+                
+                # Both paths must agree on what survives the outlier filter
+                assert len(legacy_df) == len(columnar_df)
+                assert np.allclose(legacy_df['amount'].to_numpy(), columnar_df['amount'].to_numpy())
+                
+                print(f"{n_rows:>10,} {legacy_time:>12.3f} {columnar_time:>14.3f} "
+                      f"{legacy_time / columnar_time:>9.1f}x")
+            finally:
+                drop_user(db, seeded_id)
+        
+        print()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
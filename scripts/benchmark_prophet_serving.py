@@ -0,0 +1,92 @@
+"""
+Benchmark: Prophet serving fast path vs the full-history predict
+Fits Prophet on synthetic 12- and 24-month users, so no database is needed
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import logging
+import numpy as np
+import pandas as pd
+from prophet import Prophet
+
+from app.data_generator import IndianTransactionGenerator
+from app.prophet_serving import attach_residual_interval, forecast_future
+
+MONTHS = [12, 24]
+HORIZON_DAYS = 60
+REPEATS = 5
+
+
+def daily_income(pattern, months):
+    """Zero-filled daily income of a synthetic user, like train_models"""
+    generator = IndianTransactionGenerator(pattern=pattern)
+    transactions = pd.DataFrame(generator.generate_transactions('user', 'account', months=months))
+    income = transactions[transactions['is_income']]
+    daily = income.groupby(income['txn_timestamp'].dt.normalize())['amount_inr'].sum().astype(float)
+    dates = pd.date_range(daily.index.min(), daily.index.max(), freq='D')
+    return pd.DataFrame({'ds': dates, 'y': daily.reindex(dates, fill_value=0.0).to_numpy()})
+
+
+def fit(data):
+    model = Prophet(
+        daily_seasonality=False,
+        weekly_seasonality=True,
+        yearly_seasonality=False,
+        changepoint_prior_scale=0.05,
+        seasonality_prior_scale=0.1,
+        interval_width=0.95
+    )
+    model.fit(data)
+    attach_residual_interval(model)
+    return model
+
+
+def full_predict(model, days):
+    """The previous serving path"""
+    future = model.make_future_dataframe(periods=days, freq='D')
+    return model.predict(future).tail(days)
+
+
+def best_of(fn, repeats=REPEATS):
+    """Best wall-clock time of several runs, plus the last result"""
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    logging.getLogger('cmdstanpy').setLevel(logging.ERROR)
+    logging.getLogger('prophet').setLevel(logging.ERROR)
+    
+    print("=" * 80)
+    print("PROPHET SERVING BENCHMARK")
+    print("=" * 80)
+    print()
+    
+    print(f"{'Months':>8} {'History days':>14} {'Full (ms)':>12} {'Future (ms)':>12} {'Speedup':>10} {'Max |dyhat|':>12}")
+    print("-" * 74)
+    
+    for months in MONTHS:
+        model = fit(daily_income('moderate', months))
+        
+        full_time, expected = best_of(lambda: full_predict(model, HORIZON_DAYS))
+        fast_time, forecast = best_of(lambda: forecast_future(model, HORIZON_DAYS))
+        
+        # The point forecast must not change
+        max_diff = float(np.max(np.abs(forecast['yhat'].to_numpy() - expected['yhat'].to_numpy())))
+        
+        print(f"{months:>8} {len(model.history):>14,} {full_time * 1000:>12.1f} "
+              f"{fast_time * 1000:>12.1f} {full_time / fast_time:>9.1f}x {max_diff:>12.2e}")
+    
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: API startup cost
+Imports app.main in fresh interpreters and reports import time, peak RSS
+and which heavy ML packages were loaded. The eager row pre-imports
+statsmodels and Prophet the way app.ml_service used to.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import subprocess
+import statistics
+
+REPEATS = 5
+
+HEAVY_MODULES = ['statsmodels', 'prophet', 'cmdstanpy', 'matplotlib', 'scipy']
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+{preload}
+import app.main
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    'seconds': elapsed,
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'heavy': [name for name in {heavy!r} if name in sys.modules]
+}}))
+"""
+
+SCENARIOS = [
+    ('lazy (current)', ''),
+    ('eager (previous)', 'from statsmodels.tsa.arima.model import ARIMA; from prophet import Prophet')
+]
+
+
+def probe(preload):
+    """Import app.main in a new interpreter and return its measurements"""
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE.format(preload=preload, heavy=HEAVY_MODULES)],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    print("=" * 80)
+    print("API STARTUP BENCHMARK")
+    print("=" * 80)
+    print()
+    
+    print(f"{'Scenario':<20} {'Import (s)':>12} {'Peak RSS (MB)':>15}  Heavy modules loaded")
+    print("-" * 80)
+    
+    for name, preload in SCENARIOS:
+        runs = [probe(preload) for _ in range(REPEATS)]
+        seconds = statistics.median(run['seconds'] for run in runs)
+        rss_mb = statistics.median(run['rss_mb'] for run in runs)
+        heavy = ', '.join(runs[-1]['heavy']) or '-'
+        
+        print(f"{name:<20} {seconds:>12.2f} {rss_mb:>15.1f}  {heavy}")
+    
+    print()
+
+
+if __name__ == "__main__":
+    main()
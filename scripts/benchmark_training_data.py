@@ -0,0 +1,97 @@
+"""
+Benchmark: per-user vs bulk training data preparation
+Seeds throwaway users, then builds their dense daily income series one
+rollup query per user (the previous train_models path) and with a single
+write_training_series call that memory-mapped workers read
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from app.database import SessionLocal
+from app.models import DailyCashflow
+from app.daily_cashflow import load_daily_cashflow, rebuild_daily_cashflow
+from app.training_data import write_training_series, TrainingSeries
+from scripts.benchmark_preprocess import seed_user, drop_user, best_of
+
+USER_COUNTS = [25, 100]
+ROWS_PER_USER = 600
+
+
+def per_user_prepare(db, user_id):
+    """The previous prepare_time_series_data, kept here as the baseline"""
+    cashflow = load_daily_cashflow(db, user_id)
+    income_days = cashflow[cashflow['income_count'] > 0]
+    
+    if income_days['income_count'].sum() < 30:
+        return None
+    
+    daily_income = pd.DataFrame({
+        'ds': pd.to_datetime(income_days.index),
+        'y': income_days['income_inr'].to_numpy()
+    })
+    date_range = pd.date_range(start=daily_income['ds'].min(), end=daily_income['ds'].max(), freq='D')
+    full_df = pd.DataFrame({'ds': date_range}).merge(daily_income, on='ds', how='left')
+    full_df['y'] = full_df['y'].fillna(0)
+    return full_df
+
+
+def bulk_prepare(db, user_ids, path):
+    """One query for every user, then a reader over the mapped columns"""
+    write_training_series(db, path, user_ids)
+    return TrainingSeries(path)
+
+
+def main():
+    print("=" * 80)
+    print("TRAINING DATA BENCHMARK: per-user queries vs one bulk query")
+    print("=" * 80)
+    print()
+    
+    db = SessionLocal()
+    rng = np.random.default_rng(42)
+    
+    try:
+        print(f"{'Users':>8} {'Per-user (s)':>14} {'Bulk (s)':>10} {'Speedup':>10}")
+        print("-" * 46)
+        
+        for n_users in USER_COUNTS:
+            seeded_ids = [seed_user(db, ROWS_PER_USER, rng) for _ in range(n_users)]
+            user_ids = [str(user_id) for user_id in seeded_ids]
+            rebuild_daily_cashflow(db, user_ids)
+            db.commit()
+            
+            try:
+                with tempfile.TemporaryDirectory() as tmp:
+                    path = Path(tmp) / "training_data"
+                    
+                    per_user_time, frames = best_of(
+                        lambda: {user_id: per_user_prepare(db, user_id) for user_id in user_ids}
+                    )
+                    bulk_time, series = best_of(lambda: bulk_prepare(db, user_ids, path))
+                    
+                    # Both paths must produce the same series
+                    for user_id, frame in frames.items():
+                        assert (frame is None) == (user_id not in series)
+                        if frame is not None:
+                            assert np.allclose(frame['y'].to_numpy(), series.values(user_id))
+                
+                print(f"{n_users:>8} {per_user_time:>14.3f} {bulk_time:>10.3f} "
+                      f"{per_user_time / bulk_time:>9.1f}x")
+            finally:
+                for seeded_id in seeded_ids:
+                    db.query(DailyCashflow).filter(DailyCashflow.user_id == seeded_id).delete()
+                    drop_user(db, seeded_id)
+        
+        print()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 """Clean up test user for testing"""
 from app.database import SessionLocal
-from app.models import User, BankAccount, Transaction, SmoothingBuffer, WeeklyRelease, AIFeature, CashflowPrediction, AIInsight, IncomeSource, UserProfile
+from app.models import User, BankAccount, Transaction, SmoothingBuffer, WeeklyRelease, AIFeature, FeatureWatermark, DailyCashflow, ForecastPath, ModelVersion, ModelMetric, CashflowPrediction, AIInsight, IncomeSource, UserProfile
 from sqlalchemy import delete
 
 db = SessionLocal()
@@ -16,6 +16,14 @@ if user:
     db.query(IncomeSource).filter(IncomeSource.user_id == user_id).delete()
     db.query(CashflowPrediction).filter(CashflowPrediction.user_id == user_id).delete()
     db.query(AIFeature).filter(AIFeature.user_id == user_id).delete()
+    db.query(FeatureWatermark).filter(FeatureWatermark.user_id == user_id).delete()
+    db.query(DailyCashflow).filter(DailyCashflow.user_id == user_id).delete()
+    db.query(ForecastPath).filter(ForecastPath.user_id == user_id).delete()
+    versions = db.query(ModelVersion).filter(ModelVersion.user_id == user_id)
+    db.query(ModelMetric).filter(
+        ModelMetric.version_id.in_(versions.with_entities(ModelVersion.version_id).scalar_subquery())
+    ).delete(synchronize_session=False)
+    versions.delete()
     db.query(SmoothingBuffer).filter(SmoothingBuffer.user_id == user_id).delete()
     db.query(Transaction).filter(Transaction.user_id == user_id).delete()
     db.query(BankAccount).filter(BankAccount.user_id == user_id).delete()
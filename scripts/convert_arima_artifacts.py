@@ -0,0 +1,55 @@
+"""
+Convert pickled ARIMA results to compact .npz artifacts
+Serving prefers the .npz file, so converted pickles are no longer loaded;
+pass --remove-pickles to delete them
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pathlib import Path
+import joblib
+from app.arima_artifact import save_arima_artifact
+
+MODELS_DIR = Path("ml_models")
+
+
+def main():
+    print("=" * 80)
+    print("ARIMA ARTIFACT CONVERSION")
+    print("=" * 80)
+    print()
+    
+    remove_pickles = '--remove-pickles' in sys.argv[1:]
+    pickle_paths = sorted(MODELS_DIR.glob("arima_*.pkl"))
+    
+    if not pickle_paths:
+        print(f"No ARIMA pickles found in {MODELS_DIR.absolute()}")
+        return
+    
+    converted = 0
+    old_bytes = 0
+    new_bytes = 0
+    
+    for pickle_path in pickle_paths:
+        try:
+            compact_path = save_arima_artifact(joblib.load(pickle_path), pickle_path)
+        except Exception as e:
+            print(f"  ✗ {pickle_path.name}: {e}")
+            continue
+        
+        old_bytes += pickle_path.stat().st_size
+        new_bytes += compact_path.stat().st_size
+        converted += 1
+        
+        if remove_pickles:
+            pickle_path.unlink()
+    
+    print(f"✓ Converted {converted}/{len(pickle_paths)} ARIMA models")
+    if converted:
+        print(f"  Size: {old_bytes / 1024:.1f} KB -> {new_bytes / 1024:.1f} KB "
+              f"({old_bytes / max(new_bytes, 1):.0f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
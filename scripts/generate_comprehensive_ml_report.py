@@ -11,7 +11,6 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 from datetime import datetime
-import joblib
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import warnings
 warnings.filterwarnings('ignore')
@@ -20,6 +19,8 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.database import SessionLocal
 from app.models import User, Transaction
+from app.daily_cashflow import load_daily_cashflow
+from app.model_registry import model_artifact_path, load_model_artifact
 
 VIZ_DIR = Path("ml_visualizations")
 VIZ_DIR.mkdir(exist_ok=True)
@@ -35,7 +36,7 @@ def get_all_model_stats():
     }
     
     for model_type in ['arima', 'prophet', 'rolling_mean']:
-        model_files = list(MODELS_DIR.glob(f"{model_type}_*.pkl"))
+        model_files = list(MODELS_DIR.glob(f"{model_type}_*.pkl")) + list(MODELS_DIR.glob(f"{model_type}_*.npz"))
         stats[model_type]['count'] = len(model_files)
         stats[model_type]['sizes'] = [f.stat().st_size / 1024 for f in model_files]  # KB
     
@@ -315,20 +316,17 @@ def create_training_summary_report():
 
 def get_evaluation_data(user_id, db):
     """Get evaluation data for a user"""
-    transactions = db.query(Transaction).filter(
-        Transaction.user_id == user_id,
-        Transaction.is_income == True
-    ).order_by(Transaction.txn_timestamp).all()
+    # Daily income from the rollup (days with income only)
+    cashflow = load_daily_cashflow(db, user_id)
+    income_days = cashflow[cashflow['income_count'] > 0]
     
-    if len(transactions) < 60:
+    if income_days['income_count'].sum() < 60:
         return None
     
-    df = pd.DataFrame([{
-        'date': t.txn_timestamp.date(),
-        'amount': float(t.amount_inr)
-    } for t in transactions])
-    
-    df = df.groupby('date')['amount'].sum().reset_index()
+    df = pd.DataFrame({
+        'date': income_days.index,
+        'amount': income_days['income_inr'].to_numpy()
+    })
     df = df.sort_values('date')
     
     split_idx = int(len(df) * 0.8)
@@ -348,13 +346,13 @@ def evaluate_all_models(user_id, db):
     results = []
     
     for model_type in ['arima', 'prophet', 'rolling_mean']:
-        model_path = MODELS_DIR / f"{model_type}_{user_id}.pkl"
+        model_path = model_artifact_path(MODELS_DIR, model_type, user_id)
         
         if not model_path.exists():
             continue
         
         try:
-            model = joblib.load(model_path)
+            model = load_model_artifact(model_path)
             
             if model_type == 'arima':
                 forecast = model.forecast(steps=len(test_data))
@@ -158,17 +158,14 @@ def create_user_with_data(user_data, user_index, total_users):
         db.commit()
         
         # Run ML analysis
-        print(f"  🧠 Running ML analysis...")
+        print(f"  🧠 Generating predictions...")
         ml_service = MLService(db)
-        ml_service.extract_features(str(user.user_id))
-        ml_service.update_income_sources(str(user.user_id))
         
-        # Generate predictions
+        # Generate predictions (features, income sources and insights are
+        # computed for all users at once after generation)
         for days in [7, 30, 60]:
             ml_service.save_prediction(str(user.user_id), days)
         
-        ml_service.generate_insights(str(user.user_id))
-        
         # Initialize smoothing
         smoothing_service = SmoothingService(db)
         buffer = smoothing_service.initialize_buffer(str(user.user_id))
@@ -181,15 +178,17 @@ def create_user_with_data(user_data, user_index, total_users):
         else:
             deposit_amount = Decimal(str(random.randint(3000, 8000)))
         
+        # The weekly release is created after batch analysis, once the
+        # user's features exist
         smoothing_service.deposit_to_buffer(str(user.user_id), deposit_amount)
-        smoothing_service.create_weekly_release(str(user.user_id))
         
         print(f"  ✅ User created successfully!")
         print(f"     Transactions: {len(transactions)}")
         print(f"     Buffer: ₹{deposit_amount}")
         
+        user_id = str(user.user_id)
         db.close()
-        return True
+        return user_id
         
     except Exception as e:
         print(f"  ❌ Error creating user: {e}")
@@ -221,6 +220,7 @@ def generate_massive_dataset():
     
     successful = 0
     failed = 0
+    created_user_ids = []
     
     with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
         # Submit all tasks
@@ -235,12 +235,31 @@ def generate_massive_dataset():
                 result = future.result()
                 if result:
                     successful += 1
+                    created_user_ids.append(result)
                 else:
                     failed += 1
             except Exception as e:
                 print(f"❌ Task failed with error: {e}")
                 failed += 1
     
+    # ML analysis for all new users, one transactions query per chunk
+    print(f"\n🧠 Running batch ML analysis for {len(created_user_ids)} users...")
+    analysis_start = datetime.now()
+    db = SessionLocal()
+    try:
+        MLService(db).analyze_users_batch(created_user_ids)
+        
+        # Weekly releases read each user's recent AIFeature income
+        smoothing_service = SmoothingService(db)
+        for user_id in created_user_ids:
+            smoothing_service.create_weekly_release(user_id)
+    finally:
+        db.close()
+    analysis_duration = (datetime.now() - analysis_start).total_seconds()
+    if created_user_ids:
+        print(f"  ✅ Analyzed {len(created_user_ids)} users in {analysis_duration:.1f}s "
+              f"({len(created_user_ids) / max(analysis_duration, 1e-9):.1f} users/s)")
+    
     end_time = datetime.now()
     duration = (end_time - start_time).total_seconds()
     
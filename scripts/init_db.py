@@ -7,7 +7,7 @@ from sqlalchemy.exc import ProgrammingError
 from app.database import Base
 from app.models import (
     User, UserProfile, BankAccount, Transaction, IncomeSource,
-    AIFeature, CashflowPrediction, SmoothingBuffer, WeeklyRelease,
+    AIFeature, FeatureWatermark, DailyCashflow, ForecastPath, CashflowPrediction, SmoothingBuffer, WeeklyRelease,
     AIInsight, ModelVersion, ModelMetric, AuditLog
 )
 from app.config import get_settings
@@ -49,12 +49,49 @@ def create_database():
         # Database might already exist, continue
 
 
+def upgrade_tables(engine):
+    """Apply schema changes that create_all cannot make on existing tables"""
+    with engine.begin() as conn:
+        # ai_features: one row per (user_id, week_start_date), enforced by a unique index
+        conn.execute(text("""
+            DELETE FROM ai_features a
+            USING ai_features b
+            WHERE a.user_id = b.user_id
+              AND a.week_start_date = b.week_start_date
+              AND (a.created_at, a.feature_id) < (b.created_at, b.feature_id)
+        """))
+        conn.execute(text("DROP INDEX IF EXISTS idx_ai_features_user_week"))
+        conn.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_ai_features_user_week_unique "
+            "ON ai_features (user_id, week_start_date)"
+        ))
+        # daily_cashflow: expense-only category totals (rerun scripts/backfill_daily_cashflow.py)
+        conn.execute(text(
+            "ALTER TABLE daily_cashflow ADD COLUMN IF NOT EXISTS "
+            "expense_by_category_inr JSONB NOT NULL DEFAULT '{}'"
+        ))
+        # model_versions: per-user model manifest written by scripts/train_models.py
+        conn.execute(text(
+            "ALTER TABLE model_versions "
+            "ADD COLUMN IF NOT EXISTS user_id UUID REFERENCES users (user_id), "
+            "ADD COLUMN IF NOT EXISTS artifact_path VARCHAR(255), "
+            "ADD COLUMN IF NOT EXISTS artifact_size_bytes INTEGER, "
+            "ADD COLUMN IF NOT EXISTS is_preferred BOOLEAN NOT NULL DEFAULT false, "
+            "ADD COLUMN IF NOT EXISTS data_watermark TIMESTAMP"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS idx_model_versions_user_model "
+            "ON model_versions (user_id, model_name)"
+        ))
+
+
 def init_tables():
     """Create all tables"""
     try:
         # Create engine for our database
         engine = create_engine(settings.database_url)
         Base.metadata.create_all(bind=engine)
+        upgrade_tables(engine)
         print("✓ All tables created successfully")
         engine.dispose()
     except Exception as e:
@@ -0,0 +1,108 @@
+"""
+Backtest Plots
+Charts from a scripts/backtest_models.py results file: mean metrics per
+model, error by days ahead, and the spread of per-user MAE and interval
+coverage. Reads only the results file, so it never refits or queries.
+
+Usage: python scripts/plot_backtest.py [--results PATH] [--output-dir DIR]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+from pathlib import Path
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # Use non-interactive backend
+import matplotlib.pyplot as plt
+
+from app.backtest import load_backtest_results, summarize_backtest
+
+RESULTS_PATH = Path("ml_models") / "backtest_results.npz"
+VIZ_DIR = Path("ml_visualizations")
+
+
+def plot_summary(results, output_dir):
+    """Mean MAE, RMSE, MAPE and coverage per model"""
+    summary = summarize_backtest(results)
+    fig, axes = plt.subplots(2, 2, figsize=(15, 10))
+    fig.suptitle('Rolling-origin Backtest by Model', fontsize=16, fontweight='bold')
+    
+    for ax, (metric, label) in zip(axes.ravel(), [
+        ('mae', 'MAE (₹)'), ('rmse', 'RMSE (₹)'), ('mape', 'MAPE (%)'), ('coverage', 'Interval coverage')
+    ]):
+        ax.bar(summary.index, summary[metric], color='#3498db', alpha=0.7, edgecolor='black')
+        ax.set_title(label, fontweight='bold')
+        ax.grid(axis='y', alpha=0.3)
+    
+    plt.tight_layout()
+    plt.savefig(output_dir / 'backtest_summary.png', dpi=150, bbox_inches='tight')
+    plt.close()
+    print("  ✓ Saved: backtest_summary.png")
+
+
+def plot_error_by_horizon(results, output_dir):
+    """Mean absolute error on each day after the origin"""
+    errors = np.abs(results['actual'] - results['forecast'])
+    days = np.arange(1, errors.shape[1] + 1)
+    
+    fig, ax = plt.subplots(figsize=(12, 6))
+    for model_type in np.unique(results['model_type']):
+        rows = (results['model_type'] == model_type) & (results['error'] == '')
+        if rows.any():
+            ax.plot(days, errors[rows].mean(axis=0), label=model_type, linewidth=2)
+    
+    ax.set_title('Absolute Error by Days Ahead', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Days after origin')
+    ax.set_ylabel('Mean absolute error (₹)')
+    ax.legend()
+    ax.grid(alpha=0.3)
+    
+    plt.savefig(output_dir / 'backtest_error_by_horizon.png', dpi=150, bbox_inches='tight')
+    plt.close()
+    print("  ✓ Saved: backtest_error_by_horizon.png")
+
+
+def plot_distributions(results, output_dir):
+    """Per-row MAE and coverage across users and origins"""
+    model_types = list(np.unique(results['model_type']))
+    ok = results['error'] == ''
+    
+    fig, axes = plt.subplots(1, 2, figsize=(15, 6))
+    for ax, metric, label in [(axes[0], 'mae', 'MAE (₹)'), (axes[1], 'coverage', 'Interval coverage')]:
+        values = [results[metric][ok & (results['model_type'] == model_type)] for model_type in model_types]
+        ax.boxplot(values)
+        ax.set_xticks(range(1, len(model_types) + 1), model_types)
+        ax.set_title(f'{label} per User and Origin', fontweight='bold')
+        ax.grid(axis='y', alpha=0.3)
+    
+    plt.tight_layout()
+    plt.savefig(output_dir / 'backtest_distributions.png', dpi=150, bbox_inches='tight')
+    plt.close()
+    print("  ✓ Saved: backtest_distributions.png")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plot backtest results")
+    parser.add_argument('--results', type=Path, default=RESULTS_PATH,
+                        help="results file written by backtest_models.py")
+    parser.add_argument('--output-dir', type=Path, default=VIZ_DIR,
+                        help="directory for the PNG files")
+    args = parser.parse_args()
+    
+    if not args.results.exists():
+        print(f"✗ No results at {args.results}; run scripts/backtest_models.py first")
+        return
+    
+    results = load_backtest_results(args.results)
+    args.output_dir.mkdir(exist_ok=True)
+    
+    print(f"Plotting {len(results['user_id'])} backtest rows from {args.results}")
+    plot_summary(results, args.output_dir)
+    plot_error_by_horizon(results, args.output_dir)
+    plot_distributions(results, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Nightly feature refresh
+Recomputes weekly AI features for every user inside PostgreSQL with one
+INSERT ... SELECT ... ON CONFLICT statement
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+from app.database import SessionLocal
+from app.feature_engine import refresh_weekly_features_sql
+
+
+def main():
+    print("=" * 80)
+    print("NIGHTLY FEATURE REFRESH")
+    print("=" * 80)
+    print()
+    
+    db = SessionLocal()
+    
+    try:
+        start = time.perf_counter()
+        rows = refresh_weekly_features_sql(db)
+        db.commit()
+        
+        print(f"✓ Upserted {rows:,} weekly feature rows in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        db.rollback()
+        print(f"✗ Feature refresh failed: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
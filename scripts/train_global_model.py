@@ -0,0 +1,109 @@
+"""
+Global Model Training
+Trains the gradient-boosting income forecaster shared by every user (see
+app/global_model.py) and records it in model_versions with user_id NULL.
+Serving uses it for users without per-user models, cold-start users included.
+
+Usage: python scripts/train_global_model.py [--origin-stride DAYS] [--max-horizon DAYS]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+from datetime import datetime
+from pathlib import Path
+import joblib
+import numpy as np
+from sqlalchemy import select, distinct
+
+from app.database import SessionLocal
+from app.models import DailyCashflow
+from app.forecast_store import FORECAST_PATH_DAYS
+from app.global_model import (
+    GLOBAL_MODEL_FILENAME, FEATURE_NAMES, build_training_set, train_global_model, load_profile_history
+)
+from app.model_manifest import record_model_version
+from app.training_data import write_training_series, TrainingSeries
+
+MODELS_DIR = Path("ml_models")
+MODELS_DIR.mkdir(exist_ok=True)
+
+GLOBAL_TRAINING_DATA_PATH = MODELS_DIR / "global_training_data"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the global forecasting model")
+    parser.add_argument('--origin-stride', type=int, default=7,
+                        help="days between forecast origins sampled from each series")
+    parser.add_argument('--max-horizon', type=int, default=FORECAST_PATH_DAYS,
+                        help="longest horizon in the training rows")
+    args = parser.parse_args()
+    
+    print("=" * 80)
+    print("GLOBAL MODEL TRAINING")
+    print("=" * 80)
+    print()
+    
+    db = SessionLocal()
+    
+    try:
+        trained_at = datetime.utcnow()
+        
+        # Every user with income, not just those eligible for per-user models
+        user_ids = db.execute(
+            select(distinct(DailyCashflow.user_id)).where(DailyCashflow.income_count > 0)
+        ).scalars().all()
+        write_training_series(db, GLOBAL_TRAINING_DATA_PATH, user_ids)
+        series = TrainingSeries(GLOBAL_TRAINING_DATA_PATH)
+        profiles = load_profile_history(db, series.users())
+        print(f"Series: {len(series)} users, {len(series.income)} days "
+              f"({len(profiles)} with AIFeature profiles)")
+        
+        if len(series) == 0:
+            print("WARNING: No users with enough income data for training")
+            return
+        
+        start = time.perf_counter()
+        model = train_global_model(series, profiles, max_horizon=args.max_horizon,
+                                   origin_stride=args.origin_stride)
+        print(f"✓ Trained in {time.perf_counter() - start:.1f}s")
+        
+        # In-sample error of the mean path, per training row
+        X, y = build_training_set(series, profiles, args.max_horizon, args.origin_stride)
+        train_mae = float(np.mean(np.abs(model.estimators['forecast'].predict(X) - y)))
+        print(f"  Training rows: {len(y):,}, features: {len(FEATURE_NAMES)}")
+        print(f"  Training MAE: Rs.{train_mae:.2f} per day")
+        
+        model_path = MODELS_DIR / GLOBAL_MODEL_FILENAME
+        joblib.dump(model, model_path)
+        
+        version = record_model_version(
+            db, None, 'global', model_path, 'HistGradientBoosting',
+            parameters={
+                'max_horizon': args.max_horizon,
+                'origin_stride': args.origin_stride,
+                'users': len(series),
+                'features': FEATURE_NAMES
+            },
+            metrics={'train_mae': train_mae},
+            training_date=trained_at
+        )
+        db.commit()
+        
+        print(f"✓ Saved {model_path} (v{version.version_number}, "
+              f"{model_path.stat().st_size / 1024:.0f} KB)")
+        print()
+    
+    except Exception as e:
+        db.rollback()
+        print(f"✗ ERROR: {str(e)}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,40 @@
 """
 ML Model Training Pipeline
-Trains ARIMA and Prophet models for all users with sufficient data
+Trains ARIMA, Prophet, Fourier and Rolling Mean models for all users with
+sufficient data. Model fits run in a process pool with a per-model timeout; every
+finished user is appended to a checkpoint, so an interrupted run resumes
+where it stopped. A summary with fit times and failure reasons is written
+to ml_models/training_summary.json.
+
+With --incremental, users without transactions created since their models
+were trained keep those models, and ARIMA and Prophet fits for the others
+start from the previous parameters.
+
+Usage: python scripts/train_models.py [--workers N] [--model-timeout SECONDS] [--fresh] [--incremental]
 """
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.database import SessionLocal
-from app.models import User, Transaction, CashflowPrediction
-from app.ml_service import MLService
+from app.models import User, Transaction, FeatureWatermark
+from app.ml_service_enhanced import EnhancedMLService
+from app.forecast_store import FORECAST_PATH_DAYS, touch_forecast_path
+from app.model_manifest import record_model_version, mark_preferred, load_manifest, training_watermark
+from app.training_data import write_training_series, TrainingSeries
+from app.arima_artifact import save_arima_artifact, load_arima_artifact
+from app.prophet_serving import attach_residual_interval
+from app.fourier_model import FourierForecaster, WEEKLY_FOURIER_ORDER, save_fourier_artifact
 from sqlalchemy import func
-from datetime import datetime, timedelta
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from collections import Counter
+import argparse
+import json
+import multiprocessing
+import signal
+import threading
+import time
 import joblib
 from pathlib import Path
 import pandas as pd
@@ -24,14 +48,35 @@ warnings.filterwarnings('ignore')
 MODELS_DIR = Path("ml_models")
 MODELS_DIR.mkdir(exist_ok=True)
 
+CHECKPOINT_PATH = MODELS_DIR / "training_checkpoint.jsonl"
+SUMMARY_PATH = MODELS_DIR / "training_summary.json"
+TRAINING_DATA_PATH = MODELS_DIR / "training_data"
+
+MODEL_TYPES = ['arima', 'prophet', 'fourier', 'rolling_mean']
+DEFAULT_MODEL_TIMEOUT_SECONDS = 300
+
+
+class ModelTimeout(Exception):
+    """A model fit exceeded its time budget"""
+
+
 def get_users_with_sufficient_data(db, min_transactions=180):
-    """Get users with enough data for training"""
+    """
+    Get users with enough data for training
+    data_watermark is the latest new transaction or, since edits and deletes
+    keep created_at, the latest time the user's features were marked dirty
+    """
     users = db.query(
         User.user_id,
         User.email,
-        func.count(Transaction.transaction_id).label('txn_count')
+        func.count(Transaction.transaction_id).label('txn_count'),
+        func.greatest(
+            func.max(Transaction.created_at), func.max(FeatureWatermark.updated_at)
+        ).label('data_watermark')
     ).join(
         Transaction, User.user_id == Transaction.user_id
+    ).outerjoin(
+        FeatureWatermark, User.user_id == FeatureWatermark.user_id
     ).group_by(
         User.user_id, User.email
     ).having(
@@ -41,206 +86,389 @@ def get_users_with_sufficient_data(db, min_transactions=180):
     return users
 
 
-def prepare_time_series_data(db, user_id):
-    """Prepare time series data for training"""
-    # Get all transactions
-    transactions = db.query(Transaction).filter(
-        Transaction.user_id == user_id,
-        Transaction.is_income == True
-    ).order_by(Transaction.txn_timestamp).all()
-    
-    if len(transactions) < 30:
-        return None
-    
-    # Create daily income series
-    df = pd.DataFrame([{
-        'date': txn.txn_timestamp.date(),
-        'amount': float(txn.amount_inr)
-    } for txn in transactions])
-    
-    # Group by date and sum
-    daily_income = df.groupby('date')['amount'].sum().reset_index()
-    daily_income.columns = ['ds', 'y']
-    daily_income['ds'] = pd.to_datetime(daily_income['ds'])
-    
-    # Fill missing dates with 0
-    date_range = pd.date_range(
-        start=daily_income['ds'].min(),
-        end=daily_income['ds'].max(),
-        freq='D'
-    )
+def train_arima_model(data, user_id, models_dir=MODELS_DIR, warm_start=None):
+    """Train ARIMA model for a user, optionally starting from a previous artifact's parameters"""
+    # Use only the income values
+    y = data['y'].values
     
-    full_df = pd.DataFrame({'ds': date_range})
-    full_df = full_df.merge(daily_income, on='ds', how='left')
-    full_df['y'] = full_df['y'].fillna(0)
+    if len(y) < 60:
+        raise ValueError("Insufficient data for ARIMA (need 60+ days)")
     
-    return full_df
+    # Fit ARIMA model with simpler order to avoid issues
+    # Using (3,1,2) which is more stable than (5,1,0)
+    model = ARIMA(y, order=(3, 1, 2))
+    
+    # A few new days barely move the optimum, so the previous parameters
+    # are a close starting point and the optimizer needs fewer iterations
+    start_params = None
+    if warm_start is not None:
+        previous = load_arima_artifact(warm_start)
+        if previous.order == model.order:
+            start_params = previous.params
+    
+    fitted_model = model.fit(start_params=start_params)
+    
+    # Save the compact forecasting artifact (not the full results pickle)
+    model_path = save_arima_artifact(fitted_model, models_dir / f"arima_{user_id}")
+    (models_dir / f"arima_{user_id}.pkl").unlink(missing_ok=True)
+    
+    # Calculate metrics using in-sample predictions
+    # Get predictions for the entire series
+    predictions = fitted_model.predict(start=1, end=len(y)-1)
+    actual = y[1:]  # Skip first value due to differencing
+    
+    # Ensure same length
+    min_len = min(len(predictions), len(actual))
+    predictions = predictions[:min_len]
+    actual = actual[:min_len]
+    
+    mae = np.mean(np.abs(predictions - actual))
+    
+    return {
+        'model_type': 'ARIMA',
+        'mae': float(mae),
+        'model_path': str(model_path),
+        'params': '(3,1,2)',
+        'warm_start': start_params is not None
+    }
+
 
+def prophet_warm_start(model):
+    """Previous Prophet fit's parameters in the form Prophet.fit(init=...) expects"""
+    init = {}
+    for name in ['k', 'm', 'sigma_obs']:
+        init[name] = model.params[name][0][0]
+    for name in ['delta', 'beta']:
+        init[name] = model.params[name][0]
+    return init
 
-def train_arima_model(data, user_id):
-    """Train ARIMA model for a user"""
+
+def train_prophet_model(data, user_id, models_dir=MODELS_DIR, warm_start=None):
+    """Train Prophet model for a user, optionally initialized from a previous model"""
+    if len(data) < 60:
+        raise ValueError("Insufficient data for Prophet (need 60+ days)")
+    
+    # Prophet requires specific column names
+    prophet_data = data.copy()
+    
+    # Suppress all Prophet logging
+    import logging
+    logging.getLogger('cmdstanpy').setLevel(logging.ERROR)
+    logging.getLogger('prophet').setLevel(logging.ERROR)
+    
     try:
-        print(f"  Training ARIMA model...")
-        
-        # Use only the income values
-        y = data['y'].values
-        
-        if len(y) < 60:
-            print(f"    WARNING Insufficient data for ARIMA (need 60+ days)")
-            return None
-        
-        # Fit ARIMA model with simpler order to avoid issues
-        # Using (3,1,2) which is more stable than (5,1,0)
-        model = ARIMA(y, order=(3, 1, 2))
-        fitted_model = model.fit()
-        
-        # Save model
-        model_path = MODELS_DIR / f"arima_{user_id}.pkl"
-        joblib.dump(fitted_model, model_path)
-        
-        # Calculate metrics using in-sample predictions
-        # Get predictions for the entire series
-        predictions = fitted_model.predict(start=1, end=len(y)-1)
-        actual = y[1:]  # Skip first value due to differencing
-        
-        # Ensure same length
-        min_len = min(len(predictions), len(actual))
-        predictions = predictions[:min_len]
-        actual = actual[:min_len]
-        
-        mae = np.mean(np.abs(predictions - actual))
-        
-        print(f"    SUCCESS ARIMA trained - MAE: Rs.{mae:.2f}")
-        return {
-            'model_type': 'ARIMA',
-            'mae': mae,
-            'model_path': str(model_path),
-            'params': '(3,1,2)'
-        }
+        model = Prophet(
+            daily_seasonality=False,
+            weekly_seasonality=True,
+            yearly_seasonality=False,
+            changepoint_prior_scale=0.05,
+            seasonality_prior_scale=0.1,
+            interval_width=0.95
+        )
     except Exception as e:
-        print(f"    WARNING ARIMA training skipped: {str(e)[:80]}")
-        return None
+        error_msg = str(e).lower()
+        # Check if it's a backend issue
+        if any(x in error_msg for x in ['stan_backend', 'cmdstan', 'pystan', 'backend']):
+            raise RuntimeError("Prophet backend not available") from e
+        raise
+    
+    fit_kwargs = {}
+    if warm_start is not None:
+        fit_kwargs['init'] = prophet_warm_start(joblib.load(warm_start))
+    
+    # Fit model - suppress all output
+    from io import StringIO
+    old_stdout = sys.stdout
+    old_stderr = sys.stderr
+    sys.stdout = StringIO()
+    sys.stderr = StringIO()
+    
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            model.fit(prophet_data, **fit_kwargs)
+    finally:
+        sys.stdout = old_stdout
+        sys.stderr = old_stderr
+    
+    # Serving intervals come from in-sample residual quantiles
+    attach_residual_interval(model)
+    
+    # Save model
+    model_path = models_dir / f"prophet_{user_id}.pkl"
+    joblib.dump(model, model_path)
+    
+    # Calculate metrics
+    forecast = model.predict(prophet_data)
+    mae = np.mean(np.abs(forecast['yhat'].values - prophet_data['y'].values))
+    
+    return {
+        'model_type': 'Prophet',
+        'mae': float(mae),
+        'model_path': str(model_path),
+        'params': 'weekly_seasonality',
+        'warm_start': 'init' in fit_kwargs
+    }
+
+
+def train_fourier_model(data, user_id, models_dir=MODELS_DIR, warm_start=None):
+    """Train the closed-form trend + weekly Fourier model (a single solve, nothing to warm-start)"""
+    if len(data) < 60:
+        raise ValueError("Insufficient data for Fourier (need 60+ days)")
+    
+    model = FourierForecaster.fit(data['ds'], data['y'].values)
+    model_path = save_fourier_artifact(model, models_dir / f"fourier_{user_id}")
+    
+    # Calculate metrics using in-sample predictions
+    days = np.arange(model.start_day, model.start_day + model.nobs)
+    mae = np.mean(np.abs(model.predict(days) - data['y'].values))
+    
+    return {
+        'model_type': 'Fourier',
+        'mae': float(mae),
+        'model_path': str(model_path),
+        'params': f'weekly_fourier_order={WEEKLY_FOURIER_ORDER}',
+        'warm_start': False
+    }
 
 
-def train_prophet_model(data, user_id):
-    """Train Prophet model for a user"""
+def train_rolling_mean_model(data, user_id, models_dir=MODELS_DIR, warm_start=None):
+    """Train Rolling Mean model (simple baseline, nothing to warm-start)"""
+    y = data['y'].values
+    window = min(30, len(y) // 3)  # 30-day window or 1/3 of data
+    
+    # Calculate rolling mean
+    rolling_mean = pd.Series(y).rolling(window=window, min_periods=1).mean()
+    
+    # Calculate MAE
+    mae = np.mean(np.abs(rolling_mean.values - y))
+    
+    # Save parameters
+    params = {
+        'window': window,
+        'mean': float(np.mean(y)),
+        'std': float(np.std(y))
+    }
+    
+    model_path = models_dir / f"rolling_mean_{user_id}.pkl"
+    joblib.dump(params, model_path)
+    
+    return {
+        'model_type': 'Rolling Mean',
+        'mae': float(mae),
+        'model_path': str(model_path),
+        'params': f'window={window}',
+        'warm_start': False
+    }
+
+
+TRAINERS = {
+    'arima': train_arima_model,
+    'prophet': train_prophet_model,
+    'fourier': train_fourier_model,
+    'rolling_mean': train_rolling_mean_model
+}
+
+
+def _raise_timeout(signum, frame):
+    raise ModelTimeout()
+
+
+def fit_model(model_type, data, user_id, timeout_seconds, models_dir=MODELS_DIR, warm_start=None):
+    """
+    Train one model and report its result, fit time and failure reason
+    Runs in a pool worker's main thread, where SIGALRM enforces the timeout
+    and frees the worker for the next fit. Without SIGALRM (Windows) or off
+    the main thread, fits run without a time limit.
+    """
+    start = time.perf_counter()
+    use_alarm = hasattr(signal, 'SIGALRM') and threading.current_thread() is threading.main_thread()
+    previous = installed = None
+    
     try:
-        print(f"  Training Prophet model...")
-        
-        if len(data) < 60:
-            print(f"    WARNING Insufficient data for Prophet (need 60+ days)")
-            return None
-        
-        # Prophet requires specific column names
-        prophet_data = data.copy()
-        
-        # Suppress all Prophet logging
-        import logging
-        logging.getLogger('cmdstanpy').setLevel(logging.ERROR)
-        logging.getLogger('prophet').setLevel(logging.ERROR)
-        
-        # Try to use Prophet without cmdstan (fallback to pystan)
-        try:
-            # First try with default backend
-            model = Prophet(
-                daily_seasonality=False,
-                weekly_seasonality=True,
-                yearly_seasonality=False,
-                changepoint_prior_scale=0.05,
-                seasonality_prior_scale=0.1,
-                interval_width=0.95
-            )
-            
-            # Fit model - suppress all output
-            import sys
-            from io import StringIO
-            old_stdout = sys.stdout
-            old_stderr = sys.stderr
-            sys.stdout = StringIO()
-            sys.stderr = StringIO()
-            
-            try:
-                with warnings.catch_warnings():
-                    warnings.simplefilter("ignore")
-                    model.fit(prophet_data)
-            finally:
-                sys.stdout = old_stdout
-                sys.stderr = old_stderr
-            
-            # Save model
-            model_path = MODELS_DIR / f"prophet_{user_id}.pkl"
-            joblib.dump(model, model_path)
-            
-            # Calculate metrics
-            forecast = model.predict(prophet_data)
-            mae = np.mean(np.abs(forecast['yhat'].values - prophet_data['y'].values))
-            
-            print(f"    SUCCESS Prophet trained - MAE: Rs.{mae:.2f}")
-            return {
-                'model_type': 'Prophet',
-                'mae': mae,
-                'model_path': str(model_path),
-                'params': 'weekly_seasonality'
-            }
-            
-        except Exception as inner_e:
-            error_msg = str(inner_e).lower()
-            # Check if it's a backend issue
-            if any(x in error_msg for x in ['stan_backend', 'cmdstan', 'pystan', 'backend']):
-                print(f"    WARNING Prophet backend not available, skipping")
-                return None
-            # For other errors, re-raise
-            raise inner_e
-            
+        if use_alarm:
+            previous = signal.signal(signal.SIGALRM, _raise_timeout)
+            installed = True
+            signal.setitimer(signal.ITIMER_REAL, timeout_seconds)
+        result = TRAINERS[model_type](data, user_id, models_dir, warm_start)
+        error = None
+    except ModelTimeout:
+        result, error = None, f"timed out after {timeout_seconds:g}s"
     except Exception as e:
-        print(f"    WARNING Prophet training skipped: {str(e)[:80]}")
-        return None
+        result, error = None, f"{type(e).__name__}: {str(e)[:200]}"
+    finally:
+        if installed:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous if previous is not None else signal.SIG_DFL)
+    
+    return {
+        'model_type': model_type,
+        'result': result,
+        'error': error,
+        'seconds': round(time.perf_counter() - start, 3)
+    }
 
 
-def train_rolling_mean_model(data, user_id):
-    """Train Rolling Mean model (simple baseline)"""
+_worker_series = {}
+
+
+def fit_series_model(series_path, model_type, user_id, timeout_seconds, warm_start=None):
+    """Pool task: read the user's series from the memory-mapped training data and fit one model"""
+    series = _worker_series.get(series_path)
+    if series is None:
+        series = _worker_series[series_path] = TrainingSeries(series_path)
+    return fit_model(model_type, series.frame(user_id), user_id, timeout_seconds, warm_start=warm_start)
+
+
+def run_fits(series_path, tasks, workers, timeout_seconds):
+    """
+    Yield (user_id, fit) for each (user_id, model_type, warm_start) task as it finishes
+    workers=0 trains in this process, one model after another
+    """
+    if workers <= 0:
+        series = TrainingSeries(series_path)
+        for user_id, model_type, warm_start in tasks:
+            yield user_id, fit_model(model_type, series.frame(user_id), user_id, timeout_seconds,
+                                     warm_start=warm_start)
+        return
+    
+    # Spawned workers do not inherit the parent's database connections
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
     try:
-        print(f"  Training Rolling Mean model...")
-        
-        y = data['y'].values
-        window = min(30, len(y) // 3)  # 30-day window or 1/3 of data
-        
-        # Calculate rolling mean
-        rolling_mean = pd.Series(y).rolling(window=window, min_periods=1).mean()
-        
-        # Calculate MAE
-        mae = np.mean(np.abs(rolling_mean.values - y))
-        
-        # Save parameters
-        params = {
-            'window': window,
-            'mean': float(np.mean(y)),
-            'std': float(np.std(y))
-        }
-        
-        model_path = MODELS_DIR / f"rolling_mean_{user_id}.pkl"
-        joblib.dump(params, model_path)
-        
-        print(f"    SUCCESS Rolling Mean trained - MAE: Rs.{mae:.2f}")
-        return {
-            'model_type': 'Rolling Mean',
-            'mae': mae,
-            'model_path': str(model_path),
-            'params': f'window={window}'
+        futures = {
+            executor.submit(fit_series_model, str(series_path), model_type, user_id, timeout_seconds,
+                            warm_start=warm_start): (user_id, model_type)
+            for user_id, model_type, warm_start in tasks
         }
-    except Exception as e:
-        print(f"    WARNING Rolling Mean training failed: {str(e)[:80]}")
-        return None
+        for future in as_completed(futures):
+            user_id, model_type = futures[future]
+            try:
+                yield user_id, future.result()
+            except ModelTimeout:
+                # The alarm fired just as the fit returned
+                yield user_id, {'model_type': model_type, 'result': None,
+                                'error': f"timed out after {timeout_seconds:g}s", 'seconds': timeout_seconds}
+    finally:
+        # On interruption, drop queued fits rather than finishing them
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def load_checkpoint(path=CHECKPOINT_PATH):
+    """Per-user records of an interrupted run, keyed by user_id"""
+    records = {}
+    if not path.exists():
+        return records
+    
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by the interruption
+                continue
+            records[record['user_id']] = record
+    return records
+
+
+def append_checkpoint(record, path=CHECKPOINT_PATH):
+    """Durably record a finished user"""
+    with open(path, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def save_model_metadata(db, user_id, model_type, model_info, training_date, data_watermark=None):
+    """Record the artifact in the user's model manifest (ModelVersion/ModelMetric)"""
+    record_model_version(
+        db, user_id, model_type,
+        artifact_path=Path(model_info['model_path']),
+        algorithm=model_info['model_type'],
+        parameters={'params': model_info['params']},
+        metrics={'mae': model_info['mae']},
+        training_date=training_date,
+        data_watermark=data_watermark
+    )
+
+
+def finish_user(db, user_id, fits, trained_at, data_watermark=None):
+    """Write a user's manifest and forecast path once all of their fits are in"""
+    record = {
+        'user_id': user_id,
+        'trained_at': trained_at.isoformat(),
+        'models': {
+            fit['model_type']: {
+                'status': 'trained' if fit['result'] else 'failed',
+                'seconds': fit['seconds'],
+                'mae': fit['result']['mae'] if fit['result'] else None,
+                'warm_start': bool(fit['result'] and fit['result']['warm_start']),
+                'error': fit['error']
+            }
+            for fit in sorted(fits, key=lambda fit: MODEL_TYPES.index(fit['model_type']))
+        },
+        'preferred': None,
+        'forecast_path': None
+    }
+    
+    trained = [fit for fit in fits if fit['result']]
+    if not trained:
+        return record
+    
+    # Manifest: serving loads only the preferred artifact
+    for fit in trained:
+        save_model_metadata(db, user_id, fit['model_type'], fit['result'], trained_at, data_watermark)
+    preferred = mark_preferred(db, user_id)
+    db.commit()
+    record['preferred'] = f"{preferred.algorithm} (v{preferred.version_number})"
+    
+    # Precompute the serving path so predictions skip model execution
+    record['forecast_path'] = EnhancedMLService(db).store_forecast_path(user_id, trained_at)
+    return record
 
 
-def save_model_metadata(db, user_id, model_info):
-    """Save model metadata to database"""
-    # You could create a ModelMetadata table to store this
-    # For now, we'll just print it
-    pass
+def summarize(records):
+    """Per-model success counts, fit times and failure reasons"""
+    summary = {
+        'total_users': len(records),
+        'skipped_users': sum(1 for record in records if record.get('skipped')),
+        'unchanged_users': sum(1 for record in records if record.get('unchanged')),
+        'failed_users': sum(1 for record in records if not record.get('skipped')
+                            and not record.get('unchanged') and not record.get('preferred')),
+        'forecast_paths': sum(1 for record in records if record.get('forecast_path')),
+        'models': {}
+    }
+    
+    for model_type in MODEL_TYPES:
+        fits = [record['models'][model_type] for record in records if model_type in record.get('models', {})]
+        seconds = np.array([fit['seconds'] for fit in fits])
+        summary['models'][model_type] = {
+            'trained': sum(1 for fit in fits if fit['status'] == 'trained'),
+            'failed': sum(1 for fit in fits if fit['status'] == 'failed'),
+            'warm_started': sum(1 for fit in fits if fit.get('warm_start')),
+            'fit_seconds': {
+                'total': round(float(seconds.sum()), 3),
+                'mean': round(float(seconds.mean()), 3),
+                'p95': round(float(np.percentile(seconds, 95)), 3),
+                'max': round(float(seconds.max()), 3)
+            } if len(seconds) else None,
+            'failure_reasons': dict(Counter(fit['error'] for fit in fits if fit['error']).most_common())
+        }
+    
+    return summary
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Train forecasting models for all users")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="training processes (0 trains in this process)")
+    parser.add_argument('--model-timeout', type=float, default=DEFAULT_MODEL_TIMEOUT_SECONDS,
+                        help="seconds allowed for a single model fit")
+    parser.add_argument('--fresh', action='store_true',
+                        help="ignore the checkpoint of an interrupted run")
+    parser.add_argument('--incremental', action='store_true',
+                        help="skip users whose data and models are unchanged and warm-start the rest")
+    args = parser.parse_args()
+    
     print("=" * 80)
     print("ML MODEL TRAINING PIPELINE")
     print("=" * 80)
@@ -250,6 +478,8 @@ def main():
     
     try:
         # Get users with sufficient data
+        # Unchanged users' stored paths are current as of this check
+        checked_at = datetime.utcnow()
         print("Finding users with sufficient data...")
         users = get_users_with_sufficient_data(db, min_transactions=180)
         print(f"   Found {len(users)} users with 180+ transactions")
@@ -259,75 +489,132 @@ def main():
             print("WARNING: No users with sufficient data for training")
             return
         
-        # Training statistics
-        stats = {
-            'total_users': len(users),
-            'arima_success': 0,
-            'prophet_success': 0,
-            'rolling_mean_success': 0,
-            'failed': 0
-        }
+        if args.fresh:
+            CHECKPOINT_PATH.unlink(missing_ok=True)
+        records = load_checkpoint()
+        if records:
+            print(f"Resuming: {len(records)} users already trained in the interrupted run")
+            print()
         
-        # Train models for each user
-        for idx, user in enumerate(users, 1):
+        candidates = {}
+        for user in users:
             user_id = str(user.user_id)
-            email = user.email
-            txn_count = user.txn_count
-            
-            print(f"[{idx}/{len(users)}] Training models for: {email}")
-            print(f"   Transactions: {txn_count}")
-            
-            # Prepare data
-            data = prepare_time_series_data(db, user.user_id)
-            
-            if data is None or len(data) < 30:
-                print(f"   WARNING: Insufficient income data, skipping...")
-                stats['failed'] += 1
-                print()
+            if user_id in records:
                 continue
             
-            print(f"   Data points: {len(data)} days")
-            
-            # Train all three models
-            arima_result = train_arima_model(data, user_id)
-            if arima_result:
-                stats['arima_success'] += 1
+            warm_starts = {}
+            if args.incremental:
+                trained_through = training_watermark(db, user_id, MODEL_TYPES)
+                if trained_through is not None and user.data_watermark <= trained_through:
+                    # Same data, same models: the stored path is still current,
+                    # so only restart its clock (forecast it if there is none)
+                    model_used = touch_forecast_path(db, user_id, checked_at)
+                    db.commit()
+                    if model_used is None:
+                        model_used = EnhancedMLService(db).store_forecast_path(user_id, checked_at)
+                    record = {'user_id': user_id, 'unchanged': True, 'forecast_path': model_used, 'models': {}}
+                    append_checkpoint(record)
+                    records[user_id] = record
+                    continue
+                
+                warm_starts = {
+                    version.model_name: version.artifact_path for version in load_manifest(db, user_id)
+                    if version.artifact_path and Path(version.artifact_path).exists()
+                }
             
-            prophet_result = train_prophet_model(data, user_id)
-            if prophet_result:
-                stats['prophet_success'] += 1
+            candidates[user_id] = (user, warm_starts)
+        
+        # One rollup query builds every series; workers memory-map the result
+        # Transactions added after this point make the stored forecasts stale
+        trained_at = datetime.utcnow()
+        prep_start = time.perf_counter()
+        write_training_series(db, TRAINING_DATA_PATH, candidates)
+        series = TrainingSeries(TRAINING_DATA_PATH)
+        print(f"Prepared {len(series)} daily series ({len(series.income)} days) "
+              f"in {time.perf_counter() - prep_start:.2f}s")
+        
+        pending = {}
+        tasks = []
+        for user_id, (user, warm_starts) in candidates.items():
+            if user_id not in series or len(series.values(user_id)) < 30:
+                record = {'user_id': user_id, 'skipped': 'insufficient income data', 'models': {}}
+                append_checkpoint(record)
+                records[user_id] = record
+                print(f"   WARNING: {user.email}: insufficient income data, skipping")
+                continue
             
-            rolling_result = train_rolling_mean_model(data, user_id)
-            if rolling_result:
-                stats['rolling_mean_success'] += 1
+            pending[user_id] = {'email': user.email, 'trained_at': trained_at,
+                                'data_watermark': user.data_watermark, 'fits': []}
+            tasks.extend((user_id, model_type, warm_starts.get(model_type)) for model_type in MODEL_TYPES)
+        
+        unchanged = sum(1 for record in records.values() if record.get('unchanged'))
+        if unchanged:
+            print(f"Unchanged since last training: {unchanged} users")
+        print(f"Training {len(pending)} users with {args.workers} workers "
+              f"(model timeout {args.model_timeout:g}s)")
+        print()
+        
+        done = 0
+        for user_id, fit in run_fits(TRAINING_DATA_PATH, tasks, args.workers, args.model_timeout):
+            state = pending[user_id]
+            state['fits'].append(fit)
+            if len(state['fits']) < len(MODEL_TYPES):
+                continue
             
-            if not (arima_result or prophet_result or rolling_result):
-                stats['failed'] += 1
+            record = finish_user(db, user_id, state['fits'], state['trained_at'], state['data_watermark'])
+            append_checkpoint(record)
+            records[user_id] = record
+            done += 1
             
-            print()
+            models = ', '.join(
+                f"{model_type} {fit['seconds']:.2f}s{' (warm)' if fit['warm_start'] else ''}"
+                if fit['status'] == 'trained'
+                else f"{model_type} FAILED ({fit['error']})"
+                for model_type, fit in record['models'].items()
+            )
+            print(f"[{done}/{len(pending)}] {state['email']}: {models}")
+            if record['preferred']:
+                path = f", {FORECAST_PATH_DAYS}-day path stored" if record['forecast_path'] else ""
+                print(f"   Preferred model: {record['preferred']}{path}")
+        
+        summary = summarize(list(records.values()))
+        summary['finished_at'] = datetime.utcnow().isoformat()
+        summary['workers'] = args.workers
+        summary['model_timeout_seconds'] = args.model_timeout
+        SUMMARY_PATH.write_text(json.dumps(summary, indent=2))
+        CHECKPOINT_PATH.unlink(missing_ok=True)
         
         # Print summary
+        print()
         print("=" * 80)
         print("TRAINING COMPLETE!")
         print("=" * 80)
         print()
         print(f"Training Statistics:")
-        print(f"   Total Users: {stats['total_users']}")
-        print(f"   ARIMA Models: {stats['arima_success']} SUCCESS")
-        print(f"   Prophet Models: {stats['prophet_success']} SUCCESS")
-        print(f"   Rolling Mean Models: {stats['rolling_mean_success']} SUCCESS")
-        print(f"   Failed: {stats['failed']} FAILED")
+        print(f"   Total Users: {summary['total_users']}")
+        for model_type, model_summary in summary['models'].items():
+            fit_seconds = model_summary['fit_seconds'] or {'mean': 0, 'max': 0}
+            print(f"   {model_type}: {model_summary['trained']} SUCCESS ({model_summary['warm_started']} warm), "
+                  f"{model_summary['failed']} FAILED "
+                  f"(mean {fit_seconds['mean']:.2f}s, max {fit_seconds['max']:.2f}s)")
+            for reason, count in model_summary['failure_reasons'].items():
+                print(f"      {count} x {reason}")
+        print(f"   Unchanged Users: {summary['unchanged_users']} KEPT")
+        print(f"   Forecast Paths: {summary['forecast_paths']} STORED")
+        print(f"   Failed: {summary['failed_users'] + summary['skipped_users']} FAILED")
         print()
         print(f"Models saved in: {MODELS_DIR.absolute()}")
+        print(f"Summary written to: {SUMMARY_PATH.absolute()}")
         print()
         
         # List saved models
-        model_files = list(MODELS_DIR.glob("*.pkl"))
+        model_files = list(MODELS_DIR.glob("*.pkl")) + list(MODELS_DIR.glob("*.npz"))
         print(f"Total model files: {len(model_files)}")
         print()
-        
+    
     except Exception as e:
         print(f"ERROR: {str(e)}")
+        print(f"Progress is kept in {CHECKPOINT_PATH}; rerun to resume")
         import traceback
         traceback.print_exc()
     finally:
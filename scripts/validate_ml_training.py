@@ -11,7 +11,6 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 from datetime import datetime, timedelta
-import joblib
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import warnings
 warnings.filterwarnings('ignore')
@@ -21,6 +20,9 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.database import SessionLocal
 from app.models import User, Transaction
+from app.daily_cashflow import load_daily_cashflow
+from app.model_registry import model_artifact_path, load_model_artifact
+from app.arima_artifact import CompactARIMA
 
 # Create visualizations directory
 VIZ_DIR = Path("ml_visualizations")
@@ -32,7 +34,14 @@ MODELS_DIR = Path("ml_models")
 def validate_real_model(model_path: Path, model_type: str):
     """Validate that a model is real (not mock/stub)"""
     try:
-        model = joblib.load(model_path)
+        model = load_model_artifact(model_path)
+        
+        if model_type == 'arima' and isinstance(model, CompactARIMA):
+            # Compact artifacts keep parameters and filter state only
+            if len(model.params) == 0 or model.nobs == 0:
+                return False, "Model not fitted (no parameters)"
+            
+            return True, f"Real ARIMA{model.order} model fitted on {model.nobs} points"
         
         if model_type == 'arima':
             # ARIMA models should have specific attributes
@@ -79,22 +88,17 @@ def validate_real_model(model_path: Path, model_type: str):
 
 def get_actual_vs_predicted(user_id: str, db):
     """Get actual income data and model predictions"""
-    # Get transactions
-    transactions = db.query(Transaction).filter(
-        Transaction.user_id == user_id,
-        Transaction.is_income == True
-    ).order_by(Transaction.txn_timestamp).all()
+    # Daily income from the rollup (days with income only)
+    cashflow = load_daily_cashflow(db, user_id)
+    income_days = cashflow[cashflow['income_count'] > 0]
     
-    if len(transactions) < 60:
+    if income_days['income_count'].sum() < 60:
         return None
     
-    # Convert to daily income
-    df = pd.DataFrame([{
-        'date': t.txn_timestamp.date(),
-        'amount': float(t.amount_inr)
-    } for t in transactions])
-    
-    df = df.groupby('date')['amount'].sum().reset_index()
+    df = pd.DataFrame({
+        'date': income_days.index,
+        'amount': income_days['income_inr'].to_numpy()
+    })
     df = df.sort_values('date')
     
     # Split into train/test (80/20)
@@ -107,7 +111,7 @@ def get_actual_vs_predicted(user_id: str, db):
 
 def evaluate_model(user_id: str, model_type: str, db):
     """Evaluate a single model's performance"""
-    model_path = MODELS_DIR / f"{model_type}_{user_id}.pkl"
+    model_path = model_artifact_path(MODELS_DIR, model_type, user_id)
     
     if not model_path.exists():
         return None
@@ -128,7 +132,7 @@ def evaluate_model(user_id: str, model_type: str, db):
     train_data, test_data, full_data = data
     
     # Load model and make predictions
-    model = joblib.load(model_path)
+    model = load_model_artifact(model_path)
     
     try:
         if model_type == 'arima':
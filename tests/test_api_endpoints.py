@@ -46,6 +46,18 @@ def test_get_predictions(client, auth_headers, db, test_user):
     assert len(data) > 0
 
 
+def test_generate_predictions_for_custom_horizons(client, auth_headers):
+    """Test arbitrary prediction windows and their validation"""
+    response = client.post("/predictions/generate?horizons=14&horizons=3&horizons=90", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["predictions_generated"] == 3
+    assert data["horizons"] == [3, 14, 90]
+    
+    response = client.post("/predictions/generate?horizons=0", headers=auth_headers)
+    assert response.status_code == 400
+
+
 def test_get_safe_to_spend(client, auth_headers, db, test_user):
     """Test safe-to-spend endpoint"""
     # Generate test data
@@ -232,3 +244,19 @@ def test_get_stability_score(client, auth_headers, db, test_user):
     data = response.json()
     assert "stability_score" in data
     assert 0 <= data["stability_score"] <= 1
+
+
+def test_get_expense_forecast(client, auth_headers, db, test_user):
+    """Test expense forecast endpoint"""
+    response = client.get("/predictions/expenses?days=14", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["days"] == 14
+    assert data["expected_outflow_inr"] >= 0
+    assert set(data["by_weekday_inr"]) == {
+        "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"
+    }
+    
+    # Category split adds up to the total
+    if data["by_category_inr"]:
+        assert abs(sum(data["by_category_inr"].values()) - data["expected_outflow_inr"]) < 1
@@ -0,0 +1,64 @@
+import numpy as np
+import joblib
+from statsmodels.tsa.arima.model import ARIMA
+from app.arima_artifact import CompactARIMA, save_arima_artifact, load_arima_artifact
+from app.model_registry import model_artifact_path, load_model_artifact
+
+
+def test_compact_artifact_reproduces_statsmodels_forecast(tmp_path, daily_income_series):
+    """Test the .npz artifact forecasts exactly like the pickled results"""
+    y = daily_income_series('moderate')
+    fitted = ARIMA(y, order=(3, 1, 2)).fit()
+    
+    path = save_arima_artifact(fitted, tmp_path / "arima_user")
+    model = load_arima_artifact(path)
+    
+    assert path.suffix == '.npz'
+    assert model.order == (3, 1, 2)
+    assert np.allclose(model.forecast(60), fitted.forecast(60))
+    assert np.isclose(model.resid_std, np.std(fitted.resid))
+    
+    # Far smaller than the pickled results object
+    joblib.dump(fitted, tmp_path / "arima_user.pkl")
+    assert path.stat().st_size * 10 < (tmp_path / "arima_user.pkl").stat().st_size
+
+
+def test_numpy_forecaster_matches_statsmodels(daily_income_series):
+    """Test the NumPy recursion against statsmodels on every synthetic income pattern"""
+    for pattern in ['stable', 'moderate', 'volatile']:
+        y = daily_income_series(pattern)
+        
+        for order in [(3, 1, 2), (1, 1, 1), (0, 1, 1), (2, 0, 1), (1, 2, 1)]:
+            fitted = ARIMA(y, order=order).fit()
+            model = CompactARIMA.from_params(order, fitted.params, y)
+            
+            assert np.allclose(model.forecast(90), fitted.forecast(90), rtol=1e-8, atol=1e-6 * y.std())
+            assert np.isclose(model.resid_std, np.std(fitted.resid))
+
+
+def test_numpy_serving_converts_legacy_pickles(tmp_path, daily_income_series):
+    """Test a pickled statsmodels ARIMA is served through the NumPy forecaster"""
+    y = daily_income_series('volatile')
+    fitted = ARIMA(y, order=(3, 1, 2)).fit()
+    joblib.dump(fitted, tmp_path / "arima_user.pkl")
+    
+    model = load_model_artifact(tmp_path / "arima_user.pkl")
+    
+    assert isinstance(model, CompactARIMA)
+    assert np.allclose(model.forecast(30), fitted.forecast(30))
+
+
+def test_artifact_path_prefers_compact_format(tmp_path, daily_income_series):
+    """Test serving picks the .npz artifact over a legacy pickle"""
+    y = daily_income_series('stable')
+    fitted = ARIMA(y, order=(3, 1, 2)).fit()
+    
+    joblib.dump(fitted, tmp_path / "arima_user.pkl")
+    assert model_artifact_path(tmp_path, 'arima', 'user').suffix == '.pkl'
+    
+    save_arima_artifact(fitted, tmp_path / "arima_user")
+    path = model_artifact_path(tmp_path, 'arima', 'user')
+    
+    assert path.suffix == '.npz'
+    assert isinstance(load_model_artifact(path), CompactARIMA)
+    assert model_artifact_path(tmp_path, 'prophet', 'user').suffix == '.pkl'
@@ -0,0 +1,96 @@
+import numpy as np
+from sklearn.metrics import mean_absolute_error, mean_squared_error
+from app.backtest import (
+    rolling_origins, forecast_metrics, write_backtest_results, load_backtest_results, summarize_backtest
+)
+from scripts.backtest_models import backtest_tasks, run_backtests, collect_results, backtest_global
+
+
+def test_rolling_origins_and_vectorized_metrics():
+    """Test origins keep enough training days and row metrics match a per-row loop"""
+    assert rolling_origins(150, 30, 3, 30, 60) == [120, 90, 60]
+    assert rolling_origins(100, 30, 3, 30, 60) == [70]
+    assert rolling_origins(80, 30, 3, 30, 60) == []
+    
+    rng = np.random.default_rng(0)
+    actual = rng.uniform(0, 1000, (5, 30))
+    forecast = actual + rng.normal(0, 100, (5, 30))
+    forecast[4] = np.nan
+    metrics = forecast_metrics(actual, forecast, forecast - 150, forecast + 150)
+    
+    for i in range(4):
+        assert np.isclose(metrics['mae'][i], mean_absolute_error(actual[i], forecast[i]))
+        assert np.isclose(metrics['rmse'][i], np.sqrt(mean_squared_error(actual[i], forecast[i])))
+        assert np.isclose(metrics['mape'][i], np.mean(np.abs(actual[i] - forecast[i]) / (actual[i] + 1)) * 100)
+        assert np.isclose(metrics['coverage'][i], np.mean(np.abs(actual[i] - forecast[i]) <= 150))
+    assert all(np.isnan(values[4]) for values in metrics.values())
+
+
+def test_backtest_harness_in_process_and_pool(tmp_path, daily_income_series, training_series):
+    """Test the pool gives the in-process results, failures stay rows, and the file round-trips"""
+    values = [daily_income_series(pattern) for pattern in ['stable', 'volatile']] + [np.ones(50)]
+    series = training_series(values, ['a', 'b', 'short'])
+    
+    tasks = backtest_tasks(series, ['fourier', 'rolling_mean'], horizon=14, folds=2, step=14)
+    assert {user_id for user_id, _, _ in tasks} == {'a', 'b'}
+    # A fit that raises is kept as a failed row
+    tasks.append(('a', 'arima', [50]))
+    
+    in_process = collect_results(series, run_backtests(series.path, tasks, 14, 0, 60), 14)
+    pooled = collect_results(series, run_backtests(series.path, tasks, 14, 2, 60), 14)
+    
+    assert len(in_process['user_id']) == 9
+    order = np.lexsort((in_process['train_days'], in_process['model_type'], in_process['user_id']))
+    pooled_order = np.lexsort((pooled['train_days'], pooled['model_type'], pooled['user_id']))
+    for name in ['mae', 'coverage', 'forecast', 'actual']:
+        assert np.allclose(in_process[name][order], pooled[name][pooled_order], equal_nan=True)
+    
+    failed = in_process['model_type'] == 'arima'
+    assert in_process['error'][failed][0] == "ValueError: Insufficient data for ARIMA (need 60+ days)"
+    assert np.isnan(in_process['mae'][failed]).all()
+    assert np.isfinite(in_process['mae'][~failed]).all()
+    # Actual paths are the held-out days after each origin
+    first = np.flatnonzero(~failed)[0]
+    origin = in_process['train_days'][first]
+    assert np.allclose(in_process['actual'][first], series.values(in_process['user_id'][first])[origin:origin + 14])
+    
+    path = tmp_path / "backtest_results.npz"
+    write_backtest_results(path, in_process)
+    summary = summarize_backtest(load_backtest_results(path))
+    assert summary.loc['arima', 'failed'] == 1
+    assert summary.loc['fourier', 'rows'] == 4
+    assert summary.loc['rolling_mean', 'users'] == 2
+
+
+def test_raising_task_becomes_failed_rows(daily_income_series, training_series):
+    """Test a task that raises in a worker is recorded per origin and the other tasks finish"""
+    series = training_series([daily_income_series('moderate')], ['a'])
+    # No path builder exists for an unknown model type, so the task raises before fitting
+    tasks = [('a', 'unknown', [90, 76]), ('a', 'rolling_mean', [90])]
+    
+    for workers in [0, 2]:
+        results = collect_results(series, run_backtests(series.path, tasks, 14, workers, 60), 14)
+        failed = results['model_type'] == 'unknown'
+        
+        assert failed.sum() == 2 and sorted(results['train_days'][failed]) == [76, 90]
+        assert all(error.startswith("AttributeError: ") for error in results['error'][failed])
+        assert np.isnan(results['forecast'][failed]).all() and np.isnan(results['mae'][failed]).all()
+        assert results['error'][~failed][0] == '' and np.isfinite(results['mae'][~failed]).all()
+
+
+def test_global_model_backtested_at_the_same_origins(daily_income_series, training_series):
+    """Test the global model gets a scored row at every per-user origin"""
+    series = training_series([daily_income_series(pattern) for pattern in ['stable', 'moderate', 'volatile']],
+                             ['a', 'b', 'c'])
+    tasks = backtest_tasks(series, ['global'], horizon=14, folds=2, step=14)
+    
+    finished = backtest_global(series, tasks, 14, {}, max_iter=20)
+    results = collect_results(series, finished, 14)
+    
+    assert len(results['user_id']) == sum(len(origins) for _, _, origins in tasks)
+    assert set(results['model_type']) == {'global'}
+    assert (results['error'] == '').all()
+    assert np.isfinite(results['mae']).all()
+    assert np.all(results['lower'] <= results['forecast']) and np.all(results['forecast'] <= results['upper'])
+    for user_id, _, origins in tasks:
+        assert sorted(results['train_days'][results['user_id'] == user_id]) == sorted(origins)
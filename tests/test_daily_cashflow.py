@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from app.daily_cashflow import load_daily_cashflow, rebuild_daily_cashflow
+from app.models import Transaction, TransactionType, MerchantCategory, BankAccount, DailyCashflow
+
+
+def make_transaction(user, account, timestamp, amount, is_income):
+    return Transaction(
+        user_id=user.user_id,
+        account_id=account.account_id,
+        txn_timestamp=timestamp,
+        amount_inr=Decimal(amount),
+        txn_type=TransactionType.CREDIT if is_income else TransactionType.DEBIT,
+        balance_after_txn=Decimal('50000.00'),
+        description='rollup test',
+        merchant_category=MerchantCategory.FREELANCING if is_income else MerchantCategory.RENT,
+        is_income=is_income
+    )
+
+
+def rollup_row(db, user, day):
+    return db.query(DailyCashflow).filter(
+        DailyCashflow.user_id == user.user_id,
+        DailyCashflow.cashflow_date == day
+    ).first()
+
+
+def test_rollup_follows_transaction_writes(db, test_user):
+    """Test the rollup is maintained on insert, update and delete"""
+    account = db.query(BankAccount).filter(
+        BankAccount.user_id == test_user.user_id
+    ).first()
+    
+    # A day far in the past that no other test writes to
+    day = datetime(2001, 1, 1, 10, 0)
+    next_day = day + timedelta(days=1)
+    
+    income = make_transaction(test_user, account, day, '1000.00', True)
+    expense = make_transaction(test_user, account, day + timedelta(hours=2), '250.50', False)
+    db.add_all([income, expense])
+    db.commit()
+    
+    row = rollup_row(db, test_user, day.date())
+    assert row.income_inr == Decimal('1000.00')
+    assert row.expense_inr == Decimal('250.50')
+    assert row.income_count == 1
+    assert row.expense_count == 1
+    assert row.category_totals_inr == {'freelancing': 1000.0, 'rent': 250.5}
+    
+    # Edit the amount, then move the expense to the next day
+    income.amount_inr = Decimal('1200.00')
+    expense.txn_timestamp = next_day
+    db.commit()
+    
+    db.refresh(row)
+    assert row.income_inr == Decimal('1200.00')
+    assert row.expense_count == 0
+    assert rollup_row(db, test_user, next_day.date()).expense_inr == Decimal('250.50')
+    
+    db.delete(income)
+    db.delete(expense)
+    db.commit()
+    
+    assert rollup_row(db, test_user, day.date()) is None
+    assert rollup_row(db, test_user, next_day.date()) is None
+
+
+def test_rollup_matches_rebuild(db, test_user):
+    """Test the incrementally maintained rollup equals a full rebuild"""
+    maintained = load_daily_cashflow(db, str(test_user.user_id))
+    
+    rebuild_daily_cashflow(db, [str(test_user.user_id)])
+    rebuilt = load_daily_cashflow(db, str(test_user.user_id))
+    db.rollback()
+    
+    assert maintained.drop(columns='category_totals_inr').equals(rebuilt.drop(columns='category_totals_inr'))
+    
+    # Transaction totals agree with the raw table
+    total = db.query(Transaction).filter(Transaction.user_id == test_user.user_id).count()
+    assert int(maintained['income_count'].sum() + maintained['expense_count'].sum()) == total
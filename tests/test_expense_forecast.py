@@ -0,0 +1,46 @@
+import pytest
+from datetime import date, timedelta
+import pandas as pd
+from app.expense_forecast import forecast_expenses
+
+
+def make_cashflow(today, days=91):
+    """Rent of 700 every Saturday and food of 100 every other day"""
+    rows = {}
+    for offset in range(days):
+        day = today - timedelta(days=offset)
+        if day.weekday() == 5:
+            rows[day] = {'expense_inr': 700.0, 'expense_by_category_inr': {'rent': 700.0}}
+        else:
+            rows[day] = {'expense_inr': 100.0, 'expense_by_category_inr': {'food_delivery': 100.0}}
+    return pd.DataFrame.from_dict(rows, orient='index').sort_index()
+
+
+def test_forecast_follows_weekday_profile():
+    """Test each future day is priced at its weekday's average"""
+    today = date(2026, 3, 1)  # Sunday
+    forecast = forecast_expenses(make_cashflow(today), days=7, today=today)
+    
+    assert forecast['by_weekday']['saturday'] == pytest.approx(700.0)
+    assert forecast['by_weekday']['monday'] == pytest.approx(100.0)
+    assert forecast['total'] == pytest.approx(6 * 100.0 + 700.0)
+    
+    # Five days ahead stops before the Saturday
+    assert forecast_expenses(make_cashflow(today), days=5, today=today)['total'] == pytest.approx(500.0)
+
+
+def test_forecast_category_split():
+    """Test the category breakdown sums to the total"""
+    today = date(2026, 3, 1)
+    forecast = forecast_expenses(make_cashflow(today), days=30, today=today)
+    
+    assert set(forecast['by_category']) == {'rent', 'food_delivery'}
+    assert sum(forecast['by_category'].values()) == pytest.approx(forecast['total'])
+
+
+def test_forecast_without_history():
+    """Test an empty rollup forecasts zero"""
+    forecast = forecast_expenses(pd.DataFrame(), days=7, today=date(2026, 3, 1))
+    
+    assert forecast['total'] == 0
+    assert forecast['by_category'] == {}
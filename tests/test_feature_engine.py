@@ -0,0 +1,69 @@
+import pandas as pd
+import numpy as np
+from app.feature_engine import (
+    compute_weekly_features, _weekly_features_numpy, _weekly_features_pandas, AI_FEATURE_COLUMNS
+)
+
+
+def make_frame():
+    """Two weeks of transactions: Mon 2026-03-02 and Mon 2026-03-09"""
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime([
+            '2026-03-02 10:00', '2026-03-02 18:00', '2026-03-04 09:00',
+            '2026-03-05 12:00', '2026-03-08 23:00', '2026-03-10 08:00'
+        ]),
+        'amount': [1000.0, 3000.0, 2000.0, 500.0, 700.0, 300.0],
+        'type': ['credit', 'credit', 'credit', 'debit', 'debit', 'debit'],
+        'is_income': [True, True, True, False, False, False],
+        'category': ['freelancing', 'freelancing', 'upi_credit', 'rent', 'travel', 'travel'],
+        'balance': [0.0] * 6
+    })
+
+
+def test_compute_weekly_features_values():
+    """Test weekly feature values against hand-computed numbers"""
+    features = compute_weekly_features(make_frame())
+    
+    assert list(features.index) == [pd.Timestamp('2026-03-02'), pd.Timestamp('2026-03-09')]
+    
+    week = features.loc[pd.Timestamp('2026-03-02')]
+    assert week['total_income_inr'] == 6000.0
+    assert week['total_expense_inr'] == 1200.0
+    assert week['net_cashflow_inr'] == 4800.0
+    assert np.isclose(week['income_std_dev'], 1000.0)
+    assert np.isclose(week['income_volatility_ratio'], 1000.0 / (6000.0 / 7))
+    assert week['days_with_income'] == 2
+    assert week['days_without_income'] == 5
+    assert week['income_source_count'] == 2
+    assert np.isclose(week['top_income_source_pct'], 2 / 6000.0 * 100)
+    assert np.isclose(week['expense_std_dev'], np.std([500.0, 700.0], ddof=1))
+    
+    # Expense-only week
+    week = features.loc[pd.Timestamp('2026-03-09')]
+    assert week['total_income_inr'] == 0
+    assert week['income_std_dev'] == 0
+    assert week['days_with_income'] == 0
+    assert week['income_source_count'] == 0
+    assert week['expense_std_dev'] == 0
+
+
+def test_numpy_and_pandas_kernels_agree():
+    """Test both kernels produce the same features"""
+    rng = np.random.default_rng(7)
+    n = 500
+    is_income = rng.random(n) < 0.3
+    df = pd.DataFrame({
+        'timestamp': pd.Timestamp('2026-01-01') + pd.to_timedelta(np.sort(rng.uniform(0, 90 * 86400, n)), unit='s'),
+        'amount': np.round(rng.lognormal(7, 1, n), 2),
+        'is_income': is_income,
+        'category': np.where(is_income, rng.choice(['freelancing', 'upi_credit'], n), 'food_delivery')
+    })
+    
+    numpy_features = _weekly_features_numpy(df)
+    pandas_features = _weekly_features_pandas(df)
+    
+    assert list(numpy_features.index) == list(pandas_features.index)
+    assert np.allclose(
+        numpy_features[AI_FEATURE_COLUMNS].to_numpy(dtype=float),
+        pandas_features[AI_FEATURE_COLUMNS].to_numpy(dtype=float)
+    )
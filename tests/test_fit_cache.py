@@ -0,0 +1,39 @@
+import numpy as np
+from app.fit_cache import ArimaFitCache, fit_cache_key
+from app.fit_pool import ArimaFitPool
+
+
+def test_unchanged_series_skips_refit(daily_income_series):
+    """Test repeat forecasts on the same series reuse one fit"""
+    income = daily_income_series('moderate')
+    pool = ArimaFitPool(max_workers=0, max_pending=1, timeout_seconds=60, cache=ArimaFitCache(max_entries=8))
+    
+    first = pool.forecast(income, (1, 1, 1), 30)
+    again = pool.forecast(income, (1, 1, 1), 7)
+    
+    assert np.allclose(again, first[:7])
+    assert pool.stats()['completed'] == 1
+    assert pool.cache.stats()['hits'] == 1
+    
+    # A new day of data or another order is a different fit
+    pool.forecast(np.append(income, 1500.0), (1, 1, 1), 7)
+    pool.forecast(income, (2, 1, 1), 7)
+    assert pool.stats()['completed'] == 3
+
+
+def test_disk_cache_shared_across_instances(tmp_path, daily_income_series):
+    """Test fits written to disk are served by a fresh cache"""
+    income = daily_income_series('stable')
+    key = fit_cache_key(income, (1, 1, 1))
+    
+    writer = ArimaFitPool(max_workers=0, max_pending=1, timeout_seconds=60,
+                          cache=ArimaFitCache(max_entries=8, cache_dir=tmp_path))
+    expected = writer.forecast(income, (1, 1, 1), 30)
+    assert [path.name for path in tmp_path.iterdir()] == [f"{key}.npz"]
+    
+    reader = ArimaFitPool(max_workers=0, max_pending=1, timeout_seconds=60,
+                          cache=ArimaFitCache(max_entries=1, cache_dir=tmp_path))
+    
+    assert np.allclose(reader.forecast(income, (1, 1, 1), 30), expected)
+    assert reader.stats()['completed'] == 0
+    assert reader.cache.stats()['disk_hits'] == 1
@@ -0,0 +1,89 @@
+from concurrent.futures import Future
+import numpy as np
+from statsmodels.tsa.arima.model import ARIMA
+from app.fit_pool import ArimaFitPool
+from app.fit_cache import ArimaFitCache
+
+
+def test_pool_forecast_matches_in_process_fit(daily_income_series):
+    """Test a pooled fit returns the same forecast as fitting in-process"""
+    income = daily_income_series('moderate')
+    pool = ArimaFitPool(max_workers=1, max_pending=2, timeout_seconds=60)
+    
+    try:
+        pooled = pool.forecast(income, (1, 1, 1), 30)
+    finally:
+        pool.shutdown()
+    
+    assert np.allclose(pooled, ARIMA(income, order=(1, 1, 1)).fit().forecast(steps=30))
+    assert pool.stats()['completed'] == 1
+    assert pool.stats()['pending'] == 0
+
+
+class HeldExecutor:
+    """Stands in for the process pool: submitted fits stay running until released"""
+    
+    def __init__(self):
+        self.held = []
+        self.holding = True
+    
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_running_or_notify_cancel()
+        if self.holding:
+            self.held.append((future, fn, args))
+        else:
+            future.set_result(fn(*args))
+        return future
+    
+    def release(self):
+        """Finish every held fit and run later ones at once"""
+        self.holding = False
+        for future, fn, args in self.held:
+            future.set_result(fn(*args))
+        self.held = []
+    
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def test_saturated_or_slow_pool_falls_back(daily_income_series):
+    """Test fits beyond the queue limit are rejected and slow fits time out"""
+    income = daily_income_series('stable')
+    executor = HeldExecutor()
+    pool = ArimaFitPool(max_workers=1, max_pending=1, timeout_seconds=0.05)
+    pool._executor = executor
+    
+    # The held fit times out but is already running, so it keeps the only slot
+    assert pool.forecast(income, (1, 1, 1), 7) is None
+    assert pool.forecast(income, (1, 1, 1), 7) is None
+    
+    stats = pool.stats()
+    assert stats['timeouts'] == 1
+    assert stats['rejected'] == 1
+    assert stats['completed'] == 0
+    assert stats['pending'] == 1
+    
+    # Once the background fit finishes its slot is free again
+    executor.release()
+    assert pool.stats()['pending'] == 0
+    assert np.allclose(pool.forecast(income, (1, 1, 1), 7), ARIMA(income, order=(1, 1, 1)).fit().forecast(steps=7))
+    assert pool.stats()['completed'] == 1
+
+
+def test_timed_out_fit_is_cached_when_it_finishes(daily_income_series):
+    """Test a slow fit's late result serves the next request without a refit"""
+    income = daily_income_series('stable')
+    executor = HeldExecutor()
+    pool = ArimaFitPool(max_workers=1, max_pending=1, timeout_seconds=0.05, cache=ArimaFitCache(max_entries=8))
+    pool._executor = executor
+    
+    assert pool.forecast(income, (1, 1, 1), 7) is None
+    executor.release()
+    
+    forecast = pool.forecast(income, (1, 1, 1), 7)
+    assert np.allclose(forecast, ARIMA(income, order=(1, 1, 1)).fit().forecast(steps=7))
+    assert pool.cache.stats()['hits'] == 1
+    stats = pool.stats()
+    assert stats['timeouts'] == 1
+    assert stats['completed'] == 0
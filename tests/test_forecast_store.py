@@ -0,0 +1,87 @@
+import pytest
+import joblib
+import numpy as np
+from datetime import datetime, timedelta
+from app.data_generator import IndianTransactionGenerator
+from app.forecast_store import FORECAST_PATH_DAYS, load_forecast_path, touch_forecast_path
+from app.ml_service_enhanced import EnhancedMLService
+from app.models import BankAccount, ForecastPath, Transaction
+
+
+@pytest.fixture
+def stored_path(db, test_user, tmp_path):
+    """A rolling mean forecast path in the store for the test user"""
+    user_id = str(test_user.user_id)
+    joblib.dump({'window': 30, 'mean': 1000.0, 'std': 200.0}, tmp_path / f"rolling_mean_{user_id}.pkl")
+    
+    ml_service = EnhancedMLService(db)
+    ml_service.models_dir = tmp_path
+    model_used = ml_service.store_forecast_path(user_id)
+    
+    yield ml_service, model_used
+    
+    db.rollback()
+    db.query(ForecastPath).filter(ForecastPath.user_id == test_user.user_id).delete()
+    db.commit()
+
+
+def test_predictions_read_stored_path(db, test_user, tmp_path, stored_path):
+    """Test predictions come from the store once the model files are gone"""
+    ml_service, model_used = stored_path
+    user_id = str(test_user.user_id)
+    _, live_path = ml_service.live_forecast_path(user_id, FORECAST_PATH_DAYS)
+    
+    (tmp_path / f"rolling_mean_{user_id}.pkl").unlink()
+    assert ml_service.live_forecast_path(user_id, 7) is None
+    
+    stored_model, stored_path = load_forecast_path(db, user_id, FORECAST_PATH_DAYS)
+    predictions = ml_service.predict_cashflow_enhanced_horizons(user_id, [7, 30, 90])
+    
+    assert model_used == stored_model == "Rolling Mean (Pre-trained)"
+    for key, values in live_path.items():
+        assert np.allclose(stored_path[key], values)
+    assert predictions[30]['model_used'] == model_used
+    assert predictions[30]['expected_inflow_inr'] == 30000
+
+
+def test_stale_paths_are_not_served(db, test_user, stored_path):
+    """Test age, horizon length and new transactions each invalidate the path"""
+    user_id = str(test_user.user_id)
+    assert load_forecast_path(db, user_id, FORECAST_PATH_DAYS) is not None
+    
+    # Longer than the stored path, or requested days past its end
+    assert load_forecast_path(db, user_id, FORECAST_PATH_DAYS + 1) is None
+    later = datetime.utcnow().date() + timedelta(days=5)
+    assert load_forecast_path(db, user_id, FORECAST_PATH_DAYS - 5, today=later) is not None
+    assert load_forecast_path(db, user_id, FORECAST_PATH_DAYS - 4, today=later) is None
+    
+    # Trained too long ago
+    assert load_forecast_path(db, user_id, 7, today=datetime.utcnow().date() + timedelta(days=30)) is None
+    
+    # Enough transactions added since training
+    account = db.query(BankAccount).filter(BankAccount.user_id == test_user.user_id).first()
+    generator = IndianTransactionGenerator(pattern='moderate')
+    for txn_data in generator.generate_transactions(user_id, str(account.account_id), months=1)[:10]:
+        db.add(Transaction(**txn_data))
+    db.flush()
+    
+    assert load_forecast_path(db, user_id, 7) is None
+
+
+def test_touched_path_is_served_again_unchanged(db, test_user, stored_path):
+    """Test an unchanged user's aged path is restamped instead of recomputed"""
+    user_id = str(test_user.user_id)
+    _, path = load_forecast_path(db, user_id, 7)
+    db.query(ForecastPath).filter(ForecastPath.user_id == test_user.user_id).update(
+        {'trained_at': datetime.utcnow() - timedelta(days=30)}
+    )
+    assert load_forecast_path(db, user_id, 7) is None
+    
+    assert touch_forecast_path(db, user_id, datetime.utcnow()) == "Rolling Mean (Pre-trained)"
+    model_used, touched = load_forecast_path(db, user_id, 7)
+    assert model_used == "Rolling Mean (Pre-trained)"
+    for key, values in path.items():
+        assert np.allclose(touched[key], values)
+    
+    db.query(ForecastPath).filter(ForecastPath.user_id == test_user.user_id).delete()
+    assert touch_forecast_path(db, user_id, datetime.utcnow()) is None
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+from app.fourier_model import FourierForecaster, save_fourier_artifact, load_fourier_artifact
+from app.ml_service_enhanced import EnhancedMLService
+from app.model_registry import model_artifact_path, load_model_artifact
+
+
+def test_fit_recovers_trend_and_weekly_pattern():
+    """Test a trend plus weekday effect is extrapolated, with an interval around it"""
+    rng = np.random.default_rng(0)
+    ds = pd.date_range('2024-01-01', periods=208, freq='D')
+    weekday = ds.dayofweek.to_numpy()
+    truth = 1000 + 3 * np.arange(len(ds)) + 400 * np.sin(2 * np.pi * weekday / 7)
+    y = truth + rng.normal(0, 100, len(ds))
+    
+    model = FourierForecaster.fit(ds[:180], y[:180])
+    forecast = model.forecast(28)
+    
+    assert np.abs(forecast - truth[180:]).mean() < 60
+    # The weekly shape survives, not just the level
+    assert np.corrcoef(forecast - forecast.mean(), truth[180:] - truth[180:].mean())[0, 1] > 0.95
+    lower, upper = model.interval
+    assert lower < 0 < upper
+
+
+def test_artifact_round_trip(tmp_path, daily_income_series):
+    """Test the .npz artifact reproduces the forecast (fit time: scripts/benchmark_fourier_fit.py)"""
+    y = daily_income_series('moderate')
+    ds = pd.date_range('2024-01-01', periods=len(y), freq='D')
+    model = FourierForecaster.fit(ds, y)
+    
+    path = save_fourier_artifact(model, tmp_path / "fourier_user")
+    assert path == model_artifact_path(tmp_path, 'fourier', 'user')
+    assert path.stat().st_size < 4096
+    
+    for loaded in [load_fourier_artifact(path), load_model_artifact(path)]:
+        assert isinstance(loaded, FourierForecaster)
+        assert np.allclose(loaded.forecast(60), model.forecast(60))
+        assert loaded.interval == model.interval
+
+
+def test_service_serves_fourier_model(db, test_user, tmp_path, daily_income_series):
+    """Test a user whose only artifact is a Fourier model gets its path"""
+    user_id = str(test_user.user_id)
+    y = daily_income_series('stable')
+    model = FourierForecaster.fit(pd.date_range('2024-01-01', periods=len(y), freq='D'), y)
+    save_fourier_artifact(model, tmp_path / f"fourier_{user_id}")
+    
+    ml_service = EnhancedMLService(db)
+    ml_service.models_dir = tmp_path
+    model_used, path = ml_service.live_forecast_path(user_id, 30)
+    
+    assert model_used == "Fourier (Pre-trained)"
+    assert np.allclose(path['forecast'], np.maximum(model.forecast(30), 0))
+    assert np.all(path['lower'] <= path['forecast'])
+    assert np.all(path['forecast'] <= path['upper'])
+    assert ml_service.get_model_info(user_id)['models']['fourier']['available']
@@ -0,0 +1,117 @@
+import pytest
+import uuid
+from datetime import date, datetime, timedelta
+import joblib
+import numpy as np
+from app.global_model import (
+    HISTORY_DAYS, PROFILE_COLUMNS, GLOBAL_MODEL_FILENAME, train_global_model,
+    load_latest_profiles, load_recent_history, day_number
+)
+from app.models import AIFeature
+from app.model_manifest import record_model_version
+from app.ml_service_enhanced import EnhancedMLService
+
+
+@pytest.fixture
+def synthetic_series(daily_income_series, training_series):
+    """Training series for a handful of synthetic users of each income pattern"""
+    values = [daily_income_series(pattern) for pattern in ['stable', 'moderate', 'volatile'] * 2]
+    return training_series(values), values
+
+
+def test_batch_paths_match_single_user_paths(synthetic_series):
+    """Test one vectorized call equals per-user calls, with ordered quantiles and cold start"""
+    series, values = synthetic_series
+    model = train_global_model(series, {}, max_horizon=30, max_iter=30)
+    
+    history = np.full((len(values) + 1, HISTORY_DAYS), np.nan)
+    for i, v in enumerate(values):
+        history[i] = v[-HISTORY_DAYS:]
+    profiles = np.full((len(history), len(PROFILE_COLUMNS)), np.nan)
+    
+    batch = model.predict_paths(history, profiles, 20000, 45)
+    
+    assert batch['forecast'].shape == (len(history), 45)
+    assert np.all(batch['lower'] <= batch['forecast'])
+    assert np.all(batch['forecast'] <= batch['upper'])
+    # The last row has no history at all and still gets a forecast
+    assert np.all(np.isfinite(batch['forecast'][-1])) and batch['forecast'][-1].sum() > 0
+    
+    for i in [0, 2, len(history) - 1]:
+        single = model.predict_paths(history[i:i + 1], profiles[i:i + 1], 20000, 45)
+        for name, paths in batch.items():
+            assert np.allclose(single[name][0], paths[i])
+
+
+def test_service_serves_global_model_for_any_user(db, test_user, tmp_path, synthetic_series):
+    """Test users without per-user models get the shared artifact, in batch or alone"""
+    series, _ = synthetic_series
+    joblib.dump(train_global_model(series, {}, max_horizon=30, max_iter=30), tmp_path / GLOBAL_MODEL_FILENAME)
+    
+    ml_service = EnhancedMLService(db)
+    ml_service.models_dir = tmp_path
+    user_id, new_user_id = str(test_user.user_id), str(uuid.uuid4())
+    
+    batch = ml_service.global_forecast_batch([user_id, new_user_id], 30)
+    assert set(batch) == {user_id, new_user_id}
+    assert np.allclose(ml_service.pretrained_global_path(user_id, 30)['forecast'], batch[user_id]['forecast'])
+    
+    model_used, path = ml_service.live_forecast_path(new_user_id, 30)
+    assert model_used == "Global GBM (Pre-trained)"
+    assert np.allclose(path['forecast'], batch[new_user_id]['forecast'])
+    
+    # Model info reads the manifest, where training records the shared model without a user
+    assert ml_service.get_model_info(new_user_id)['models']['global'] == {'available': False}
+    try:
+        record_model_version(db, None, 'global', tmp_path / GLOBAL_MODEL_FILENAME, 'HistGradientBoosting')
+        db.flush()
+        info = ml_service.get_model_info(new_user_id)['models']['global']
+        assert info['available'] is True
+        assert info['path'] == str(tmp_path / GLOBAL_MODEL_FILENAME)
+        assert info['version'] == '1'
+    finally:
+        db.rollback()
+
+
+def test_serving_profiles_skip_the_partial_week(db, test_user):
+    """Test only weeks completed by the origin are served, as in training"""
+    completed = AIFeature(user_id=test_user.user_id, week_start_date=datetime(2001, 1, 1), avg_daily_income=100)
+    partial = AIFeature(user_id=test_user.user_id, week_start_date=datetime(2001, 1, 8), avg_daily_income=40)
+    db.add_all([completed, partial])
+    db.commit()
+    
+    try:
+        column = PROFILE_COLUMNS.index('avg_daily_income')
+        user_ids = [str(test_user.user_id)]
+        
+        # The week of 2001-01-08 is still running on the 12th
+        assert load_latest_profiles(db, user_ids, date(2001, 1, 12))[0, column] == 100
+        assert load_latest_profiles(db, user_ids, date(2001, 1, 14))[0, column] == 40
+        assert np.isnan(load_latest_profiles(db, user_ids, date(2001, 1, 6))).all()
+    finally:
+        db.delete(completed)
+        db.delete(partial)
+        db.commit()
+
+
+def test_serving_history_ends_before_the_origin_day(db, test_user, tmp_path, synthetic_series):
+    """Test the incomplete origin day is left out of the history and paths start the day after"""
+    series, _ = synthetic_series
+    model = train_global_model(series, {}, max_horizon=30, max_iter=30)
+    joblib.dump(model, tmp_path / GLOBAL_MODEL_FILENAME)
+    
+    ml_service = EnhancedMLService(db)
+    ml_service.models_dir = tmp_path
+    user_ids = [str(test_user.user_id)]
+    origin = date.today()
+    yesterday = origin - timedelta(days=1)
+    
+    batch = ml_service.global_forecast_batch(user_ids, 30, origin=origin)
+    expected = model.predict_paths(
+        load_recent_history(db, user_ids, yesterday), load_latest_profiles(db, user_ids, yesterday),
+        day_number(yesterday), 31
+    )
+    
+    assert len(batch[user_ids[0]]['forecast']) == 30
+    for name, paths in expected.items():
+        assert np.allclose(batch[user_ids[0]][name], paths[0, 1:])
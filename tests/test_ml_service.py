@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 from datetime import datetime, timedelta
 from decimal import Decimal
 from app.ml_service import MLService
@@ -161,6 +162,51 @@ def test_save_prediction(db, test_user):
     assert prediction.expected_inflow_inr >= 0
 
 
+def test_save_predictions_from_one_forecast_path(db, test_user, tmp_path):
+    """Test every window is a prefix of one pre-trained ARIMA forecast"""
+    from statsmodels.tsa.arima.model import ARIMA
+    from app.arima_artifact import save_arima_artifact
+    from app.ml_service_enhanced import EnhancedMLService
+    from app.models import BankAccount
+    
+    generator = IndianTransactionGenerator(pattern='moderate')
+    account = db.query(BankAccount).filter(
+        BankAccount.user_id == test_user.user_id
+    ).first()
+    
+    transactions = generator.generate_transactions(
+        str(test_user.user_id),
+        str(account.account_id),
+        months=3
+    )
+    
+    for txn_data in transactions:
+        db.add(Transaction(**txn_data))
+    db.commit()
+    
+    user_id = str(test_user.user_id)
+    ml_service = EnhancedMLService(db)
+    ml_service.models_dir = tmp_path
+    
+    income = np.array([float(t['amount_inr']) for t in transactions if t['is_income']][-60:])
+    save_arima_artifact(ARIMA(income, order=(2, 1, 1)).fit(), tmp_path / f"arima_{user_id}")
+    
+    predictions = ml_service.save_predictions(user_id, [60, 7, 30, 7])
+    
+    assert [p.prediction_window_days for p in predictions] == [7, 30, 60]
+    assert len({p.prediction_date for p in predictions}) == 1
+    
+    for prediction in predictions:
+        days = prediction.prediction_window_days
+        arima = ml_service.predict_with_pretrained_arima(user_id, days)
+        expenses = ml_service._predict_expenses(user_id, days)
+        
+        assert prediction.model_used == "ARIMA (Pre-trained)"
+        assert float(prediction.expected_inflow_inr) == pytest.approx(arima['forecast'], abs=0.01)
+        assert float(prediction.expected_outflow_inr) == pytest.approx(expenses, abs=0.01)
+        assert float(prediction.lower_bound_inr) == pytest.approx(arima['lower'] - expenses, abs=0.01)
+
+
 def test_calculate_safe_to_spend(db, test_user):
     """Test safe-to-spend calculation"""
     # Generate test transactions
@@ -261,3 +307,114 @@ def test_generate_insights(db, test_user):
     ).all()
     
     assert len(all_insights) >= 0  # May or may not generate insights depending on data
+
+
+def test_extract_features_incremental_matches_full_rebuild(db, test_user):
+    """Test incremental extraction picks up edited transactions"""
+    generator = IndianTransactionGenerator(pattern='moderate')
+    
+    from app.models import BankAccount, FeatureWatermark
+    account = db.query(BankAccount).filter(
+        BankAccount.user_id == test_user.user_id
+    ).first()
+    
+    transactions = generator.generate_transactions(
+        str(test_user.user_id),
+        str(account.account_id),
+        months=2
+    )
+    
+    for txn_data in transactions:
+        txn = Transaction(**txn_data)
+        db.add(txn)
+    db.commit()
+    
+    ml_service = MLService(db)
+    ml_service.extract_features(str(test_user.user_id))
+    
+    watermark = db.query(FeatureWatermark).filter(
+        FeatureWatermark.user_id == test_user.user_id
+    ).first()
+    assert watermark is not None
+    assert watermark.dirty_since is None
+    
+    # Edit an income transaction from a couple of weeks ago
+    edited = db.query(Transaction).filter(
+        Transaction.user_id == test_user.user_id,
+        Transaction.is_income == True,
+        Transaction.txn_timestamp <= datetime.utcnow() - timedelta(days=14)
+    ).order_by(Transaction.txn_timestamp.desc()).first()
+    edited.amount_inr = edited.amount_inr + Decimal('1.00')
+    db.commit()
+    
+    db.refresh(watermark)
+    assert watermark.dirty_since is not None
+    assert watermark.dirty_since <= edited.txn_timestamp
+    
+    ml_service.extract_features(str(test_user.user_id))
+    
+    week_start = datetime.combine(
+        (edited.txn_timestamp - timedelta(days=edited.txn_timestamp.weekday())).date(),
+        datetime.min.time()
+    )
+    incremental = db.query(AIFeature).filter(
+        AIFeature.user_id == test_user.user_id,
+        AIFeature.week_start_date == week_start
+    ).first()
+    incremental_income = incremental.total_income_inr
+    
+    ml_service.extract_features(str(test_user.user_id), full_rebuild=True)
+    db.refresh(incremental)
+    
+    assert incremental.total_income_inr == incremental_income
+    db.refresh(watermark)
+    assert watermark.dirty_since is None
+
+
+def test_sql_feature_engine_matches_python(db, test_user):
+    """Test the PostgreSQL feature engine agrees with the Python kernel"""
+    from app.feature_engine import compute_weekly_features, fetch_weekly_features_sql, AI_FEATURE_COLUMNS
+    
+    ml_service = MLService(db)
+    df = ml_service.preprocess_transactions(str(test_user.user_id), months=6)
+    if df.empty:
+        pytest.skip("Test user has no recent transactions")
+    
+    python_features = compute_weekly_features(df)
+    sql_features = fetch_weekly_features_sql(db, str(test_user.user_id))
+    
+    assert list(sql_features.index) == list(python_features.index)
+    assert np.allclose(
+        sql_features[AI_FEATURE_COLUMNS].to_numpy(dtype=float),
+        python_features[AI_FEATURE_COLUMNS].to_numpy(dtype=float)
+    )
+
+
+def test_batch_apis_match_single_user(db, test_user):
+    """Test the batch feature and income source APIs agree with the per-user ones"""
+    from app.models import IncomeSource
+    
+    user_id = str(test_user.user_id)
+    ml_service = MLService(db)
+    
+    def snapshot():
+        features = db.query(AIFeature).filter(
+            AIFeature.user_id == test_user.user_id
+        ).order_by(AIFeature.week_start_date).all()
+        sources = db.query(IncomeSource).filter(
+            IncomeSource.user_id == test_user.user_id
+        ).order_by(IncomeSource.source_category).all()
+        return (
+            [(f.week_start_date, f.total_income_inr, f.income_std_dev, f.days_with_income) for f in features],
+            [(s.source_category, s.avg_monthly_inr, s.contribution_pct, s.stability_score) for s in sources]
+        )
+    
+    ml_service.extract_features(user_id, full_rebuild=True)
+    ml_service.update_income_sources(user_id)
+    single = snapshot()
+    
+    assert ml_service.analyze_users_batch([user_id]) == 1
+    db.expire_all()
+    batch = snapshot()
+    
+    assert batch == single
@@ -0,0 +1,96 @@
+import pytest
+import joblib
+from datetime import datetime, timedelta
+from statsmodels.tsa.arima.model import ARIMA
+from app.arima_artifact import save_arima_artifact
+from app.ml_service_enhanced import EnhancedMLService
+from app.model_manifest import record_model_version, mark_preferred, load_manifest, training_watermark
+from app.models import ModelVersion, ModelMetric
+
+
+@pytest.fixture
+def manifest_user(db, test_user, tmp_path, daily_income_series):
+    """Test user with ARIMA and rolling mean artifacts recorded in the manifest"""
+    user_id = str(test_user.user_id)
+    
+    arima_path = save_arima_artifact(ARIMA(daily_income_series('stable'), order=(1, 1, 1)).fit(), tmp_path / "arima")
+    rolling_path = tmp_path / "rolling_mean.pkl"
+    joblib.dump({'window': 30, 'mean': 1000.0, 'std': 200.0}, rolling_path)
+    
+    record_model_version(db, user_id, 'rolling_mean', rolling_path, 'Rolling Mean', metrics={'mae': 250.0})
+    record_model_version(db, user_id, 'arima', arima_path, 'ARIMA', metrics={'mae': 180.0})
+    mark_preferred(db, user_id)
+    db.commit()
+    
+    yield user_id
+    
+    db.rollback()
+    versions = db.query(ModelVersion).filter(ModelVersion.user_id == test_user.user_id)
+    db.query(ModelMetric).filter(
+        ModelMetric.version_id.in_(versions.with_entities(ModelVersion.version_id).scalar_subquery())
+    ).delete(synchronize_session=False)
+    versions.delete()
+    db.commit()
+
+
+def test_manifest_versions_and_preference(db, manifest_user, tmp_path):
+    """Test retraining adds a version and the preference follows priority"""
+    manifest = load_manifest(db, manifest_user)
+    
+    assert [version.model_name for version in manifest] == ['arima', 'rolling_mean']
+    assert manifest[0].is_preferred and not manifest[1].is_preferred
+    assert float(manifest[0].metrics[0].metric_value) == 180.0
+    
+    record_model_version(db, manifest_user, 'rolling_mean', tmp_path / "rolling_mean.pkl", 'Rolling Mean')
+    db.commit()
+    
+    versions = db.query(ModelVersion).filter(
+        ModelVersion.user_id == manifest_user, ModelVersion.model_name == 'rolling_mean'
+    ).order_by(ModelVersion.version_number).all()
+    
+    assert [(v.version_number, v.is_active) for v in versions] == [('1', False), ('2', True)]
+    assert load_manifest(db, manifest_user)[0].model_name == 'arima'
+
+
+def test_serving_loads_only_the_preferred_model(db, manifest_user, tmp_path):
+    """Test predictions load the manifest's preferred artifact and nothing else"""
+    ml_service = EnhancedMLService(db)
+    ml_service.models_dir = tmp_path / "unused"
+    
+    loaded = []
+    load_pretrained_model = ml_service.load_pretrained_model
+    
+    def tracking_load(user_id, model_type, model_path=None):
+        loaded.append(model_type)
+        return load_pretrained_model(user_id, model_type, model_path)
+    
+    ml_service.load_pretrained_model = tracking_load
+    
+    model_used, path = ml_service.live_forecast_path(manifest_user, 30)
+    
+    assert model_used == "ARIMA (Pre-trained)"
+    assert loaded == ['arima']
+    assert len(path['forecast']) == 30
+    
+    info = ml_service.get_model_info(manifest_user)
+    assert info['models']['arima']['preferred'] is True
+    assert info['models']['rolling_mean']['version'] == '1'
+    assert info['models']['prophet'] == {'available': False}
+
+
+def test_training_watermark(db, manifest_user, tmp_path):
+    """Test the watermark needs every active model to have one and its artifact"""
+    assert training_watermark(db, manifest_user) is None
+    
+    watermark = datetime(2024, 6, 1, 12, 0)
+    record_model_version(db, manifest_user, 'arima', tmp_path / "arima.npz", 'ARIMA', data_watermark=watermark)
+    record_model_version(db, manifest_user, 'rolling_mean', tmp_path / "rolling_mean.pkl", 'Rolling Mean',
+                         data_watermark=watermark + timedelta(days=1))
+    db.commit()
+    assert training_watermark(db, manifest_user) == watermark
+    # A model type missing from the last run (failed or timed out) is stale
+    assert training_watermark(db, manifest_user, ['arima', 'rolling_mean']) == watermark
+    assert training_watermark(db, manifest_user, ['arima', 'fourier', 'rolling_mean']) is None
+    
+    (tmp_path / "rolling_mean.pkl").unlink()
+    assert training_watermark(db, manifest_user) is None
@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+import joblib
+from app.model_registry import ModelRegistry
+
+
+class CountingLoader:
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+        self.lock = threading.Lock()
+    
+    def __call__(self, path):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return joblib.load(path)
+
+
+def test_registry_caches_and_counts(tmp_path):
+    """Test repeated loads are served from memory"""
+    path = tmp_path / "rolling_mean_user.pkl"
+    joblib.dump({'mean': 100.0, 'std': 10.0}, path)
+    
+    loader = CountingLoader()
+    registry = ModelRegistry(max_bytes=1024 * 1024, loader=loader)
+    
+    for _ in range(3):
+        assert registry.get(path) == {'mean': 100.0, 'std': 10.0}
+    
+    assert loader.calls == 1
+    stats = registry.stats()
+    assert stats['hits'] == 2
+    assert stats['misses'] == 1
+    assert stats['entries'] == 1
+    
+    assert registry.get(tmp_path / "missing.pkl") is None
+
+
+def test_registry_reloads_changed_file(tmp_path):
+    """Test a retrained artifact replaces the cached one"""
+    path = tmp_path / "rolling_mean_user.pkl"
+    joblib.dump({'mean': 100.0}, path)
+    
+    registry = ModelRegistry(max_bytes=1024 * 1024)
+    assert registry.get(path) == {'mean': 100.0}
+    
+    joblib.dump({'mean': 200.0}, path)
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    
+    assert registry.get(path) == {'mean': 200.0}
+    assert registry.stats()['misses'] == 2
+
+
+def test_registry_evicts_least_recently_used(tmp_path):
+    """Test the byte bound evicts the oldest entry"""
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"model_{i}.pkl"
+        joblib.dump(list(range(200)), path)
+        paths.append(path)
+    
+    size = paths[0].stat().st_size
+    registry = ModelRegistry(max_bytes=2 * size)
+    
+    registry.get(paths[0])
+    registry.get(paths[1])
+    registry.get(paths[0])  # model_1 is now least recently used
+    registry.get(paths[2])
+    
+    stats = registry.stats()
+    assert stats['evictions'] == 1
+    assert stats['entries'] == 2
+    assert stats['bytes'] <= 2 * size
+    
+    registry.get(paths[0])
+    assert registry.stats()['misses'] == 3
+
+
+def test_registry_loads_once_under_concurrency(tmp_path):
+    """Test concurrent requests for one artifact deserialize it once"""
+    path = tmp_path / "arima_user.pkl"
+    joblib.dump({'order': (1, 1, 1)}, path)
+    
+    loader = CountingLoader(delay=0.05)
+    registry = ModelRegistry(max_bytes=1024 * 1024, loader=loader)
+    
+    threads = [threading.Thread(target=registry.get, args=(path,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert loader.calls == 1
+    assert registry.stats()['hits'] == 7
+
+
+def test_registry_keeps_no_locks_for_failed_or_missing_loads(tmp_path):
+    """Test misses and loader errors leave no per-key state and clear resets everything"""
+    corrupt = tmp_path / "arima_corrupt.pkl"
+    corrupt.write_bytes(b"not a pickle")
+    path = tmp_path / "rolling_mean_user.pkl"
+    joblib.dump({'mean': 100.0}, path)
+    
+    registry = ModelRegistry(max_bytes=1024 * 1024)
+    
+    for i in range(5):
+        assert registry.get(tmp_path / f"missing_{i}.pkl") is None
+        try:
+            registry.get(corrupt)
+        except Exception:
+            pass
+        else:
+            raise AssertionError("corrupt artifact loaded")
+    
+    assert registry._load_locks == {}
+    stats = registry.stats()
+    assert stats['misses'] == 5
+    assert stats['entries'] == 0
+    
+    registry.get(path)
+    assert list(registry._load_locks) == [str(path)]
+    registry.clear()
+    assert registry._load_locks == {}
+    assert registry.stats()['entries'] == 0
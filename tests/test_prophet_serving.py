@@ -0,0 +1,60 @@
+import pytest
+import numpy as np
+import pandas as pd
+from app.prophet_serving import (
+    RESIDUAL_INTERVAL_ATTR, attach_residual_interval, forecast_future, residual_interval
+)
+
+
+@pytest.fixture
+def fit_prophet(daily_income_series):
+    """Prophet configured like train_models, fitted on a synthetic user"""
+    def fit(pattern, months):
+        try:
+            from prophet import Prophet
+            model = Prophet(
+                daily_seasonality=False,
+                weekly_seasonality=True,
+                yearly_seasonality=False,
+                changepoint_prior_scale=0.05,
+                seasonality_prior_scale=0.1,
+                interval_width=0.95
+            )
+        except Exception as e:
+            pytest.skip(f"Prophet backend not available: {e}")
+        
+        y = daily_income_series(pattern, months=months)
+        model.fit(pd.DataFrame({'ds': pd.date_range('2025-01-01', periods=len(y), freq='D'), 'y': y}))
+        return model
+    return fit
+
+
+def test_future_forecast_matches_prophet_predict(fit_prophet):
+    """Test the fast path reproduces Prophet's point forecast for future dates only"""
+    model = fit_prophet('moderate', months=12)
+    attach_residual_interval(model)
+    
+    expected = model.predict(model.make_future_dataframe(periods=30, freq='D')).tail(30)
+    forecast = forecast_future(model, 30)
+    
+    assert len(forecast) == 30
+    assert (forecast['ds'].to_numpy() == expected['ds'].to_numpy()).all()
+    assert np.allclose(forecast['yhat'], expected['yhat'])
+    assert (forecast['yhat_lower'] < forecast['yhat']).all()
+    assert (forecast['yhat'] < forecast['yhat_upper']).all()
+
+
+def test_residual_interval_for_legacy_models(fit_prophet):
+    """Test models pickled without stored quantiles get them on first use"""
+    model = fit_prophet('volatile', months=6)
+    assert getattr(model, RESIDUAL_INTERVAL_ATTR, None) is None
+    
+    lower, upper = residual_interval(model)
+    
+    assert getattr(model, RESIDUAL_INTERVAL_ATTR) == (lower, upper)
+    
+    # Roughly interval_width of the training days fall inside the band
+    in_sample = model.predict()
+    resid = model.history['y'].to_numpy() - in_sample['yhat'].to_numpy()
+    coverage = np.mean((resid >= lower) & (resid <= upper))
+    assert coverage == pytest.approx(model.interval_width, abs=0.02)
@@ -0,0 +1,22 @@
+import os
+import subprocess
+import sys
+
+# Imported on first use only; loading them at startup costs every API
+# worker about a second and 100 MB
+LAZY_MODULES = ['statsmodels', 'prophet', 'cmdstanpy', 'matplotlib', 'scipy']
+
+
+def test_app_startup_does_not_import_ml_packages():
+    """Test importing app.main leaves the heavy ML packages unloaded"""
+    probe = (
+        "import sys, app.main; "
+        f"print(','.join(name for name in {LAZY_MODULES!r} if name in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', probe],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True, text=True, check=True
+    )
+    
+    assert result.stdout.strip() == ''
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import event, insert
+from app.ml_service import MLService
+from app.models import Transaction, TransactionType, MerchantCategory, BankAccount
+from app.timeline import get_timeline, load_transaction_frame
+
+
+def count_transaction_queries(db):
+    """Start counting SELECTs on the transactions table; returns the counts and a stop function"""
+    engine = db.get_bind()
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and 'FROM transactions' in statement:
+            statements.append(statement)
+    
+    event.listen(engine, 'before_cursor_execute', record)
+    return statements, lambda: event.remove(engine, 'before_cursor_execute', record)
+
+
+def transaction_values(user, account, amount):
+    """Columns of an income transaction an hour ago, inside every analysis window"""
+    return dict(
+        user_id=user.user_id,
+        account_id=account.account_id,
+        txn_timestamp=datetime.utcnow() - timedelta(hours=1),
+        amount_inr=Decimal(amount),
+        txn_type=TransactionType.CREDIT,
+        balance_after_txn=Decimal('50000.00'),
+        description='timeline test',
+        merchant_category=MerchantCategory.FREELANCING,
+        is_income=True
+    )
+
+
+def test_analyses_in_a_session_share_one_query(db, test_user):
+    """Test several analyses issue one transactions query and narrower windows are slices"""
+    user_id = str(test_user.user_id)
+    statements, stop = count_transaction_queries(db)
+    
+    try:
+        ml_service = MLService(db)
+        six_months = ml_service.preprocess_transactions(user_id, months=6)
+        three_months = ml_service.preprocess_transactions(user_id, months=3)
+        timeline = get_timeline(db, user_id)
+        recent = timeline.raw(30)
+        timeline.frame(months=6)
+    finally:
+        stop()
+    
+    assert len(statements) == 1
+    assert len(three_months) <= len(six_months)
+    
+    # The 30-day window is the cached frame cut at the same anchor
+    expected = load_transaction_frame(db, user_id, timeline._anchor - timedelta(days=30))
+    assert len(recent) == len(expected)
+    assert recent['amount'].tolist() == expected['amount'].tolist()
+
+
+def test_writes_and_rollback_invalidate_the_timeline(db, test_user):
+    """Test a flushed or bulk-inserted transaction is seen on re-analysis and a rollback discards it"""
+    user_id = str(test_user.user_id)
+    account = db.query(BankAccount).filter(BankAccount.user_id == test_user.user_id).first()
+    timeline = get_timeline(db, user_id)
+    
+    def recent_amounts():
+        recent = timeline.raw(30)
+        return set() if recent.empty else set(recent['amount'].round(2).tolist())
+    
+    before = recent_amounts()
+    
+    try:
+        db.add(Transaction(**transaction_values(test_user, account, '12345.67')))
+        db.flush()
+        assert 12345.67 in recent_amounts()
+        
+        db.execute(insert(Transaction), [transaction_values(test_user, account, '23456.78')])
+        assert 23456.78 in recent_amounts()
+    finally:
+        # Never committed: the rollback also cleans up
+        db.rollback()
+    
+    after = recent_amounts()
+    assert 12345.67 not in after and 23456.78 not in after
+    assert after == before
@@ -0,0 +1,106 @@
+import pytest
+import json
+import signal
+import pandas as pd
+from app.models import Transaction
+from scripts.train_models import (
+    fit_model, load_checkpoint, append_checkpoint, summarize, get_users_with_sufficient_data
+)
+
+
+@pytest.fixture
+def income_frame(daily_income_series):
+    """Zero-filled daily income in the ds/y layout the trainers take"""
+    def frame(pattern):
+        y = daily_income_series(pattern)
+        return pd.DataFrame({'ds': pd.date_range('2024-01-01', periods=len(y), freq='D'), 'y': y})
+    return frame
+
+
+def test_fit_model_reports_time_and_failures(tmp_path, income_frame):
+    """Test a fit returns its result and time, and timeouts or errors become reasons"""
+    data = income_frame('moderate')
+    
+    fit = fit_model('rolling_mean', data, 'user', 60, tmp_path)
+    assert fit['error'] is None
+    assert fit['result']['model_path'] == str(tmp_path / "rolling_mean_user.pkl")
+    assert fit['seconds'] >= 0
+    
+    fit = fit_model('arima', data, 'user', 0.0001, tmp_path)
+    assert fit['result'] is None
+    assert fit['error'] == "timed out after 0.0001s"
+    assert not (tmp_path / "arima_user.npz").exists()
+    
+    fit = fit_model('arima', data.head(30), 'user', 60, tmp_path)
+    assert fit['error'] == "ValueError: Insufficient data for ARIMA (need 60+ days)"
+
+
+def test_checkpoint_resume_and_summary(tmp_path):
+    """Test finished users survive an interrupted write and feed the summary"""
+    path = tmp_path / "training_checkpoint.jsonl"
+    trained = {
+        'user_id': 'a', 'preferred': 'ARIMA (v1)', 'forecast_path': 'ARIMA (Pre-trained)',
+        'models': {
+            'arima': {'status': 'trained', 'seconds': 2.0, 'mae': 100.0, 'error': None},
+            'prophet': {'status': 'failed', 'seconds': 5.0, 'mae': None, 'error': 'timed out after 5s'}
+        }
+    }
+    append_checkpoint(trained, path)
+    append_checkpoint({'user_id': 'b', 'skipped': 'insufficient income data', 'models': {}}, path)
+    with open(path, 'a') as f:
+        f.write(json.dumps(trained)[:20])
+    
+    records = load_checkpoint(path)
+    assert sorted(records) == ['a', 'b']
+    
+    summary = summarize(list(records.values()))
+    assert summary['total_users'] == 2
+    assert summary['skipped_users'] == 1
+    assert summary['failed_users'] == 0
+    assert summary['models']['arima']['fit_seconds']['max'] == 2.0
+    assert summary['models']['prophet']['failure_reasons'] == {'timed out after 5s': 1}
+    assert summary['models']['rolling_mean']['fit_seconds'] is None
+
+
+def test_arima_warm_start_from_previous_artifact(tmp_path, income_frame):
+    """Test a retrain with new days starts from the previous fit's parameters"""
+    data = income_frame('volatile')
+    
+    previous = fit_model('arima', data.iloc[:-7], 'user', 60, tmp_path)
+    assert previous['result']['warm_start'] is False
+    
+    fit = fit_model('arima', data, 'user', 60, tmp_path, warm_start=previous['result']['model_path'])
+    assert fit['error'] is None
+    assert fit['result']['warm_start'] is True
+    assert fit['result']['model_path'] == previous['result']['model_path']
+
+
+def test_fit_model_without_sigalrm(tmp_path, monkeypatch, income_frame):
+    """Test fits still run, without a time limit, where SIGALRM does not exist (Windows)"""
+    handler = signal.getsignal(signal.SIGALRM)
+    monkeypatch.delattr(signal, 'SIGALRM')
+    monkeypatch.delattr(signal, 'setitimer')
+    
+    fit = fit_model('rolling_mean', income_frame('stable'), 'user', 0.0001, tmp_path)
+    assert fit['error'] is None
+    assert fit['result']['model_path'] == str(tmp_path / "rolling_mean_user.pkl")
+    
+    monkeypatch.undo()
+    assert signal.getsignal(signal.SIGALRM) == handler
+
+
+def test_edits_move_the_data_watermark(db, test_user):
+    """Test editing a transaction makes the user's training data newer without a new row"""
+    def data_watermark():
+        users = get_users_with_sufficient_data(db, min_transactions=1)
+        return next(user.data_watermark for user in users if user.user_id == test_user.user_id)
+    
+    before = data_watermark()
+    transaction = db.query(Transaction).filter(Transaction.user_id == test_user.user_id).first()
+    
+    try:
+        transaction.description = f"{transaction.description} (edited)"
+        db.flush()
+        assert data_watermark() > before
+    finally:
+        db.rollback()
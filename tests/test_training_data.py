@@ -0,0 +1,29 @@
+import uuid
+import numpy as np
+import pandas as pd
+from app.daily_cashflow import load_daily_cashflow
+from app.training_data import write_training_series, TrainingSeries
+
+
+def test_bulk_series_match_per_user_rollup(db, test_user, tmp_path):
+    """Test the bulk series equal the zero-filled per-user rollup and are memory-mapped"""
+    user_id = str(test_user.user_id)
+    path = tmp_path / "training_data"
+    
+    assert write_training_series(db, path, [user_id, str(uuid.uuid4())]) == 1
+    series = TrainingSeries(path)
+    
+    cashflow = load_daily_cashflow(db, user_id)
+    income = cashflow.loc[cashflow['income_count'] > 0, 'income_inr']
+    income.index = pd.to_datetime(income.index)
+    expected = income.reindex(pd.date_range(income.index.min(), income.index.max(), freq='D'), fill_value=0.0)
+    
+    frame = series.frame(user_id)
+    assert series.users() == [user_id]
+    assert isinstance(series.income, np.memmap)
+    assert list(frame['ds']) == list(expected.index)
+    assert np.allclose(frame['y'], expected.to_numpy())
+    
+    # Rewrites replace the directory; users below the threshold are left out
+    assert write_training_series(db, path, [user_id], min_income_transactions=10 ** 6) == 0
+    assert len(TrainingSeries(path)) == 0
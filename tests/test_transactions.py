@@ -116,3 +116,30 @@ def test_sync_transactions(client, auth_headers, db, test_user):
     assert response.status_code == 200
     data = response.json()
     assert data["status"] == "success"
+
+
+def test_update_and_delete_manual_transaction(client, auth_headers):
+    """Test manual transactions can be edited and deleted by id"""
+    accounts_response = client.get("/transactions/bank-accounts", headers=auth_headers)
+    payload = {
+        "account_id": accounts_response.json()[0]["account_id"],
+        "txn_timestamp": datetime.utcnow().isoformat(),
+        "amount_inr": "1200.00",
+        "txn_type": "credit",
+        "balance_after_txn": "51200.00",
+        "description": "Manual entry test",
+        "merchant_category": "freelancing"
+    }
+    
+    created = client.post("/manual/transactions", headers=auth_headers, json=payload)
+    assert created.status_code == 200
+    transaction_id = created.json()["transaction_id"]
+    
+    updated = client.put(f"/manual/transactions/{transaction_id}", headers=auth_headers,
+                         json={**payload, "amount_inr": "1500.00"})
+    assert updated.status_code == 200
+    assert float(updated.json()["amount_inr"]) == 1500.00
+    
+    deleted = client.delete(f"/manual/transactions/{transaction_id}", headers=auth_headers)
+    assert deleted.status_code == 200
+    assert client.delete(f"/manual/transactions/{transaction_id}", headers=auth_headers).status_code == 404